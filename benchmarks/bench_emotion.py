@@ -0,0 +1,162 @@
+"""
+emotion_analysor 进程内热点路径的基准用例
+"""
+import tempfile
+
+from fixtures import EMOTION_TEXTS, analysis_log_dir, llm_outputs, wav_file
+from harness import bench
+
+
+def _crew():
+    # 解析相关方法不依赖 OpenAI 客户端，跳过 __init__ 避免构造客户端
+    from crew.emotion_crew import EmotionDetectionCrew
+    return EmotionDetectionCrew.__new__(EmotionDetectionCrew)
+
+
+@bench("emotion", rounds=200, requires=["openai", "pydantic"])
+def parse_result_fenced_json():
+    crew = _crew()
+    text = llm_outputs()["fenced"]
+    return lambda: crew._parse_result(text)
+
+
+@bench("emotion", rounds=200, requires=["openai", "pydantic"])
+def parse_result_messy_json():
+    crew = _crew()
+    text = llm_outputs()["messy"]
+    return lambda: crew._parse_result(text)
+
+
+@bench("emotion", rounds=200, requires=["openai", "pydantic"])
+def extract_and_clean_json():
+    crew = _crew()
+    text = llm_outputs()["messy"]
+    return lambda: crew._clean_json(crew._extract_json(text))
+
+
+@bench("emotion", rounds=200, requires=["openai", "pydantic"])
+def heuristic_parse_prose():
+    crew = _crew()
+    text = llm_outputs()["prose"]
+    return lambda: crew._heuristic_parse(text)
+
+
+@bench("emotion", rounds=10, warmup=1, requires=["openai", "pydantic"])
+def encode_audio_50mb_wav():
+    from request_builder import encode_audio
+    path = str(wav_file(50))
+    return lambda: encode_audio(path)
+
+
+@bench("emotion", rounds=500, requires=["pydantic"])
+def validate_request_model():
+    from models import EmotionDetectRequest
+    payload = {
+        "text": EMOTION_TEXTS[0],
+        "audio_url": "/srv/uploads/recording.webm",
+        "conversation_history": [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": EMOTION_TEXTS[i % len(EMOTION_TEXTS)]}
+            for i in range(10)
+        ]
+    }
+    return lambda: EmotionDetectRequest.model_validate(payload)
+
+
+@bench("emotion", rounds=500, requires=["pydantic"])
+def build_and_dump_response_model():
+    from models import EmotionDetectResponse, EmotionResult
+    emotions = [
+        {"emotion": e, "confidence": 0.8, "reason": "文本中出现了相关的情绪表达"}
+        for e in ["开心", "兴奋", "满足", "期待", "感激"]
+    ]
+
+    def run():
+        response = EmotionDetectResponse(
+            success=True,
+            emotions=[EmotionResult(**e) for e in emotions],
+            primary_emotion="开心"
+        )
+        return response.model_dump_json()
+    return run
+
+
+@bench("emotion", rounds=500, requires=["pydantic", "orjson"])
+def build_and_dump_response_orjson():
+    import orjson
+    from models import EmotionAnalysis, make_emotion
+    emotions = [
+        {"emotion": e, "confidence": 0.8, "reason": "文本中出现了相关的情绪表达"}
+        for e in ["开心", "兴奋", "满足", "期待", "感激"]
+    ]
+
+    def run():
+        response = EmotionAnalysis(
+            success=True,
+            emotions=[make_emotion(**e) for e in emotions],
+            primary_emotion="开心"
+        )
+        return orjson.dumps(response.to_dict())
+    return run
+
+
+@bench("emotion", rounds=5, warmup=1, requires=["dotenv"])
+def data_logger_statistics_100k():
+    from data_logger import DataLogger
+    data_logger = DataLogger(log_dir=str(analysis_log_dir(100_000)))
+    return lambda: data_logger.get_statistics()
+
+
+@bench("emotion", rounds=1000, requires=["dotenv"])
+def data_logger_log_analysis():
+    from data_logger import DataLogger
+    data_logger = DataLogger(log_dir=tempfile.mkdtemp(prefix="bench_logs_"))
+    history = [{"role": "user", "content": t} for t in EMOTION_TEXTS]
+    result = {
+        "success": True,
+        "emotions": [{"emotion": "开心", "confidence": 0.9, "reason": "积极表达"}],
+        "primary_emotion": "开心"
+    }
+    return lambda: data_logger.log_analysis(
+        timestamp="2025-10-16T12:00:00",
+        text_input=EMOTION_TEXTS[0],
+        audio_input=None,
+        conversation_history=history,
+        analysis_result=result,
+        processing_time=1.234
+    )
+
+
+@bench("emotion", rounds=50, requires=["numpy"])
+def prosody_features_10s():
+    import numpy as np
+    from audio_features import extract_prosody_features
+    sample_rate = 16000
+    t = np.arange(10 * sample_rate) / sample_rate
+    # 带音高起伏和停顿的合成语音：基频 180-240Hz，每 0.6 秒一个语音段
+    f0 = 210 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    envelope = (np.mod(t, 0.6) < 0.35).astype(np.float32)
+    samples = (0.3 * envelope * (np.sin(phase) + 0.5 * np.sin(2 * phase))).astype(np.float32)
+    return lambda: extract_prosody_features(samples, sample_rate)
+
+
+@bench("emotion", rounds=50, requires=["numpy"])
+def plan_windows_3min():
+    import numpy as np
+    from audio_features import plan_windows
+    sample_rate = 16000
+    t = np.arange(180 * sample_rate) / sample_rate
+    # 3 分钟合成语音：每 4 秒一句，句间 0.5 秒静音
+    envelope = (np.mod(t, 4.0) < 3.5).astype(np.float32)
+    samples = (0.3 * envelope * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+    return lambda: plan_windows(samples, sample_rate, 15, 1.5)
+
+
+@bench("emotion", rounds=200)
+def semantic_cache_lookup_10k():
+    from semantic_cache import SemanticCache
+    cache = SemanticCache(threshold=0.8, max_entries=10000)
+    for i in range(10000):
+        cache.put(f"{EMOTION_TEXTS[i % len(EMOTION_TEXTS)]}（第{i}条）", i)
+    queries = [f"{text}！！" for text in EMOTION_TEXTS]
+    return lambda: [cache.get(q) for q in queries]
@@ -0,0 +1,56 @@
+"""
+meeting_assistant 进程内热点路径的基准用例
+"""
+from fixtures import long_transcript
+from harness import bench
+
+
+@bench("meeting", rounds=50, requires=["crewai"])
+def create_transcription_task_long():
+    from tasks import create_transcription_task
+    transcript = long_transcript()
+    return lambda: create_transcription_task(None, transcript)
+
+
+@bench("meeting", rounds=50, requires=["crewai"])
+def create_summary_task_long():
+    from tasks import create_summary_task
+    transcript = long_transcript()
+    return lambda: create_summary_task(None, transcript)
+
+
+@bench("meeting", rounds=50, requires=["crewai"])
+def create_qa_task_long():
+    from tasks import create_qa_task
+    transcript = long_transcript()
+    return lambda: create_qa_task(None, transcript, "李四负责什么任务？")
+
+
+@bench("meeting", rounds=10)
+def split_transcript_by_tokens_long():
+    from tokens import split_by_tokens
+    transcript = long_transcript()
+    return lambda: split_by_tokens(transcript, 8000, overlap_lines=2)
+
+
+@bench("meeting", rounds=500, requires=["pydantic"])
+def validate_qa_request_long():
+    from models import QuestionRequest
+    payload = {"meeting_content": long_transcript(), "question": "会议的主要决策是什么？"}
+    return lambda: QuestionRequest.model_validate(payload)
+
+
+@bench("meeting", rounds=5, requires=["numpy"])
+def build_retrieval_index_long():
+    from retrieval import MeetingRetriever
+    transcript = long_transcript()
+    return lambda: MeetingRetriever(cache_size=0).select(transcript, "李四负责什么任务？")
+
+
+@bench("meeting", rounds=200, requires=["numpy"])
+def retrieve_qa_context_long():
+    from retrieval import MeetingRetriever
+    transcript = long_transcript()
+    retriever = MeetingRetriever()
+    retriever.select(transcript, "会议的主要决策是什么？")
+    return lambda: retriever.select(transcript, "李四负责什么任务？")
@@ -0,0 +1,192 @@
+"""
+执行方式对比 - meeting_assistant 的 direct（一次对话调用）与 crewai（单 agent 的 Crew）
+
+对转写整理、纪要、问答三个任务分别用两种执行方式执行，在共享连接池上挂钩统计：
+- 端到端耗时（中位数）
+- 上游对话调用次数
+- 上游返回的 prompt / completion tokens
+- 上行请求体大小
+
+用法：
+    python compare_execution.py                          # 自动启动 fake_provider
+    python compare_execution.py --chars 20000 --runs 5
+    python compare_execution.py --upstream https://api.deepseek.com --api-key sk-... --output execution_report.json
+
+qa_full 是关闭检索、把全文交给模型的问答，与 qa（超过 QA_FULL_CONTEXT_MAX_TOKENS 时只交相关片段）对比
+prompt tokens 和耗时；索引在预热调用中建立，测得的是同一场会议后续每个问题的开销。
+qa_each 逐个回答 5 个问题，qa_batch 用批量问答一次回答同样的 5 个问题（流式调用，只统计调用数和上行字节）。
+
+未安装 crewai 时只测量 direct。fake_provider 的 token 数按字符计，只用于对比两种方式的相对差异。
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from fixtures import long_transcript
+from startup import ROOT, start_fake_provider
+
+MEETING_DIR = os.path.join(ROOT, "meeting_assistant")
+QUESTION = "李四负责什么任务？截止时间是什么时候？"
+QUESTIONS = ["李四负责什么任务？", "截止时间是什么时候？", "会议做了哪些决定？", "下一步计划是什么？", "王五提出了什么问题？"]
+
+
+class UpstreamCounter:
+    """统计经过共享连接池的对话调用"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.request_bytes = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def on_request(self, request: httpx.Request):
+        if request.url.path.endswith("/chat/completions"):
+            self.calls += 1
+            self.request_bytes += len(request.content)
+
+    def on_response(self, response: httpx.Response):
+        if not response.request.url.path.endswith("/chat/completions") or response.status_code != 200:
+            return
+        if response.headers.get("content-type", "").startswith("text/event-stream"):
+            return  # 流式响应不在钩子里读取（会耗尽响应流），只统计调用数和上行字节
+        response.read()
+        usage = response.json().get("usage") or {}
+        self.prompt_tokens += usage.get("prompt_tokens", 0)
+        self.completion_tokens += usage.get("completion_tokens", 0)
+
+
+def measure(crew, counter: UpstreamCounter, operation: str, transcript: str, runs: int) -> Dict:
+    calls = {
+        "transcription": lambda: crew.transcribe_meeting(text_content=transcript),
+        "summary": lambda: crew.generate_summary(transcript),
+        "qa": lambda: crew.answer_question(transcript, QUESTION),
+        "qa_full": lambda: crew.answer_question(transcript, QUESTION),
+        "qa_each": lambda: [crew.answer_question(transcript, question) for question in QUESTIONS][-1],
+        "qa_batch": lambda: crew.answer_questions(transcript, QUESTIONS, lambda answer: None),
+    }
+    if operation == "qa_full":
+        crew.retriever.full_context_max_tokens = float("inf")
+    call = calls[operation]
+    call()  # 预热：建立连接、创建 agents
+
+    seconds = []
+    counter.reset()
+    errors = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = call()
+        seconds.append(time.perf_counter() - start)
+        if "error" in result:
+            errors.append(result["error"])
+    return {
+        "median_seconds": round(statistics.median(seconds), 3),
+        "calls": counter.calls / runs,
+        "prompt_tokens": counter.prompt_tokens / runs,
+        "completion_tokens": counter.completion_tokens / runs,
+        "request_bytes": counter.request_bytes / runs,
+        "errors": errors[:3],
+    }
+
+
+def _delta(direct: float, crewai: float) -> str:
+    if not crewai:
+        return "-"
+    return f"{(direct - crewai) / crewai * 100:+.1f}%"
+
+
+def print_report(report: Dict):
+    print(f"\n转写文本 {report['chars']} 字，每项 {report['runs']} 次")
+    for operation, modes in report["operations"].items():
+        print(f"\n{operation}")
+        print(f"  {'':8}{'耗时':>10}{'调用数':>8}{'prompt':>12}{'completion':>12}{'上行字节':>12}")
+        for mode, row in modes.items():
+            print(f"  {mode:8}{row['median_seconds']:>9}s{row['calls']:>8.1f}{row['prompt_tokens']:>12.0f}"
+                  f"{row['completion_tokens']:>12.0f}{row['request_bytes']:>12.0f}")
+            for error in row["errors"]:
+                print(f"    ⚠️  {error}")
+        if "crewai" in modes:
+            direct, crewai = modes["direct"], modes["crewai"]
+            print(f"  {'变化':8}{_delta(direct['median_seconds'], crewai['median_seconds']):>10}"
+                  f"{_delta(direct['calls'], crewai['calls']):>8}"
+                  f"{_delta(direct['prompt_tokens'], crewai['prompt_tokens']):>12}"
+                  f"{_delta(direct['completion_tokens'], crewai['completion_tokens']):>12}"
+                  f"{_delta(direct['request_bytes'], crewai['request_bytes']):>12}")
+
+
+def run(chars: int, runs: int, operations: List[str]) -> Dict:
+    # 环境变量已设置好，此时才导入 meeting_assistant 的模块
+    sys.path.insert(0, MEETING_DIR)
+    import clients
+    from config import API_BASE_URL
+    from crew import MeetingAssistantCrew
+
+    counter = UpstreamCounter()
+    hooks = clients.get_http_client(API_BASE_URL).event_hooks
+    hooks["request"].append(counter.on_request)
+    hooks["response"].append(counter.on_response)
+
+    modes = ["direct"]
+    try:
+        import crewai  # noqa: F401
+        modes.append("crewai")
+    except ImportError:
+        print("未安装 crewai，只测量 direct")
+
+    transcript = long_transcript(chars)
+    report = {"chars": chars, "runs": runs, "operations": {}}
+    for operation in operations:
+        report["operations"][operation] = {
+            mode: measure(MeetingAssistantCrew(execution_mode=mode), counter, operation, transcript, runs)
+            for mode in modes
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比 meeting_assistant 的 direct 与 crewai 执行方式")
+    parser.add_argument("--chars", type=int, default=5000, help="转写文本字数")
+    parser.add_argument("--runs", type=int, default=3, help="每项测量的次数（耗时取中位数）")
+    parser.add_argument("--operations", default="transcription,summary,qa,qa_full")
+    parser.add_argument("--upstream", default=None, help="上游地址，默认自动启动 loadtest/fake_provider.py")
+    parser.add_argument("--api-key", default="fake")
+    parser.add_argument("--upstream-latency-ms", type=float, default=200, help="自动启动的 fake_provider 的延迟")
+    parser.add_argument("--output", default=None, help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    provider = None
+    upstream: Optional[str] = args.upstream
+    if upstream is None:
+        provider, upstream = start_fake_provider(args.upstream_latency_ms)
+    os.environ.update({
+        "USE_DEEPSEEK": "true",
+        "DEEPSEEK_API_KEY": args.api_key,
+        "DEEPSEEK_API_BASE": upstream,
+        "CREW_VERBOSE": "false",
+        # 每项重复执行同样的输入，关闭缓存才能测到上游调用
+        "QA_CACHE_ENABLED": "false",
+        "PIPELINE_CACHE_ENABLED": "false",
+    })
+
+    try:
+        report = run(args.chars, args.runs, args.operations.split(","))
+        print_report(report)
+    finally:
+        if provider:
+            provider.terminate()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
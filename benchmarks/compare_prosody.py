@@ -0,0 +1,114 @@
+"""
+omni 与 prosody 两种音频分析方式的对比
+
+对目录中的每个音频文件分别走两条路径：
+- omni：上传原始音频给 OMNI_LLM_MODEL
+- prosody：本地提取声学特征，连同文本一起交给 TEXT_LLM_MODEL
+
+报告每条路径的延迟、上行负载大小、特征提取耗时，以及与 omni 结果的一致性
+（主要情绪是否一致、前三情绪的重合度）。需要可用的上游（真实 API 或 loadtest/fake_provider.py）。
+
+用法：
+    python compare_prosody.py --audio-dir ./samples [--text "可选的伴随文本"] [--output report.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "emotion_analysor"))
+
+from config import config  # noqa: E402
+from crew.emotion_crew import EmotionDetectionCrew  # noqa: E402
+from models import EmotionDetectRequest  # noqa: E402
+
+AUDIO_EXTENSIONS = {".wav", ".webm", ".ogg", ".mp3", ".m4a", ".flac"}
+
+
+def run_mode(crew: EmotionDetectionCrew, mode: str, audio_path: str, text: str):
+    config.AUDIO_ANALYSIS_MODE = mode
+    request = EmotionDetectRequest(text=text or None, audio_url=audio_path, conversation_history=[])
+    start = time.perf_counter()
+    result = crew.analyze_emotion(request)
+    latency = time.perf_counter() - start
+    audio_info = result.audio_info or {}
+    return {
+        "success": result.success,
+        "latency": latency,
+        "payload_bytes": audio_info.get("payload_bytes", 0),
+        "extract_ms": audio_info.get("extract_ms"),
+        "primary_emotion": result.primary_emotion,
+        "top3": [e.emotion for e in sorted(result.emotions, key=lambda e: -e.confidence)[:3]]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="omni 与 prosody 音频分析方式对比")
+    parser.add_argument("--audio-dir", required=True)
+    parser.add_argument("--text", default="")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    files = sorted(
+        os.path.join(args.audio_dir, name) for name in os.listdir(args.audio_dir)
+        if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS
+    )
+    if not files:
+        print(f"目录中没有音频文件: {args.audio_dir}")
+        sys.exit(1)
+
+    crew = EmotionDetectionCrew()
+    rows = []
+    for path in files:
+        omni = run_mode(crew, "omni", path, args.text)
+        prosody = run_mode(crew, "prosody", path, args.text)
+        overlap = len(set(omni["top3"]) & set(prosody["top3"])) / max(len(set(omni["top3"]) | set(prosody["top3"])), 1)
+        rows.append({
+            "file": os.path.basename(path),
+            "omni": omni,
+            "prosody": prosody,
+            "primary_agree": omni["primary_emotion"] == prosody["primary_emotion"],
+            "top3_jaccard": round(overlap, 3)
+        })
+        print(f"{os.path.basename(path):<32} omni {omni['latency']:.2f}s/{omni['payload_bytes']}B "
+              f"[{omni['primary_emotion']}]  prosody {prosody['latency']:.2f}s/{prosody['payload_bytes']}B "
+              f"[{prosody['primary_emotion']}]")
+
+    def summary(mode):
+        latencies = [r[mode]["latency"] for r in rows]
+        return {
+            "latency_median": round(statistics.median(latencies), 3),
+            "latency_mean": round(statistics.fmean(latencies), 3),
+            "payload_bytes_mean": round(statistics.fmean(r[mode]["payload_bytes"] for r in rows)),
+            "success_rate": round(sum(r[mode]["success"] for r in rows) / len(rows), 3)
+        }
+
+    extract = [r["prosody"]["extract_ms"] for r in rows if r["prosody"]["extract_ms"] is not None]
+    report = {
+        "files": len(rows),
+        "omni": summary("omni"),
+        "prosody": summary("prosody"),
+        "prosody_extract_ms_median": round(statistics.median(extract), 2) if extract else None,
+        "primary_agreement": round(sum(r["primary_agree"] for r in rows) / len(rows), 3),
+        "top3_jaccard_mean": round(statistics.fmean(r["top3_jaccard"] for r in rows), 3),
+        "rows": rows
+    }
+
+    print("\n" + "=" * 60)
+    print(f"  文件数: {report['files']}")
+    print(f"  omni    延迟中位数 {report['omni']['latency_median']}s, 平均负载 {report['omni']['payload_bytes_mean']} B")
+    print(f"  prosody 延迟中位数 {report['prosody']['latency_median']}s, 平均负载 {report['prosody']['payload_bytes_mean']} B, "
+          f"特征提取中位数 {report['prosody_extract_ms_median']} ms")
+    print(f"  主要情绪一致率: {report['primary_agreement']:.0%}, 前三情绪重合度: {report['top3_jaccard_mean']:.2f}")
+    print("=" * 60)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+转写方式对比 - meeting_assistant 的整段单次调用、分块并行转写和去除静音后转写
+
+对同一段录音分别：
+- single: 整段一次 Whisper 调用（LONG_AUDIO_ENABLED=false、VAD_ENABLED=false 时的路径）
+- chunked: 分块并行转写（WHISPER_CHUNK_SECONDS / WHISPER_CONCURRENCY）
+- vad: 先用 VAD 去掉长静音，再按需分块转写
+
+报告端到端耗时、分块数、分段数、chunked 相对 single 的加速比，以及 VAD 去掉的秒数和相对 chunked 节省的时间。
+
+用法：
+    python compare_transcription.py                          # 60 分钟模拟录音，自动启动 fake_provider
+    python compare_transcription.py --minutes 120 --concurrency 8
+    python compare_transcription.py --audio meeting.mp3 --upstream https://api.openai.com/v1 --api-key sk-...
+
+fake_provider 的转写延迟为 --base-latency-ms + 每秒音频 --ms-per-audio-second，模拟 Whisper 耗时随时长增长。
+真实上游通常拒绝超过 25MB 的单次上传，此时 single 会失败，只报告 chunked。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+from fixtures import meeting_wav
+from startup import ROOT, start_fake_provider
+
+MEETING_DIR = os.path.join(ROOT, "meeting_assistant")
+
+
+def measure(tool_module, mode: str, audio_path: str) -> Dict:
+    # 直接切换模块里的开关，同一进程内对比各条路径
+    tool_module.LONG_AUDIO_ENABLED = mode != "single"
+    tool_module.VAD_ENABLED = mode == "vad"
+    tool_module.LONG_AUDIO_SECONDS = 0
+    tool = tool_module.TranscriptionTool()
+    start = time.perf_counter()
+    result = tool.transcribe_audio(audio_path)
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": round(seconds, 3),
+        "segments": len(result.get("segments", [])),
+        "chunks": result.get("chunking", {}).get("chunks", 1),
+        "removed_seconds": result.get("vad", {}).get("removed_seconds", 0.0),
+        "error": result.get("error"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比整段单次转写、分块并行转写和去除静音后转写")
+    parser.add_argument("--audio", default=None, help="录音文件，默认生成模拟会议录音")
+    parser.add_argument("--minutes", type=int, default=60, help="模拟录音时长（分钟）")
+    parser.add_argument("--chunk-seconds", type=float, default=None, help="覆盖 WHISPER_CHUNK_SECONDS")
+    parser.add_argument("--concurrency", type=int, default=None, help="覆盖 WHISPER_CONCURRENCY")
+    parser.add_argument("--upstream", default=None, help="Whisper 上游地址，默认自动启动 loadtest/fake_provider.py")
+    parser.add_argument("--api-key", default="fake")
+    parser.add_argument("--base-latency-ms", type=float, default=300, help="fake_provider 每次转写的固定延迟")
+    parser.add_argument("--ms-per-audio-second", type=float, default=20, help="fake_provider 每秒音频追加的延迟")
+    parser.add_argument("--output", default=None, help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    audio_path = args.audio or str(meeting_wav(args.minutes))
+
+    provider = None
+    upstream: Optional[str] = args.upstream
+    if upstream is None:
+        provider, upstream = start_fake_provider(50, [
+            "--transcription-latency-ms", str(args.base_latency_ms),
+            "--transcription-ms-per-audio-second", str(args.ms_per_audio_second),
+        ])
+    os.environ.update({"WHISPER_API_KEY": args.api_key, "WHISPER_API_BASE": upstream})
+    if args.chunk_seconds:
+        os.environ["WHISPER_CHUNK_SECONDS"] = str(args.chunk_seconds)
+    if args.concurrency:
+        os.environ["WHISPER_CONCURRENCY"] = str(args.concurrency)
+
+    try:
+        # 环境变量已设置好，此时才导入 meeting_assistant 的模块
+        sys.path.insert(0, MEETING_DIR)
+        from tools import transcription_tool
+
+        report = {"audio": audio_path, "modes": {}}
+        for mode in ("single", "chunked", "vad"):
+            report["modes"][mode] = measure(transcription_tool, mode, audio_path)
+    finally:
+        if provider:
+            provider.terminate()
+
+    single, chunked, vad = (report["modes"][mode] for mode in ("single", "chunked", "vad"))
+    if not single["error"] and not chunked["error"]:
+        report["speedup"] = round(single["seconds"] / chunked["seconds"], 2)
+    if not chunked["error"] and not vad["error"]:
+        report["vad_time_saved_seconds"] = round(chunked["seconds"] - vad["seconds"], 3)
+
+    print(f"\n{audio_path}")
+    for mode, row in report["modes"].items():
+        line = f"  {mode:8} {row['seconds']:>8}s  {row['chunks']:>3} 块  {row['segments']:>5} 个分段"
+        print(line + (f"  ⚠️  {row['error']}" if row["error"] else ""))
+    if "speedup" in report:
+        print(f"  分块加速比: {report['speedup']}x")
+    if "vad_time_saved_seconds" in report:
+        print(f"  VAD 去掉静音 {vad['removed_seconds']}s，相对 chunked 节省 {report['vad_time_saved_seconds']}s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+基准测试数据 - 生成贴近真实负载的测试数据
+
+大文件（50MB WAV、10万行日志）首次生成后缓存在 benchmarks/.fixtures/ 下。
+"""
+import json
+import os
+import random
+import wave
+from datetime import datetime
+from pathlib import Path
+
+FIXTURE_DIR = Path(__file__).parent / ".fixtures"
+
+SPEAKERS = ["张三", "李四", "王五", "赵六", "陈七"]
+
+SENTENCES = [
+    "我们先回顾一下上周的进度，移动端的登录模块已经完成联调。",
+    "根据数据分析，百分之六十的用户访问来自移动设备，体验还有很大提升空间。",
+    "这个问题我觉得需要和产品经理再确认一下需求边界。",
+    "资源方面，目前团队有十个开发人员，测试资源比较紧张。",
+    "行动项：李四负责移动端架构设计，下周五前完成。",
+    "我补充一点，消息推送的服务商合同下个月到期，需要尽快评估替代方案。",
+    "离线模式的优先级可以往后放，先保证核心业务功能的稳定性。",
+    "关于预算，财务那边反馈第三季度还有一部分余量可以调配。",
+    "大家对这个排期还有没有异议？没有的话我们就按这个推进。",
+    "嗯，对，这个我同意，不过上线前一定要做一轮完整的回归测试。",
+]
+
+EMOTION_TEXTS = [
+    "今天真的太开心了！工作进展顺利，还收到了好消息，感觉一切都很美好！",
+    "唉，又被老板批评了，感觉自己怎么做都不对……",
+    "这都第三次延期了，到底还要等多久？！",
+    "明天就要面试了，心里有点紧张，不知道能不能发挥好。",
+    "谢谢你一直陪着我，真的很感动。",
+]
+
+
+def long_transcript(n_chars: int = 120_000, seed: int = 42) -> str:
+    """生成一段带说话人的长中文会议转写（默认约两小时会议的字数）"""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    minute = 0
+    while total < n_chars:
+        speaker = rng.choice(SPEAKERS)
+        content = "".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, 4)))
+        line = f"[{minute // 60:02d}:{minute % 60:02d}] {speaker}：{content}"
+        lines.append(line)
+        total += len(line) + 1
+        minute += 1
+    return "\n".join(lines)
+
+
+def llm_outputs() -> dict:
+    """各种形态的模型输出，覆盖 _parse_result 的不同分支"""
+    emotions = [
+        {"emotion": e, "confidence": round(0.9 - i * 0.1, 2), "reason": f"文本中出现了与{e}相关的表达，语气明显"}
+        for i, e in enumerate(["开心", "兴奋", "满足", "期待", "感激"])
+    ]
+    payload = json.dumps({"emotions": emotions, "primary_emotion": "开心"}, ensure_ascii=False, indent=4)
+    fenced = f"好的，以下是分析结果：\n```json\n{payload}\n```\n希望对你有帮助。"
+    messy = (
+        "分析如下：\n{\n"
+        "    // 识别出的情绪\n"
+        '    "emotions": [\n'
+        '        {"emotion": "焦虑", "confidence": 0.8, "reason": "提到面试和紧张",},\n'
+        '        /* 次要情绪 */\n'
+        '        {"emotion": "期待", "confidence": 0.6, "reason": "对结果有所期待"},\n'
+        "    ],\n"
+        '    "primary_emotion": "焦虑",\n'
+        "}\n"
+    )
+    prose = (
+        "用户整体表现出比较明显的焦虑和担心，同时夹杂着一些期待。"
+        "从语气上看，用户对即将到来的事情感到紧张，但也有希望和好奇。" * 20
+    )
+    return {"fenced": fenced, "messy": messy, "prose": prose, "plain": payload}
+
+
+def wav_file(size_mb: int = 50) -> Path:
+    """生成（或复用）一个约 size_mb 大小的 16kHz 16bit 单声道 WAV"""
+    FIXTURE_DIR.mkdir(exist_ok=True)
+    path = FIXTURE_DIR / f"audio_{size_mb}mb.wav"
+    if not path.exists():
+        n_bytes = size_mb * 1024 * 1024
+        with wave.open(str(path), 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            chunk = os.urandom(1024 * 1024)
+            for _ in range(size_mb):
+                wav.writeframes(chunk)
+        assert path.stat().st_size >= n_bytes
+    return path
+
+
+def meeting_wav(minutes: int = 60, seed: int = 11) -> Path:
+    """
+    生成（或复用）一段模拟会议录音：16kHz 16bit 单声道 WAV
+
+    类语音的调制噪声（2-15 秒一句），句间 0.3-2 秒停顿，开头 3 分钟会前空白，
+    每约 15 分钟一次 1-2 分钟的中场休息；静音段为低电平底噪。
+    """
+    import numpy as np
+
+    FIXTURE_DIR.mkdir(exist_ok=True)
+    path = FIXTURE_DIR / f"meeting_{minutes}min.wav"
+    if path.exists():
+        return path
+
+    rate = 16000
+    rng = np.random.default_rng(seed)
+    total = minutes * 60 * rate
+
+    def silence(seconds: float) -> np.ndarray:
+        return rng.normal(0, 30, int(seconds * rate))
+
+    def speech(seconds: float) -> np.ndarray:
+        n = int(seconds * rate)
+        t = np.arange(n) / rate
+        envelope = 0.55 + 0.45 * np.sin(2 * np.pi * rng.uniform(3, 6) * t)  # 音节节奏
+        return rng.normal(0, 3000, n) * envelope
+
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        written = 0
+        next_break = 15 * 60 * rate
+        parts = [silence(180)]
+        while written < total:
+            for part in parts:
+                part = part[:total - written]
+                wav.writeframes(np.clip(part, -32768, 32767).astype('<i2').tobytes())
+                written += len(part)
+            if written >= next_break:
+                parts = [silence(rng.uniform(60, 120))]
+                next_break += 15 * 60 * rate
+            else:
+                parts = [speech(rng.uniform(2, 15)), silence(rng.uniform(0.3, 2))]
+    return path
+
+
+def analysis_log_dir(n_lines: int = 100_000, seed: int = 7) -> Path:
+    """生成（或复用）一个包含 n_lines 条记录的 DataLogger 日志目录"""
+    log_dir = FIXTURE_DIR / f"data_logs_{n_lines}"
+    today = datetime.now().strftime("%Y-%m-%d")
+    log_file = log_dir / f"emotion_analysis_{today}.jsonl"
+    if log_file.exists():
+        return log_dir
+
+    # 日志文件名与日期绑定，换天后重新生成
+    if log_dir.exists():
+        for old in log_dir.iterdir():
+            old.unlink()
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    rng = random.Random(seed)
+    categories = ["开心", "悲伤", "愤怒", "焦虑", "平静", "期待", "感激", "疲惫"]
+    with open(log_file, 'w', encoding='utf-8') as f:
+        for i in range(n_lines):
+            success = rng.random() > 0.05
+            primary = rng.choice(categories)
+            entry = {
+                "timestamp": f"{today}T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+                "inputs": {
+                    "text": rng.choice(EMOTION_TEXTS),
+                    "audio_path": f"/srv/uploads/{rng.getrandbits(64):016x}.webm" if rng.random() < 0.3 else None,
+                    "conversation_history": [
+                        {"role": "user", "content": rng.choice(EMOTION_TEXTS)},
+                        {"role": "assistant", "content": f"识别到主要情绪: {rng.choice(categories)}"}
+                    ]
+                },
+                "result": {
+                    "success": True,
+                    "emotions": [{"emotion": primary, "confidence": 0.85, "reason": "关键词与语气"}],
+                    "primary_emotion": primary
+                } if success else {},
+                "processing_time_seconds": round(rng.uniform(0.5, 6.0), 3),
+                "success": success,
+                "error": None if success else "upstream timeout"
+            }
+            json.dump(entry, f, ensure_ascii=False)
+            f.write('\n')
+    return log_dir
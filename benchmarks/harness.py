@@ -0,0 +1,175 @@
+"""
+基准测试框架 - 计时、记录基线、对比回归
+
+用法与 pytest-benchmark 类似：用 @bench 注册用例，用例接收 fixtures 并返回一个
+无参可调用对象（被计时的部分），准备工作放在返回之前，不计入耗时。
+"""
+import json
+import platform
+import statistics
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+
+@dataclass
+class BenchCase:
+    """一个基准用例"""
+    name: str
+    setup: Callable[..., Callable[[], object]]
+    rounds: int = 20
+    warmup: int = 2
+    requires: List[str] = field(default_factory=list)
+
+
+@dataclass
+class BenchResult:
+    """一个用例的测量结果（秒）"""
+    name: str
+    rounds: int
+    min: float
+    median: float
+    mean: float
+    stdev: float
+    skipped: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+_REGISTRY: Dict[str, List[BenchCase]] = {}
+
+
+def bench(target: str, name: Optional[str] = None, rounds: int = 20, warmup: int = 2,
+          requires: Optional[List[str]] = None):
+    """注册一个基准用例"""
+    def decorator(func):
+        _REGISTRY.setdefault(target, []).append(BenchCase(
+            name=name or func.__name__,
+            setup=func,
+            rounds=rounds,
+            warmup=warmup,
+            requires=requires or []
+        ))
+        return func
+    return decorator
+
+
+def registered(target: str) -> List[BenchCase]:
+    return list(_REGISTRY.get(target, []))
+
+
+def _missing_requirement(case: BenchCase) -> Optional[str]:
+    for module in case.requires:
+        try:
+            __import__(module)
+        except ImportError:
+            return module
+    return None
+
+
+def run_case(case: BenchCase, rounds_scale: float = 1.0) -> BenchResult:
+    """执行单个用例：预热后重复计时"""
+    missing = _missing_requirement(case)
+    if missing:
+        return BenchResult(case.name, 0, 0.0, 0.0, 0.0, 0.0, skipped=f"缺少依赖: {missing}")
+
+    func = case.setup()
+    for _ in range(case.warmup):
+        func()
+
+    rounds = max(3, int(case.rounds * rounds_scale))
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return BenchResult(
+        name=case.name,
+        rounds=rounds,
+        min=min(timings),
+        median=statistics.median(timings),
+        mean=statistics.fmean(timings),
+        stdev=statistics.stdev(timings) if len(timings) > 1 else 0.0
+    )
+
+
+def machine_info() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system()
+    }
+
+
+def save_baseline(target: str, results: List[BenchResult]):
+    """保存基线（只保存未跳过的用例）"""
+    BASELINE_DIR.mkdir(exist_ok=True)
+    data = {
+        "machine": machine_info(),
+        "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": {r.name: r.to_dict() for r in results if not r.skipped}
+    }
+    with open(BASELINE_DIR / f"{target}.json", 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_baseline(target: str) -> Optional[Dict]:
+    path = BASELINE_DIR / f"{target}.json"
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(results: List[BenchResult], baseline: Dict, threshold: float) -> List[Dict]:
+    """
+    与基线对比中位数
+
+    Returns:
+        每个用例的对比结果，regression=True 表示超过阈值
+    """
+    rows = []
+    for r in results:
+        base = baseline.get("results", {}).get(r.name)
+        if r.skipped or not base:
+            rows.append({"name": r.name, "ratio": None, "regression": False})
+            continue
+        ratio = r.median / base["median"] if base["median"] else 1.0
+        rows.append({"name": r.name, "ratio": ratio, "regression": ratio > 1.0 + threshold})
+    return rows
+
+
+def _fmt(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.3f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.1f}µs"
+
+
+def print_results(target: str, results: List[BenchResult], comparison: Optional[List[Dict]] = None):
+    """打印结果表格"""
+    ratios = {row["name"]: row for row in comparison or []}
+    print("\n" + "=" * 92)
+    print(f"  基准测试 - {target}")
+    print("=" * 92)
+    print(f"{'用例':<40}{'轮次':>6}{'min':>11}{'median':>11}{'stdev':>11}{'对比基线':>12}")
+    print("-" * 92)
+    for r in results:
+        if r.skipped:
+            print(f"{r.name:<40}  跳过（{r.skipped}）")
+            continue
+        row = ratios.get(r.name)
+        if row and row["ratio"] is not None:
+            flag = " ❌" if row["regression"] else ""
+            delta = f"{(row['ratio'] - 1) * 100:+.1f}%{flag}"
+        else:
+            delta = "-"
+        print(f"{r.name:<40}{r.rounds:>6}{_fmt(r.min):>11}{_fmt(r.median):>11}{_fmt(r.stdev):>11}{delta:>12}")
+    print("=" * 92 + "\n")
@@ -0,0 +1,83 @@
+"""
+基准测试入口
+
+用法：
+    python run.py                       # 运行全部用例并与基线对比
+    python run.py --target emotion      # 只运行 emotion_analysor 的用例
+    python run.py --save-baseline       # 运行并保存为新的基线
+    python run.py --threshold 0.15      # 中位数比基线慢 15% 以上视为回归
+    python run.py -k parse              # 只运行名称包含 parse 的用例
+
+存在回归时以退出码 1 结束，可直接用于 CI。
+"""
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+
+from harness import compare, load_baseline, print_results, registered, run_case, save_baseline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 两个服务的模块名（config / models / crew ...）相同，每个 target 单独一个进程运行
+TARGETS = {
+    "emotion": ("emotion_analysor", "bench_emotion"),
+    "meeting": ("meeting_assistant", "bench_meeting"),
+}
+
+
+def run_target(target: str, args) -> int:
+    app_dir, bench_module = TARGETS[target]
+    sys.path.insert(0, os.path.join(ROOT, app_dir))
+    importlib.import_module(bench_module)
+
+    cases = [c for c in registered(target) if not args.k or args.k in c.name]
+    results = [run_case(case, rounds_scale=args.rounds_scale) for case in cases]
+
+    baseline = load_baseline(target)
+    comparison = compare(results, baseline, args.threshold) if baseline and not args.save_baseline else None
+    print_results(target, results, comparison)
+
+    if args.save_baseline:
+        save_baseline(target, results)
+        print(f"基线已保存: benchmarks/baselines/{target}.json")
+        return 0
+
+    if baseline is None:
+        print(f"未找到 {target} 的基线，使用 --save-baseline 记录")
+        return 0
+
+    regressions = [row["name"] for row in comparison if row["regression"]]
+    if regressions:
+        print(f"❌ 性能回归（超过 {args.threshold:.0%}）: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="进程内热点路径基准测试")
+    parser.add_argument("--target", choices=list(TARGETS) + ["all"], default="all")
+    parser.add_argument("--save-baseline", action="store_true", help="保存本次结果为基线")
+    parser.add_argument("--threshold", type=float, default=0.2, help="回归阈值（相对基线中位数）")
+    parser.add_argument("--rounds-scale", type=float, default=1.0, help="轮次缩放系数")
+    parser.add_argument("-k", default=None, help="只运行名称包含该字符串的用例")
+    args = parser.parse_args()
+
+    if args.target != "all":
+        sys.exit(run_target(args.target, args))
+
+    exit_code = 0
+    for target in TARGETS:
+        cmd = [sys.executable, os.path.abspath(__file__), "--target", target,
+               "--threshold", str(args.threshold), "--rounds-scale", str(args.rounds_scale)]
+        if args.save_baseline:
+            cmd.append("--save-baseline")
+        if args.k:
+            cmd += ["-k", args.k]
+        exit_code |= subprocess.call(cmd)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+冷启动基准 - 模块导入耗时与首个成功请求耗时
+
+对每个服务：
+1. 在全新进程中导入 server 模块，记录耗时以及是否加载了 crewai / langchain 等重型依赖
+2. 启动服务进程（上游指向本地 fake_provider 或 --upstream），记录：
+   - ready: 进程启动到 /health 返回 200
+   - first_success: 进程启动到第一个业务请求成功返回
+   - first_request: 第一个成功业务请求本身的耗时
+
+用法：
+    python startup.py                          # 两个服务，自动启动 fake_provider
+    python startup.py --target emotion --runs 5
+    python startup.py --compare-warmup         # 分别在开启 / 关闭启动预热时测量
+    python startup.py --upstream http://127.0.0.1:9000/v1
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["crewai", "langchain_openai", "litellm", "numpy"]
+
+TARGETS = {
+    "emotion": {
+        "dir": os.path.join(ROOT, "emotion_analysor"),
+        "env": lambda upstream: {"DASHSCOPE_API_KEY": "fake", "DASHSCOPE_API_BASE": upstream},
+        "request": ("POST", "/api/emotion_detect", {"text": "今天终于把项目做完了，太开心了！", "conversation_history": []}),
+        "ok": lambda body: body.get("success") is True,
+    },
+    "meeting": {
+        "dir": os.path.join(ROOT, "meeting_assistant"),
+        "env": lambda upstream: {
+            "USE_DEEPSEEK": "true",
+            "DEEPSEEK_API_KEY": "fake",
+            "DEEPSEEK_API_BASE": upstream,
+            "WHISPER_API_BASE": upstream,
+        },
+        "request": ("POST", "/api/qa", {"meeting_content": "张三：下周三前完成接口联调。李四：好的。", "question": "接口联调什么时候完成？"}),
+        "ok": lambda body: bool(body.get("answer")),
+    },
+}
+
+IMPORT_PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import server\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({'seconds': elapsed, 'loaded': [m for m in %r if m in sys.modules]}))\n"
+) % HEAVY_MODULES
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import(target: str, env: Dict[str, str]) -> Dict:
+    """在全新进程中导入 server 模块"""
+    spec = TARGETS[target]
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=spec["dir"], env=env, capture_output=True, text=True, check=False
+    )
+    if out.returncode != 0:
+        return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "导入失败"}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_first_request(target: str, env: Dict[str, str], timeout: float) -> Dict:
+    """启动服务，测量就绪时间和第一个成功请求的时间"""
+    spec = TARGETS[target]
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    method, path, payload = spec["request"]
+
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=spec["dir"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    result: Dict = {}
+    try:
+        with httpx.Client(timeout=timeout) as client:
+            deadline = started + timeout
+            while time.perf_counter() < deadline:
+                try:
+                    if client.get(f"{base_url}/health").status_code == 200:
+                        result["ready"] = round(time.perf_counter() - started, 3)
+                        break
+                except httpx.TransportError:
+                    pass
+                if proc.poll() is not None:
+                    return {"error": f"服务进程退出，退出码 {proc.returncode}"}
+                time.sleep(0.02)
+            else:
+                return {"error": "等待 /health 超时"}
+
+            while time.perf_counter() < deadline:
+                request_start = time.perf_counter()
+                try:
+                    response = client.request(method, f"{base_url}{path}", json=payload)
+                    if response.status_code == 200 and spec["ok"](response.json()):
+                        now = time.perf_counter()
+                        result["first_request"] = round(now - request_start, 3)
+                        result["first_success"] = round(now - started, 3)
+                        return result
+                    result["last_error"] = f"HTTP {response.status_code}"
+                except httpx.HTTPError as e:
+                    result["last_error"] = str(e)
+                time.sleep(0.1)
+            result["error"] = f"未在 {timeout}s 内得到成功响应（{result.pop('last_error', '')}）"
+            return result
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def start_fake_provider(latency_ms: float, extra_args: Sequence[str] = ()) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "fake_provider.py", "--port", str(port), "--latency-ms", str(latency_ms), *extra_args],
+        cwd=os.path.join(ROOT, "loadtest"), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    upstream = f"http://127.0.0.1:{port}/v1"
+    deadline = time.perf_counter() + 15
+    while time.perf_counter() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/_stats", timeout=1)
+            return proc, upstream
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("fake_provider 启动失败")
+
+
+def median_of(rows: List[Dict], key: str) -> Optional[float]:
+    values = [r[key] for r in rows if key in r]
+    return round(statistics.median(values), 3) if values else None
+
+
+def run(target: str, upstream: str, runs: int, timeout: float, warmup: Optional[bool]) -> Dict:
+    env = dict(os.environ, **TARGETS[target]["env"](upstream))
+    if warmup is not None:
+        env["WARMUP_ON_STARTUP"] = "true" if warmup else "false"
+
+    imports = [measure_import(target, env) for _ in range(runs)]
+    starts = [measure_first_request(target, env, timeout) for _ in range(runs)]
+    errors = [r["error"] for r in imports + starts if "error" in r]
+    return {
+        "target": target,
+        "warmup": warmup,
+        "import_seconds": median_of(imports, "seconds"),
+        "heavy_modules_loaded": sorted({m for r in imports for m in r.get("loaded", [])}),
+        "ready_seconds": median_of(starts, "ready"),
+        "first_request_seconds": median_of(starts, "first_request"),
+        "first_success_seconds": median_of(starts, "first_success"),
+        "errors": errors,
+    }
+
+
+def _fmt(seconds: Optional[float]) -> str:
+    return "-" if seconds is None else f"{seconds}s"
+
+
+def print_report(report: Dict):
+    label = report["target"] if report["warmup"] is None else f"{report['target']} (预热{'开' if report['warmup'] else '关'})"
+    print(f"\n{label}")
+    print(f"  导入 server:        {_fmt(report['import_seconds'])}  已加载重型依赖: {', '.join(report['heavy_modules_loaded']) or '无'}")
+    print(f"  启动到就绪:         {_fmt(report['ready_seconds'])}")
+    print(f"  首个请求耗时:       {_fmt(report['first_request_seconds'])}")
+    print(f"  启动到首个成功请求: {_fmt(report['first_success_seconds'])}")
+    for error in report["errors"][:3]:
+        print(f"  ⚠️  {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="冷启动基准：导入耗时与首个成功请求耗时")
+    parser.add_argument("--target", choices=list(TARGETS) + ["all"], default="all")
+    parser.add_argument("--runs", type=int, default=3, help="每项测量的次数（取中位数）")
+    parser.add_argument("--upstream", default=None, help="上游地址，默认自动启动 loadtest/fake_provider.py")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50, help="自动启动的 fake_provider 的延迟")
+    parser.add_argument("--timeout", type=float, default=120, help="单次启动等待成功请求的超时（秒）")
+    parser.add_argument("--compare-warmup", action="store_true", help="分别在开启 / 关闭启动预热时测量")
+    parser.add_argument("--output", default=None, help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    provider = None
+    upstream = args.upstream
+    if upstream is None:
+        provider, upstream = start_fake_provider(args.upstream_latency_ms)
+
+    try:
+        targets = list(TARGETS) if args.target == "all" else [args.target]
+        modes = [True, False] if args.compare_warmup else [None]
+        reports = []
+        for target in targets:
+            for warmup in modes:
+                report = run(target, upstream, args.runs, args.timeout, warmup)
+                print_report(report)
+                reports.append(report)
+    finally:
+        if provider:
+            provider.terminate()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+音频特征 - 本地解码 PCM、提取声学（韵律）特征、长音频分窗
+
+只依赖 NumPy（非 WAV 解码需要 ffmpeg），不引入 CrewAI，可在请求路径上直接使用。
+"""
+import io
+import wave
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from audio_format import sniff_file, convert_audio
+
+# ==================== 韵律特征提取 ====================
+
+PROSODY_SAMPLE_RATE = 16000
+_FRAME_MS = 40      # 分析帧长（覆盖 75Hz 的两个周期）
+_HOP_MS = 10        # 帧移
+_PITCH_MIN_HZ = 75
+_PITCH_MAX_HZ = 400
+_VOICING_THRESHOLD = 0.3   # 归一化自相关峰值低于该值视为清音/噪声
+_MIN_PAUSE_MS = 200        # 短于该时长的静音不计为停顿
+_SPEECH_FLOOR_DBFS = -45   # 低于该电平的帧一律视为静音
+_SILENCE_CONTRAST_DB = 15  # 安静帧与响亮帧相差不到该值时，认为片段中没有静音
+
+
+def load_pcm(audio_path: str) -> Tuple[np.ndarray, int]:
+    """
+    读取音频为单声道 float32 PCM
+
+    WAV 直接解析，其他格式（WebM/Opus 等）通过 ffmpeg 解码为 16kHz WAV。
+
+    Returns:
+        (采样数据 [-1, 1], 采样率)
+    """
+    if sniff_file(audio_path) == "wav":
+        with open(audio_path, 'rb') as f:
+            data = f.read()
+    else:
+        data = convert_audio(audio_path, "wav", PROSODY_SAMPLE_RATE)
+
+    with wave.open(io.BytesIO(data), 'rb') as wav:
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        frames = wav.readframes(wav.getnframes())
+
+    if width == 2:
+        samples = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648.0
+    elif width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    else:
+        raise ValueError(f"不支持的采样位宽: {width * 8} bit")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, sample_rate
+
+
+def _runs(mask: np.ndarray) -> np.ndarray:
+    """返回布尔序列中连续 True 段的 [start, end) 数组"""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges.reshape(-1, 2)
+
+
+def extract_prosody_features(samples: np.ndarray, sample_rate: int) -> Dict[str, float]:
+    """
+    提取韵律特征：能量、基频（自相关法）、语速、停顿和基频抖动
+
+    Args:
+        samples: 单声道 float32 采样
+        sample_rate: 采样率
+
+    Returns:
+        特征字典
+    """
+    frame_len = int(sample_rate * _FRAME_MS / 1000)
+    hop = int(sample_rate * _HOP_MS / 1000)
+    duration = len(samples) / sample_rate
+    if len(samples) < frame_len:
+        return {"duration": round(duration, 3), "voiced_ratio": 0.0}
+
+    # 分帧（只读视图，不复制数据）
+    frames = np.lib.stride_tricks.sliding_window_view(samples, frame_len)[::hop]
+    frames = frames - frames.mean(axis=1, keepdims=True)
+
+    # 能量
+    rms = np.sqrt(np.mean(frames ** 2, axis=1)) + 1e-10
+    rms_db = 20 * np.log10(rms)
+    noise_floor = np.percentile(rms, 10)
+    threshold = rms.max() * 0.05
+    if 20 * np.log10(np.percentile(rms, 90) / noise_floor) >= _SILENCE_CONTRAST_DB:
+        threshold = max(threshold, noise_floor * 3.0)
+    # 否则静音不足一成（连续说话的短句），10% 分位数落在语音上，不能当作噪声底
+    speech = rms > max(threshold, 10 ** (_SPEECH_FLOOR_DBFS / 20))
+
+    # 基频：对语音帧做 FFT 自相关，在 [75, 400] Hz 对应的延迟范围内找峰值
+    min_lag = int(sample_rate / _PITCH_MAX_HZ)
+    max_lag = min(int(sample_rate / _PITCH_MIN_HZ), frame_len - 1)
+    pitch = np.zeros(len(frames), dtype=np.float32)
+    speech_idx = np.flatnonzero(speech)
+    if len(speech_idx):
+        windowed = frames[speech_idx] * np.hanning(frame_len)
+        spectrum = np.fft.rfft(windowed, n=2 * frame_len, axis=1)
+        acf = np.fft.irfft(np.abs(spectrum) ** 2, axis=1)[:, :frame_len]
+        acf = acf / (acf[:, :1] + 1e-10)
+        lags = np.argmax(acf[:, min_lag:max_lag], axis=1) + min_lag
+        peaks = acf[np.arange(len(lags)), lags]
+        voiced_frames = peaks > _VOICING_THRESHOLD
+        pitch[speech_idx[voiced_frames]] = sample_rate / lags[voiced_frames]
+    voiced = pitch > 0
+
+    features: Dict[str, float] = {
+        "duration": round(duration, 3),
+        "rms_db_mean": round(float(rms_db[speech].mean()) if speech.any() else float(rms_db.mean()), 2),
+        "rms_db_std": round(float(rms_db[speech].std()) if speech.any() else 0.0, 2),
+        "rms_db_max": round(float(rms_db.max()), 2),
+        "voiced_ratio": round(float(voiced.mean()), 3),
+    }
+
+    if voiced.any():
+        f0 = pitch[voiced]
+        semitones = 12 * np.log2(f0 / np.median(f0))
+        times = np.flatnonzero(voiced) * hop / sample_rate
+        slope = float(np.polyfit(times, semitones, 1)[0]) if len(f0) > 2 else 0.0
+        features.update({
+            "pitch_mean_hz": round(float(f0.mean()), 1),
+            "pitch_std_hz": round(float(f0.std()), 1),
+            "pitch_min_hz": round(float(np.percentile(f0, 5)), 1),
+            "pitch_max_hz": round(float(np.percentile(f0, 95)), 1),
+            "pitch_range_semitones": round(float(np.percentile(semitones, 95) - np.percentile(semitones, 5)), 2),
+            "pitch_slope_semitones_per_s": round(slope, 3),
+        })
+        # 局部抖动：相邻语音帧基频周期差的均值 / 平均周期
+        periods = 1.0 / f0
+        adjacent = np.diff(np.flatnonzero(voiced)) == 1
+        if adjacent.any():
+            jitter = np.abs(np.diff(periods))[adjacent].mean() / periods.mean()
+            features["jitter_percent"] = round(float(jitter * 100), 2)
+
+    # 语速（语音段数 / 秒）与停顿
+    segments = _runs(speech)
+    pauses = _runs(~speech)
+    min_pause_frames = int(_MIN_PAUSE_MS / _HOP_MS)
+    if len(segments):
+        # 只统计首尾语音段之间的停顿
+        first, last = segments[0][0], segments[-1][1]
+        inner = pauses[(pauses[:, 0] >= first) & (pauses[:, 1] <= last)]
+        inner = inner[(inner[:, 1] - inner[:, 0]) >= min_pause_frames]
+        span = max((last - first) * hop / sample_rate, 1e-3)
+        pause_seconds = float((inner[:, 1] - inner[:, 0]).sum()) * hop / sample_rate
+        features.update({
+            "speech_segments": int(len(segments)),
+            "speaking_rate_segments_per_s": round(float(len(segments) / span), 2),
+            "pause_count": int(len(inner)),
+            "pause_ratio": round(float(pause_seconds / span), 3),
+        })
+
+    return features
+
+
+def format_prosody_summary(features: Dict[str, float]) -> str:
+    """将韵律特征整理为供文本模型参考的简短描述"""
+    parts = [f"时长 {features['duration']:.1f} 秒"]
+    if "rms_db_mean" in features:
+        parts.append(f"平均音量 {features['rms_db_mean']:.0f} dBFS（波动 {features['rms_db_std']:.1f} dB）")
+    if "pitch_mean_hz" in features:
+        slope = features["pitch_slope_semitones_per_s"]
+        trend = "上扬" if slope > 0.5 else "下降" if slope < -0.5 else "平稳"
+        parts.append(
+            f"平均音高 {features['pitch_mean_hz']:.0f} Hz，音高变化范围 {features['pitch_range_semitones']:.1f} 个半音，"
+            f"语调{trend}"
+        )
+    else:
+        parts.append("几乎没有检测到浊音")
+    if "speaking_rate_segments_per_s" in features:
+        parts.append(f"语速约 {features['speaking_rate_segments_per_s']:.1f} 个语音段/秒")
+        parts.append(f"停顿 {features['pause_count']} 次，停顿占比 {features['pause_ratio']:.0%}")
+    if "jitter_percent" in features:
+        parts.append(f"基频抖动 {features['jitter_percent']:.1f}%")
+    return "；".join(parts) + "。"
+
+
+def analyze_prosody(audio_path: str) -> Tuple[Dict[str, float], str]:
+    """读取音频并返回 (韵律特征, 文本描述)"""
+    samples, sample_rate = load_pcm(audio_path)
+    features = extract_prosody_features(samples, sample_rate)
+    return features, format_prosody_summary(features)
+
+
+# ==================== 长音频分窗 ====================
+
+_WINDOW_FRAME_MS = 20        # 寻找切分点时的能量帧长
+_SILENCE_RATIO = 0.1         # 帧能量低于整体中位数的该比例视为静音
+
+
+def wav_duration(audio_path: str) -> Optional[float]:
+    """读取 WAV 文件头得到时长（秒），非 WAV 返回 None"""
+    if sniff_file(audio_path) != "wav":
+        return None
+    with wave.open(audio_path, 'rb') as wav:
+        return wav.getnframes() / float(wav.getframerate())
+
+
+def plan_windows(
+    samples: np.ndarray,
+    sample_rate: int,
+    window_seconds: float,
+    overlap_seconds: float
+) -> List[Tuple[int, int]]:
+    """
+    将长音频切分为窗口
+
+    在每个名义切分点之前的一段范围内寻找能量最低的帧：若该帧为静音，则在此处切分，
+    下一个窗口从静音处开始（无需重叠）；否则在名义切分点处切分，下一个窗口向前
+    重叠 overlap_seconds，避免一句话被切断后两边都无法判断。过短的尾部并入前一个窗口。
+
+    Returns:
+        [(起始采样, 结束采样), ...]
+    """
+    total = len(samples)
+    window = int(window_seconds * sample_rate)
+    if total <= window:
+        return [(0, total)]
+
+    frame = max(int(sample_rate * _WINDOW_FRAME_MS / 1000), 1)
+    n_frames = total // frame
+    energy = np.sqrt(np.mean(samples[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+    silence_level = float(np.median(energy)) * _SILENCE_RATIO
+    overlap = int(overlap_seconds * sample_rate)
+    search = min(window // 4, 3 * sample_rate)
+
+    windows = []
+    start = 0
+    while total - start > window:
+        nominal = start + window
+        lo, hi = (nominal - search) // frame, nominal // frame
+        quietest = lo + int(np.argmin(energy[lo:hi])) if hi > lo else hi
+        if hi > lo and energy[quietest] <= silence_level:
+            end = quietest * frame + frame // 2
+            next_start = end
+        else:
+            end = nominal
+            next_start = end - overlap
+        windows.append((start, end))
+        start = next_start
+
+    if total - start < window // 3 and windows:
+        windows[-1] = (windows[-1][0], total)
+    else:
+        windows.append((start, total))
+    return windows
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """将 float32 PCM 编码为 16-bit 单声道 WAV"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
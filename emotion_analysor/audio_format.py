@@ -0,0 +1,83 @@
+"""
+音频格式识别与转换 - 按文件头魔数识别格式，必要时用 ffmpeg 转换
+"""
+import logging
+import shutil
+import subprocess
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 识别格式所需读取的文件头长度
+SNIFF_BYTES = 64
+
+
+def sniff_audio_format(header: bytes) -> Optional[str]:
+    """
+    根据文件头魔数识别音频格式
+
+    Args:
+        header: 文件开头的若干字节（至少 12 字节，建议 SNIFF_BYTES）
+
+    Returns:
+        格式名（wav / webm / ogg / flac / mp3 / m4a），无法识别时返回 None
+    """
+    if len(header) < 4:
+        return None
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        # EBML 头：webm 和 mka 都是 Matroska 容器，上游按 webm 处理
+        return "webm"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[4:8] == b"ftyp":
+        return "m4a"
+    if header[:3] == b"ID3" or (header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+def sniff_file(path: str) -> Optional[str]:
+    """读取文件头并识别格式"""
+    with open(path, 'rb') as f:
+        return sniff_audio_format(f.read(SNIFF_BYTES))
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def convert_audio(path: str, target_format: str = "wav", sample_rate: int = 16000) -> bytes:
+    """
+    使用 ffmpeg 将音频转换为目标格式（单声道，指定采样率）
+
+    Args:
+        path: 源文件路径
+        target_format: 目标格式
+        sample_rate: 目标采样率
+
+    Returns:
+        转换后的音频数据
+
+    Raises:
+        RuntimeError: 未安装 ffmpeg 或转换失败
+    """
+    if not ffmpeg_available():
+        raise RuntimeError("未安装 ffmpeg，无法转换音频格式")
+
+    result = subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-loglevel", "error",
+            "-i", path,
+            "-ac", "1", "-ar", str(sample_rate),
+            "-f", target_format, "pipe:1"
+        ],
+        capture_output=True,
+        check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"音频转换失败: {result.stderr.decode('utf-8', errors='ignore').strip()}")
+    return result.stdout
@@ -0,0 +1,156 @@
+"""
+请求取消 - 客户端断开后停止进行中的上游调用和排队中的子任务
+
+分析在工作线程中执行，线程的上下文里带有一个取消标记。
+上游调用通过 on_cancel 登记回调，被取消时立即中止（见 clients.run_upstream），不等上游下一次响应；
+等待上游并发名额、尚未发出的子任务（长音频窗口等）检查标记后直接放弃。
+
+meeting_assistant/cancellation.py 的 RequestCancelled、check_cancelled、run_cancellable、
+run_until_disconnect 与这里行为相同；取消回调（on_cancel）和 wait_or_cancel 只有本应用用到：
+上游调用在单独的事件循环中执行，可以在请求中途中止。
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, List, Optional
+
+from fastapi import Request
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCancelled(Exception):
+    """客户端已断开，分析被取消"""
+
+
+class _CancelEvent(threading.Event):
+    """取消标记：set() 时在取消方的线程中依次调用登记的回调"""
+
+    def __init__(self):
+        super().__init__()
+        self._callbacks: List[Callable[[], Any]] = []
+        self._callbacks_lock = threading.Lock()
+
+    def set(self):
+        with self._callbacks_lock:
+            super().set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"取消回调失败: {e}")
+
+    def add_callback(self, callback: Callable[[], Any]) -> bool:
+        """登记回调，已取消时不登记并返回 False"""
+        with self._callbacks_lock:
+            if self.is_set():
+                return False
+            self._callbacks.append(callback)
+            return True
+
+    def remove_callback(self, callback: Callable[[], Any]):
+        with self._callbacks_lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+_cancel_event: contextvars.ContextVar[Optional[_CancelEvent]] = contextvars.ContextVar("cancel_event", default=None)
+
+
+def check_cancelled():
+    """当前请求已被取消时抛出 RequestCancelled"""
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise RequestCancelled("客户端已断开")
+
+
+@contextmanager
+def on_cancel(callback: Callable[[], Any]):
+    """
+    上下文内当前请求被取消时立即调用 callback（在取消方的线程中执行，应当快速返回）
+
+    进入时已被取消则立即调用；不在可取消的请求中时什么也不做
+    """
+    event = _cancel_event.get()
+    if event is None:
+        yield
+        return
+    if not event.add_callback(callback):
+        callback()
+    try:
+        yield
+    finally:
+        event.remove_callback(callback)
+
+
+def wait_or_cancel(acquire: Callable[[float], bool], poll_interval: float = 0.1):
+    """
+    等待资源（如信号量），等待期间请求被取消则放弃
+
+    Args:
+        acquire: 带超时参数的获取函数，成功返回 True
+        poll_interval: 检查取消标记的间隔（秒）
+    """
+    while not acquire(poll_interval):
+        check_cancelled()
+
+
+def _run_with_event(event: _CancelEvent, func: Callable[..., Any], *args: Any) -> Any:
+    _cancel_event.set(event)
+    return func(*args)
+
+
+def _consume(task: "asyncio.Future"):
+    # 被放弃的工作线程随后以 RequestCancelled 结束，取出异常避免 "never retrieved" 警告
+    if not task.cancelled():
+        task.exception()
+
+
+async def run_cancellable(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    在工作线程中执行 func；等待它的协程被取消时（如 WebSocket 断开）设置取消标记，
+    工作线程中的上游调用随即中止
+
+    Returns:
+        func 的返回值
+    """
+    event = _CancelEvent()
+    task = asyncio.ensure_future(asyncio.to_thread(_run_with_event, event, func, *args))
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        event.set()
+        task.add_done_callback(_consume)
+        raise
+
+
+async def run_until_disconnect(request: Request, func: Callable[..., Any], *args: Any, poll_interval: float = 0.25) -> Any:
+    """
+    在工作线程中执行 func，期间定期检查客户端是否断开
+
+    断开时取消执行（见 run_cancellable）并抛出 RequestCancelled，不再等待工作线程结束。
+
+    Args:
+        request: 当前 HTTP 请求
+        func: 要执行的阻塞函数
+        poll_interval: 检查客户端连接的间隔（秒）
+
+    Returns:
+        func 的返回值
+    """
+    work = asyncio.ensure_future(run_cancellable(func, *args))
+    try:
+        while True:
+            done, _ = await asyncio.wait({work}, timeout=poll_interval)
+            if done:
+                return work.result()
+            if await request.is_disconnected():
+                work.cancel()
+                raise RequestCancelled("客户端已断开")
+    except asyncio.CancelledError:
+        work.cancel()
+        raise
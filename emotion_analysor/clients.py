@@ -0,0 +1,96 @@
+"""
+共享的上游客户端
+
+同步客户端供 AudioProcessorTool._run 使用，异步客户端每个事件循环一个：AudioProcessorTool._arun 使用
+调用方的事件循环，EmotionDetectionCrew 的调用由工作线程提交到后台的上游事件循环执行（run_upstream），
+请求被取消时可以在任何阶段中止。各连接池中的连接在调用之间复用。
+"""
+import asyncio
+import concurrent.futures
+import threading
+import weakref
+from typing import Any, Coroutine, Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from cancellation import RequestCancelled, check_cancelled, on_cancel
+from config import config
+
+_client: Optional[OpenAI] = None
+# httpx.AsyncClient 绑定创建它的事件循环，每个事件循环一个异步客户端
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+
+def _limits() -> httpx.Limits:
+    # 连接池大小与上游并发上限一致，空闲连接保留 UPSTREAM_KEEPALIVE_SECONDS
+    return httpx.Limits(
+        max_connections=config.UPSTREAM_MAX_CONCURRENT,
+        max_keepalive_connections=config.UPSTREAM_MAX_CONCURRENT,
+        keepalive_expiry=config.UPSTREAM_KEEPALIVE_SECONDS
+    )
+
+
+def get_openai_client() -> OpenAI:
+    """获取共享的同步客户端"""
+    global _client
+    if _client is None:
+        _client = OpenAI(
+            api_key=config.DASHSCOPE_API_KEY,
+            base_url=config.DASHSCOPE_API_BASE,
+            http_client=DefaultHttpxClient(limits=_limits())
+        )
+    return _client
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """获取当前事件循环共享的异步客户端（须在事件循环中调用）"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=config.DASHSCOPE_API_KEY,
+            base_url=config.DASHSCOPE_API_BASE,
+            http_client=DefaultAsyncHttpxClient(limits=_limits())
+        )
+        _async_clients[loop] = client
+    return client
+
+
+_upstream_loop: Optional[asyncio.AbstractEventLoop] = None
+_upstream_loop_lock = threading.Lock()
+
+
+def get_upstream_loop() -> asyncio.AbstractEventLoop:
+    """获取上游事件循环（在后台线程中运行，第一次使用时启动）"""
+    global _upstream_loop
+    if _upstream_loop is None:
+        with _upstream_loop_lock:
+            if _upstream_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="upstream-loop", daemon=True).start()
+                _upstream_loop = loop
+    return _upstream_loop
+
+
+def run_upstream(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    在上游事件循环中执行协程，当前线程阻塞等待结果
+
+    当前请求被取消时立即取消协程：上游请求无论在建立连接、等待首字节还是两个分片之间，
+    连接都会随之关闭，上游停止生成，不必等到上游下一次响应
+
+    Raises:
+        RequestCancelled: 请求已被取消
+    """
+    try:
+        check_cancelled()
+    except RequestCancelled:
+        coro.close()
+        raise
+    future = asyncio.run_coroutine_threadsafe(coro, get_upstream_loop())
+    with on_cancel(future.cancel):
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            raise RequestCancelled("客户端已断开") from None
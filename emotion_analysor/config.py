@@ -21,10 +21,46 @@ class Config:
     LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
     LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "4096"))
     
+    # 上游可直接接收的音频格式，其他格式转换为 AUDIO_FALLBACK_FORMAT 后再发送
+    OMNI_AUDIO_FORMATS = set(os.getenv("OMNI_AUDIO_FORMATS", "wav,mp3,webm,ogg,flac,m4a").split(","))
+    AUDIO_FALLBACK_FORMAT = os.getenv("AUDIO_FALLBACK_FORMAT", "wav")
+    # 音频分析方式: omni（上传音频给 OMNI_LLM_MODEL）/ prosody（本地提取声学特征，交给 TEXT_LLM_MODEL）
+    # / cascade（先用 TEXT_LLM_MODEL，置信度不足时再升级到 OMNI_LLM_MODEL）
+    AUDIO_ANALYSIS_MODE = os.getenv("AUDIO_ANALYSIS_MODE", "omni").lower()
+    CASCADE_MIN_CONFIDENCE = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.75"))  # 最高置信度下限
+    CASCADE_MIN_MARGIN = float(os.getenv("CASCADE_MIN_MARGIN", "0.2"))  # 前两个情绪置信度差距下限
+    # 长音频分窗分析：超过阈值的录音切成窗口并发分析
+    LONG_AUDIO_SECONDS = float(os.getenv("LONG_AUDIO_SECONDS", "30"))
+    AUDIO_WINDOW_SECONDS = float(os.getenv("AUDIO_WINDOW_SECONDS", "15"))
+    AUDIO_WINDOW_OVERLAP_SECONDS = float(os.getenv("AUDIO_WINDOW_OVERLAP_SECONDS", "1.5"))
+    # 同时发往上游的请求数上限（所有请求和窗口共享）
+    UPSTREAM_MAX_CONCURRENT = int(os.getenv("UPSTREAM_MAX_CONCURRENT", "8"))
+    # 上游连接池空闲连接保留时间（秒）
+    UPSTREAM_KEEPALIVE_SECONDS = float(os.getenv("UPSTREAM_KEEPALIVE_SECONDS", "60"))
+    # 启动时构建客户端并预热上游连接
+    WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+    WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "5"))
+    # 分析期间检查客户端是否断开的间隔（秒），断开后取消上游调用
+    DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.25"))
+    
+    # 纯文本请求的近似重复缓存（MinHash + LSH）
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.8"))  # 命中所需的最低 Jaccard 相似度
+    SEMANTIC_CACHE_NUM_PERM = int(os.getenv("SEMANTIC_CACHE_NUM_PERM", "64"))
+    SEMANTIC_CACHE_BANDS = int(os.getenv("SEMANTIC_CACHE_BANDS", "16"))
+    SEMANTIC_CACHE_SHINGLE_SIZE = int(os.getenv("SEMANTIC_CACHE_SHINGLE_SIZE", "2"))
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "10000"))
+    SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+    SEMANTIC_CACHE_AUDIT_RATE = float(os.getenv("SEMANTIC_CACHE_AUDIT_RATE", "0.05"))  # 近似命中的抽样复核比例
+    
     # 服务器配置
     HOST = os.getenv("HOST", "0.0.0.0")
     PORT = int(os.getenv("PORT", "8000"))
     DEBUG = os.getenv("DEBUG", "True").lower() == "true"
+    STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "300"))  # 不带版本号的静态资源缓存时间（秒）
+    # worker 进程数，大于 1 时启用多进程模式：日志按 worker 分片、缓存和上传清理通过 SHARED_STATE_DB 等共享
+    WORKERS = int(os.getenv("WORKERS", "1"))
+    SHARED_STATE_DB = os.getenv("SHARED_STATE_DB", os.path.join(os.path.dirname(__file__), "state", "shared_state.db"))
     
     # HTTPS 配置
     USE_HTTPS = os.getenv("USE_HTTPS", "true").lower() == "true"
@@ -36,6 +72,18 @@ class Config:
     MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
     ALLOWED_AUDIO_EXTENSIONS = {".mp3", ".wav", ".m4a", ".ogg", ".flac", ".webm"}
     
+    # 上传目录生命周期配置
+    UPLOAD_MAX_TOTAL_BYTES = int(os.getenv("UPLOAD_MAX_TOTAL_BYTES", str(2 * 1024 * 1024 * 1024)))  # 2GB
+    UPLOAD_TTL_SECONDS = float(os.getenv("UPLOAD_TTL_SECONDS", str(24 * 3600)))  # 24小时
+    UPLOAD_SWEEP_INTERVAL = float(os.getenv("UPLOAD_SWEEP_INTERVAL", "300"))  # 5分钟
+    
+    # 实时流式分析配置
+    STREAM_WINDOW_SECONDS = float(os.getenv("STREAM_WINDOW_SECONDS", "6"))  # 滚动窗口长度
+    STREAM_ANALYSIS_INTERVAL = float(os.getenv("STREAM_ANALYSIS_INTERVAL", "2"))  # 分析节奏
+    STREAM_MIN_AUDIO_SECONDS = float(os.getenv("STREAM_MIN_AUDIO_SECONDS", "1"))  # 开始分析前的最短音频
+    STREAM_MAX_BUFFER_BYTES = int(os.getenv("STREAM_MAX_BUFFER_BYTES", str(4 * 1024 * 1024)))  # 每个连接的缓冲上限
+    STREAM_MAX_CONCURRENT_UPSTREAM = int(os.getenv("STREAM_MAX_CONCURRENT_UPSTREAM", "4"))  # 流式分析的上游并发上限
+    
     # 数据日志配置
     DATA_LOG_DIR = os.path.join(os.path.dirname(__file__), "data_logs")
     
@@ -1,15 +1,30 @@
 """
 情绪识别服务 - 直接使用 qwen-omni 完成多模态情绪识别
 """
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+import contextvars
 import json
 import logging
 import os
-import base64
-from openai import OpenAI
+import tempfile
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from openai import BadRequestError
 
-from models import EmotionDetectRequest, EmotionDetectResponse, EmotionResult
+from models import EmotionDetectRequest, EmotionAnalysis, EmotionWindow, make_emotion
 from config import config
+from audio_format import sniff_file
+from clients import get_async_openai_client, run_upstream
+from cancellation import RequestCancelled, check_cancelled, wait_or_cancel
+from request_builder import (
+    build_prompt,
+    format_history,
+    audio_content,
+    is_format_error,
+    reject_format,
+    completion_kwargs
+)
 
 logger = logging.getLogger(__name__)
 
@@ -18,18 +33,39 @@ class EmotionDetectionCrew:
     
     def __init__(self):
         """初始化服务"""
-        # 初始化 OpenAI 客户端
-        self.client = OpenAI(
-            api_key=config.DASHSCOPE_API_KEY,
-            base_url=config.DASHSCOPE_API_BASE,
-        )
+        # 上游调用使用上游事件循环中共享的异步客户端（见 clients.run_upstream）
+        
+        # 上游并发上限：所有请求（含长音频的各个窗口）共享
+        self._upstream_limiter = threading.BoundedSemaphore(config.UPSTREAM_MAX_CONCURRENT)
         
         logger.info("EmotionDetectionCrew 初始化完成（直接使用 OpenAI SDK）")
     
+    def warm_up(self) -> float:
+        """
+        预热上游连接：发一个轻量请求完成 DNS 解析和 TLS 握手，连接留在连接池中供后续请求复用
+        
+        Returns:
+            预热耗时（秒）
+        """
+        start = time.perf_counter()
+        
+        async def list_models():
+            client = get_async_openai_client()
+            await client.with_options(timeout=config.WARMUP_TIMEOUT, max_retries=0).models.list()
+        
+        try:
+            run_upstream(list_models())
+        except Exception as e:
+            # 任何 HTTP 响应（包括 404）都说明连接已建立，只记录失败原因
+            logger.warning(f"上游连接预热未成功: {e}")
+        elapsed = time.perf_counter() - start
+        logger.info(f"上游连接预热完成，耗时 {elapsed:.3f}秒")
+        return elapsed
+    
     def analyze_emotion(
         self,
         request: EmotionDetectRequest
-    ) -> EmotionDetectResponse:
+    ) -> EmotionAnalysis:
         """
         执行情绪识别分析
         
@@ -42,124 +78,396 @@ class EmotionDetectionCrew:
         try:
             # 验证输入
             if not request.text and not request.audio_url:
-                return EmotionDetectResponse(
+                return EmotionAnalysis(
                     success=False,
                     emotions=[],
                     primary_emotion="未知"
                 )
             
-            # 格式化对话历史
-            conversation_context = ""
-            if request.conversation_history:
-                conversation_context = "\n".join([
-                    f"{'用户' if msg.get('role') == 'user' else '助手'}: {msg.get('content', '')}"
-                    for msg in request.conversation_history[-5:]  # 最近5条
-                ])
-            
             logger.info("开始多模态情绪分析...")
             
-            # 构建分析提示词
-            analysis_prompt = """请综合分析用户的情绪状态，识别出所有可能的情绪类型。
-
-可选的情绪类型包括但不限于：
-开心、快乐、兴奋、满足、悲伤、难过、失落、沮丧、愤怒、生气、烦躁、不满、
-焦虑、担心、紧张、恐惧、惊讶、震惊、困惑、平静、放松、淡定、厌恶、反感、
-无聊、期待、希望、好奇、感激、感动、温暖、孤独、寂寞、无助、自信、自豪、
-骄傲、羞愧、内疚、尴尬、疲惫、困倦、无力
-
-请以 JSON 格式返回分析结果，格式如下：
-{
-    "emotions": [
-        {
-            "emotion": "情绪类型",
-            "confidence": 0.85,
-            "reason": "识别理由"
-        }
-    ],
-    "primary_emotion": "主要情绪"
-}
-
-"""
-            
-            # 添加对话历史上下文
-            if conversation_context:
-                analysis_prompt += f"\n对话历史:\n{conversation_context}\n"
-            
-            # 添加当前文本
-            if request.text:
-                analysis_prompt += f"\n当前文本: {request.text}\n"
+            # 构建分析提示词（对话历史只取最近5条）
+            analysis_prompt = build_prompt(request.text, format_history(request.conversation_history))
             
-            # 构建消息内容
-            message_content = [
-                {
-                    "type": "text",
-                    "text": analysis_prompt
-                }
-            ]
-            
-            # 如果有音频，添加音频输入
             audio_path = request.audio_url
-            if audio_path and os.path.exists(audio_path):
-                logger.info(f"处理音频文件: {audio_path}")
-                # 读取音频文件
-                with open(audio_path, 'rb') as f:
-                    audio_data = f.read()
-                    audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-                
-                file_ext = os.path.splitext(audio_path)[1].lstrip('.')
-                
-                # 处理格式映射
-                format_mapping = {
-                    'webm': 'webm',
-                    'wav': 'wav',
-                    'mp3': 'mp3',
-                    'm4a': 'm4a',
-                    'ogg': 'ogg',
-                    'flac': 'flac'
-                }
-                audio_format = format_mapping.get(file_ext, 'wav')
-                
-                message_content.append({
-                    "type": "input_audio",
-                    "input_audio": {
-                        "data": f"data:;base64,{audio_base64}",
-                        "format": audio_format
-                    }
-                })
-            logger.info(f"message_content: {message_content}")
-            
-            # 选择模型
-            model = config.OMNI_LLM_MODEL if audio_path and os.path.exists(audio_path) else config.TEXT_LLM_MODEL
-            logger.info(f"使用模型: {model}")
-            
-            # 调用 qwen-omni API
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[{
-                    "role": "user",
-                    "content": message_content
-                }],
-                extra_body={'enable_thinking': config.ENABLE_THINKING},
-                temperature=config.LLM_TEMPERATURE,
-                max_tokens=config.LLM_MAX_TOKENS
-            )
+            if not (audio_path and os.path.exists(audio_path)):
+                return self._analyze_text(analysis_prompt)
             
-            # 提取分析结果
-            analysis_result = response.choices[0].message.content
-            logger.info(f"分析完成，原始结果: {analysis_result}")
+            # 长音频：分窗并发分析，合并为情绪时间线
+            long_audio = self._load_long_audio(audio_path)
+            if long_audio is not None:
+                return self._analyze_windowed(analysis_prompt, audio_path, *long_audio, has_text=bool(request.text))
             
-            # 解析结果
-            return self._parse_result(analysis_result)
+            return self._analyze_audio(analysis_prompt, audio_path, has_text=bool(request.text))
             
+        except RequestCancelled:
+            raise
         except Exception as e:
             logger.error(f"情绪识别过程出错: {str(e)}", exc_info=True)
-            return EmotionDetectResponse(
+            return EmotionAnalysis(
                 success=False,
                 emotions=[],
                 primary_emotion="未知"
             )
     
-    def _parse_result(self, result_text: str) -> EmotionDetectResponse:
+    def _analyze_audio(self, prompt: str, audio_path: str, has_text: bool) -> EmotionAnalysis:
+        """按 AUDIO_ANALYSIS_MODE 分析一段音频"""
+        mode = config.AUDIO_ANALYSIS_MODE
+        
+        # prosody / cascade 模式：本地提取声学特征
+        prosody_info = None
+        if mode in ("prosody", "cascade"):
+            prosody_info = self._prosody_info(audio_path)
+        
+        # prosody 模式：特征附在提示词中交给文本模型，不上传音频
+        if mode == "prosody" and prosody_info:
+            result = self._analyze_text(self._with_prosody(prompt, prosody_info))
+            result.audio_info = prosody_info
+            return result
+        
+        # cascade 模式：先走文本模型，置信度不足时再升级到 omni
+        if mode == "cascade" and (has_text or prosody_info):
+            return self._analyze_cascade(prompt, audio_path, prosody_info)
+        
+        return self._analyze_omni(prompt, audio_path)
+    
+    def _load_long_audio(self, audio_path: str) -> Optional[Tuple[Any, int]]:
+        """
+        判断是否为需要分窗的长音频
+        
+        Returns:
+            长音频返回 (PCM 采样, 采样率)，否则返回 None
+        """
+        from audio_features import load_pcm, wav_duration
+        
+        try:
+            # WAV 读文件头即可判断时长，短录音不做解码
+            duration = wav_duration(audio_path)
+            if duration is not None and duration <= config.LONG_AUDIO_SECONDS:
+                return None
+            # 压缩格式按不低于 16kbps 估算，文件太小则不可能超过阈值
+            if duration is None and os.path.getsize(audio_path) < config.LONG_AUDIO_SECONDS * 2000:
+                return None
+            samples, sample_rate = load_pcm(audio_path)
+        except Exception as e:
+            logger.warning(f"音频解码失败，不做分窗: {e}")
+            return None
+        
+        if len(samples) <= config.LONG_AUDIO_SECONDS * sample_rate:
+            return None
+        return samples, sample_rate
+    
+    def _analyze_windowed(
+        self,
+        prompt: str,
+        audio_path: str,
+        samples: Any,
+        sample_rate: int,
+        has_text: bool
+    ) -> EmotionAnalysis:
+        """
+        长音频分窗分析：尽量在静音处切分，各窗口并发分析（受上游并发上限约束），
+        合并为按时间排列的情绪时间线，并按窗口时长加权汇总整体情绪
+        
+        Args:
+            prompt: 分析提示词
+            audio_path: 原始音频路径
+            samples: PCM 采样
+            sample_rate: 采样率
+            has_text: 是否有伴随文本
+            
+        Returns:
+            情绪识别结果（含 timeline）
+        """
+        from audio_features import plan_windows, encode_wav
+        
+        windows = plan_windows(samples, sample_rate, config.AUDIO_WINDOW_SECONDS, config.AUDIO_WINDOW_OVERLAP_SECONDS)
+        duration = len(samples) / sample_rate
+        logger.info(f"长音频 {duration:.1f}s，切分为 {len(windows)} 个窗口并发分析")
+        
+        def analyze_window(index: int, start: int, end: int):
+            window_prompt = prompt + (
+                f"\n以下音频是整段录音的第 {index + 1}/{len(windows)} 段"
+                f"（{start / sample_rate:.1f}s - {end / sample_rate:.1f}s）。\n"
+            )
+            fd, window_path = tempfile.mkstemp(prefix="window_", suffix=".wav")
+            began = time.perf_counter()
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(encode_wav(samples[start:end], sample_rate))
+                result = self._analyze_audio(window_prompt, window_path, has_text)
+            finally:
+                try:
+                    os.remove(window_path)
+                except OSError:
+                    pass
+            return result, time.perf_counter() - began
+        
+        with ThreadPoolExecutor(max_workers=min(len(windows), config.UPSTREAM_MAX_CONCURRENT)) as executor:
+            # 每个窗口带上调用方的上下文（其中有请求的取消标记）
+            futures = [
+                executor.submit(contextvars.copy_context().run, analyze_window, i, start, end)
+                for i, (start, end) in enumerate(windows)
+            ]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except RequestCancelled:
+                    # 请求已取消：排队中的窗口不再发出
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+                except Exception as e:
+                    logger.warning(f"窗口分析失败: {e}")
+                    outcomes.append((None, 0.0))
+        
+        timeline = []
+        weighted: Dict[str, float] = {}
+        reasons: Dict[str, Tuple[float, str]] = {}
+        covered = 0.0
+        payload_bytes = 0
+        converted = False
+        for (start, end), (result, _) in zip(windows, outcomes):
+            if result is None or not result.success:
+                continue
+            length = (end - start) / sample_rate
+            covered += length
+            payload_bytes += (result.audio_info or {}).get("payload_bytes", 0)
+            # 窗口以 WAV 上传，只有上游不接受 WAV、窗口被再次转换时才算转换
+            converted = converted or bool((result.audio_info or {}).get("converted"))
+            timeline.append(EmotionWindow(
+                start=round(start / sample_rate, 2),
+                end=round(end / sample_rate, 2),
+                primary_emotion=result.primary_emotion,
+                emotions=result.emotions
+            ))
+            for emotion in result.emotions:
+                weighted[emotion.emotion] = weighted.get(emotion.emotion, 0.0) + emotion.confidence * length
+                if emotion.confidence > reasons.get(emotion.emotion, (-1.0, ""))[0]:
+                    reasons[emotion.emotion] = (emotion.confidence, emotion.reason)
+        
+        latencies = [latency for _, latency in outcomes]
+        audio_info = {
+            "mode": config.AUDIO_ANALYSIS_MODE,
+            "format": sniff_file(audio_path),
+            "file_bytes": os.path.getsize(audio_path),
+            "payload_bytes": payload_bytes,
+            "converted": converted,
+            "windowed": {
+                "duration": round(duration, 2),
+                "windows": len(windows),
+                "failed_windows": len(windows) - len(timeline),
+                "max_window_latency": round(max(latencies), 3),
+                "sum_window_latency": round(sum(latencies), 3)
+            }
+        }
+        
+        if not timeline:
+            return EmotionAnalysis(success=False, emotions=[], primary_emotion="未知", audio_info=audio_info)
+        
+        emotions = sorted(
+            (
+                make_emotion(emotion=name, confidence=round(min(score / covered, 1.0), 3), reason=reasons[name][1])
+                for name, score in weighted.items()
+            ),
+            key=lambda e: e.confidence,
+            reverse=True
+        )
+        return EmotionAnalysis(
+            success=True,
+            emotions=emotions,
+            primary_emotion=emotions[0].emotion if emotions else "未知",
+            timeline=timeline,
+            audio_info=audio_info
+        )
+    
+    def _analyze_text(self, prompt: str) -> EmotionAnalysis:
+        """使用文本模型分析"""
+        return self._parse_result(self._complete_text(prompt))
+    
+    def _complete_text(self, prompt: str) -> str:
+        """调用文本模型，返回原始结果"""
+        logger.info(f"使用模型: {config.TEXT_LLM_MODEL}")
+        analysis_result = self._create_completion(config.TEXT_LLM_MODEL, [{"type": "text", "text": prompt}])
+        logger.info(f"分析完成，原始结果: {analysis_result}")
+        return analysis_result
+    
+    def _analyze_omni(self, prompt: str, audio_path: str) -> EmotionAnalysis:
+        """使用多模态模型分析（音频默认原样转发，模型不支持该格式时才转换）"""
+        model = config.OMNI_LLM_MODEL
+        logger.info(f"使用模型: {model}, 处理音频文件: {audio_path}")
+        message_content = [{"type": "text", "text": prompt}]
+        audio_info = self._append_audio(message_content, audio_path, model)
+        
+        try:
+            analysis_result = self._create_completion(model, message_content)
+        except BadRequestError as e:
+            # 上游拒绝该音频格式：记住后转换格式重试一次
+            if audio_info["converted"] or not is_format_error(e):
+                raise
+            logger.warning(f"模型 {model} 拒绝 {audio_info['format']} 格式音频，转换后重试: {e}")
+            reject_format(model, audio_info["format"])
+            message_content.pop()
+            audio_info = self._append_audio(message_content, audio_path, model)
+            analysis_result = self._create_completion(model, message_content)
+        
+        logger.info(f"分析完成，原始结果: {analysis_result}")
+        result = self._parse_result(analysis_result)
+        result.audio_info = audio_info
+        return result
+    
+    def _analyze_cascade(
+        self,
+        prompt: str,
+        audio_path: str,
+        prosody_info: Optional[Dict[str, Any]]
+    ) -> EmotionAnalysis:
+        """
+        级联分析：先用文本模型（文本 + 本地声学特征），结果足够确定时直接返回，
+        否则升级到多模态模型。文本模型的结果没有按 JSON 解析成功时（启发式解析的置信度是
+        固定值，不代表模型的判断）总是升级。
+        
+        Args:
+            prompt: 分析提示词
+            audio_path: 音频文件路径
+            prosody_info: 本地韵律特征（可能为 None）
+            
+        Returns:
+            情绪识别结果，audio_info["cascade"] 记录是否升级及各阶段耗时
+        """
+        start = time.perf_counter()
+        cheap_prompt = self._with_prosody(prompt, prosody_info) if prosody_info else prompt
+        cheap_text = self._complete_text(cheap_prompt)
+        cheap = self._parse_json(cheap_text)
+        parsed = cheap is not None
+        if not parsed:
+            cheap = self._heuristic_parse(cheap_text)
+        cheap_latency = time.perf_counter() - start
+        
+        top_confidence, margin = self._confidence_margin(cheap)
+        confident = (
+            parsed
+            and cheap.success
+            and top_confidence >= config.CASCADE_MIN_CONFIDENCE
+            and margin >= config.CASCADE_MIN_MARGIN
+        )
+        cascade_info = {
+            "escalated": not confident,
+            "parsed": parsed,
+            "top_confidence": round(top_confidence, 3),
+            "margin": round(margin, 3),
+            "cheap_latency": round(cheap_latency, 3)
+        }
+        
+        if confident:
+            logger.info(f"级联分析: 文本模型结果足够确定（置信度 {top_confidence:.2f}, 差距 {margin:.2f}），不升级")
+            cheap.audio_info = {
+                "mode": "cascade",
+                "format": prosody_info.get("format") if prosody_info else sniff_file(audio_path),
+                "file_bytes": os.path.getsize(audio_path),
+                "payload_bytes": prosody_info["payload_bytes"] if prosody_info else 0,
+                "converted": False,
+                "cascade": cascade_info
+            }
+            return cheap
+        
+        logger.info(f"级联分析: {'' if parsed else '文本模型结果无法按 JSON 解析，'}"
+                    f"置信度 {top_confidence:.2f}, 差距 {margin:.2f}，升级到多模态模型")
+        start = time.perf_counter()
+        result = self._analyze_omni(prompt, audio_path)
+        cascade_info["omni_latency"] = round(time.perf_counter() - start, 3)
+        result.audio_info = {**(result.audio_info or {}), "mode": "cascade", "cascade": cascade_info}
+        return result
+    
+    def _confidence_margin(self, result: EmotionAnalysis) -> Tuple[float, float]:
+        """返回 (最高置信度, 最高与次高置信度之差)"""
+        confidences = sorted((e.confidence for e in result.emotions), reverse=True)
+        if not confidences:
+            return 0.0, 0.0
+        if len(confidences) == 1:
+            return confidences[0], confidences[0]
+        return confidences[0], confidences[0] - confidences[1]
+    
+    def _with_prosody(self, prompt: str, prosody_info: Dict[str, Any]) -> str:
+        """在提示词中附加本地提取的声学特征"""
+        return prompt + f"\n语音声学特征（本地提取）: {prosody_info['summary']}\n"
+    
+    def _prosody_info(self, audio_path: str) -> Optional[Dict[str, Any]]:
+        """
+        本地提取韵律特征
+        
+        Args:
+            audio_path: 音频文件路径
+            
+        Returns:
+            音频信息（含特征和文本描述），提取失败时返回 None（回退到上传音频）
+        """
+        from audio_features import analyze_prosody
+        
+        try:
+            start = time.perf_counter()
+            features, summary = analyze_prosody(audio_path)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            logger.warning(f"韵律特征提取失败，回退到上传音频: {e}")
+            return None
+        
+        logger.info(f"韵律特征提取完成，耗时 {elapsed * 1000:.1f}ms: {summary}")
+        return {
+            "mode": "prosody",
+            "format": sniff_file(audio_path),
+            "file_bytes": os.path.getsize(audio_path),
+            "payload_bytes": len(summary.encode('utf-8')),
+            "converted": False,
+            "extract_ms": round(elapsed * 1000, 2),
+            "summary": summary,
+            "features": features
+        }
+    
+    def _create_completion(self, model: str, message_content: List[Dict[str, Any]]) -> str:
+        """
+        调用 chat.completions 接口（受上游并发上限约束），返回模型输出文本
+        
+        在上游事件循环中以流式方式读取响应；请求被取消时立即关闭连接（包括还在等待首字节时），
+        上游随之停止生成，并发名额随即释放。等待并发名额期间被取消则不再发出请求。
+        """
+        check_cancelled()
+        wait_or_cancel(lambda timeout: self._upstream_limiter.acquire(timeout=timeout))
+        try:
+            return run_upstream(self._stream_completion(model, message_content))
+        finally:
+            self._upstream_limiter.release()
+    
+    @staticmethod
+    async def _stream_completion(model: str, message_content: List[Dict[str, Any]]) -> str:
+        client = get_async_openai_client()
+        stream = await client.chat.completions.create(**completion_kwargs(model, message_content), stream=True)
+        parts = []
+        async with stream:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+        return "".join(parts)
+    
+    def _append_audio(self, message_content: List[Dict[str, Any]], audio_path: str, model: str) -> Dict[str, Any]:
+        """
+        将音频作为 input_audio 加入消息，并返回传输统计
+        
+        Args:
+            message_content: 消息内容列表
+            audio_path: 音频文件路径
+            model: 使用的模型
+            
+        Returns:
+            音频传输信息（格式、文件大小、上行负载大小、是否转换）
+        """
+        item, audio_info = audio_content(audio_path, model)
+        message_content.append(item)
+        logger.info(f"音频输入: {audio_info}")
+        return audio_info
+    
+    def _parse_result(self, result_text: str) -> EmotionAnalysis:
         """
         解析 qwen-omni 返回的分析结果
         
@@ -167,7 +475,22 @@ class EmotionDetectionCrew:
             result_text: qwen-omni 返回的文本结果
             
         Returns:
-            结构化的情绪识别响应
+            结构化的情绪识别响应（没有有效 JSON 时使用启发式解析）
+        """
+        result = self._parse_json(result_text)
+        if result is None:
+            return self._heuristic_parse(result_text)
+        return result
+    
+    def _parse_json(self, result_text: str) -> Optional[EmotionAnalysis]:
+        """
+        按 JSON 解析模型结果
+        
+        Args:
+            result_text: 模型返回的文本结果
+            
+        Returns:
+            结构化的情绪识别响应；找不到 JSON 或 JSON 无效时返回 None
         """
         try:
             # 尝试从markdown代码块中提取JSON
@@ -175,7 +498,7 @@ class EmotionDetectionCrew:
             
             if not json_str:
                 logger.warning("未找到有效的JSON数据")
-                return self._heuristic_parse(result_text)
+                return None
             
             # 清理JSON字符串
             json_str = self._clean_json(json_str)
@@ -186,7 +509,7 @@ class EmotionDetectionCrew:
             # 构建情绪结果列表
             emotions = []
             for emotion_data in result_data.get('emotions', []):
-                emotions.append(EmotionResult(
+                emotions.append(make_emotion(
                     emotion=emotion_data.get('emotion', '未知'),
                     confidence=float(emotion_data.get('confidence', 0.5)),
                     reason=emotion_data.get('reason', '未提供理由')
@@ -194,25 +517,25 @@ class EmotionDetectionCrew:
             
             # 如果没有识别出情绪，添加一个默认的
             if not emotions:
-                emotions.append(EmotionResult(
+                emotions.append(make_emotion(
                     emotion="平静",
                     confidence=0.5,
                     reason="未检测到明显的情绪信号"
                 ))
             
-            return EmotionDetectResponse(
+            return EmotionAnalysis(
                 success=True,
                 emotions=emotions,
-                primary_emotion=result_data.get('primary_emotion', emotions[0].emotion)
+                primary_emotion=result_data.get('primary_emotion') or emotions[0].emotion
             )
                 
         except json.JSONDecodeError as e:
-            logger.warning(f"JSON解析失败: {e}, 使用启发式解析")
+            logger.warning(f"JSON解析失败: {e}")
             logger.debug(f"尝试解析的JSON字符串: {json_str if 'json_str' in locals() else 'N/A'}")
-            return self._heuristic_parse(result_text)
+            return None
         except Exception as e:
             logger.error(f"结果解析出错: {e}", exc_info=True)
-            return EmotionDetectResponse(
+            return EmotionAnalysis(
                 success=False,
                 emotions=[],
                 primary_emotion="未知"
@@ -272,7 +595,7 @@ class EmotionDetectionCrew:
         
         return json_str.strip()
     
-    def _heuristic_parse(self, result_text: str) -> EmotionDetectResponse:
+    def _heuristic_parse(self, result_text: str) -> EmotionAnalysis:
         """
         启发式解析结果（当JSON解析失败时）
         
@@ -290,7 +613,7 @@ class EmotionDetectionCrew:
         
         for emotion in config.EMOTION_CATEGORIES:
             if emotion in result_text:
-                detected_emotions.append(EmotionResult(
+                detected_emotions.append(make_emotion(
                     emotion=emotion,
                     confidence=0.7,
                     reason=f"在分析结果中检测到情绪关键词: {emotion}"
@@ -298,13 +621,13 @@ class EmotionDetectionCrew:
         
         # 如果没有检测到任何情绪，返回默认情绪
         if not detected_emotions:
-            detected_emotions.append(EmotionResult(
+            detected_emotions.append(make_emotion(
                 emotion="平静",
                 confidence=0.5,
                 reason="未检测到明显的情绪信号"
             ))
         
-        return EmotionDetectResponse(
+        return EmotionAnalysis(
             success=True,
             emotions=detected_emotions[:3],  # 最多返回3个情绪
             primary_emotion=detected_emotions[0].emotion
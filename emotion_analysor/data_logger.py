@@ -1,35 +1,47 @@
 """
 数据记录模块 - 将每次分析的数据存储到本地文件
 """
-import json
+import heapq
 import os
+import orjson
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterator
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
 class DataLogger:
-    """数据记录器 - 记录每次情绪分析的详细信息"""
+    """
+    数据记录器 - 记录每次情绪分析的详细信息
     
-    def __init__(self, log_dir: Optional[str] = None):
+    多 worker 模式下每个 worker 写自己的分片文件（emotion_analysis_<日期>.<pid>.jsonl），
+    不会出现多个进程交错写同一行；读取时把同一天的所有分片按时间戳合并。
+    """
+    
+    def __init__(self, log_dir: Optional[str] = None, sharded: Optional[bool] = None):
         """
         初始化数据记录器
         
         Args:
             log_dir: 日志存储目录，默认使用配置中的目录
+            sharded: 是否按 worker 分片写入，默认在多 worker 模式下启用
         """
         if log_dir is None:
             from config import config
             log_dir = config.DATA_LOG_DIR
+        if sharded is None:
+            from shared_state import is_shared
+            sharded = is_shared()
         
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
         
         # 使用日期作为文件名，便于管理
-        today = datetime.now().strftime("%Y-%m-%d")
-        self.log_file = self.log_dir / f"emotion_analysis_{today}.jsonl"
+        self.date = datetime.now().strftime("%Y-%m-%d")
+        suffix = f".{os.getpid()}" if sharded else ""
+        self.log_file = self.log_dir / f"emotion_analysis_{self.date}{suffix}.jsonl"
         
         logger.info(f"数据记录器初始化完成，日志文件: {self.log_file}")
     
@@ -42,7 +54,10 @@ class DataLogger:
         analysis_result: Dict[str, Any],
         processing_time: float,
         success: bool = True,
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        cancelled: bool = False,
+        audio_info: Optional[Dict[str, Any]] = None,
+        cache_info: Optional[Dict[str, Any]] = None
     ):
         """
         记录一次分析的完整数据
@@ -56,6 +71,9 @@ class DataLogger:
             processing_time: 处理耗时（秒）
             success: 是否成功
             error_message: 错误信息（如果有）
+            cancelled: 是否因客户端断开而取消
+            audio_info: 音频传输信息（格式、文件大小、上行负载大小、是否转换）
+            cache_info: 近似重复缓存查询结果（是否命中、是否完全相同、相似度）
         """
         try:
             # 构建记录数据
@@ -69,13 +87,15 @@ class DataLogger:
                 "result": analysis_result,
                 "processing_time_seconds": round(processing_time, 3),
                 "success": success,
-                "error": error_message
+                "error": error_message,
+                "cancelled": cancelled,
+                "audio": audio_info,
+                "cache": cache_info
             }
             
-            # 追加到文件（JSONL格式，每行一个JSON对象）
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                json.dump(log_entry, f, ensure_ascii=False)
-                f.write('\n')
+            # 追加到文件（JSONL格式，每行一个JSON对象，orjson 输出 UTF-8 且不转义中文）
+            with open(self.log_file, 'ab') as f:
+                f.write(orjson.dumps(log_entry) + b'\n')
             
             logger.debug(f"数据记录成功: {timestamp}")
             
@@ -94,28 +114,33 @@ class DataLogger:
             日志记录列表
         """
         try:
-            if date:
-                log_file = self.log_dir / f"emotion_analysis_{date}.jsonl"
-            else:
-                log_file = self.log_file
+            date = date or self.date
+            # 单进程时只有 emotion_analysis_<日期>.jsonl，多 worker 时还有各 worker 的分片
+            log_files = sorted(self.log_dir.glob(f"emotion_analysis_{date}*.jsonl"))
             
-            if not log_file.exists():
+            if not log_files:
                 return []
+            if len(log_files) == 1:
+                return list(islice(self._read_lines(log_files[0]), limit))
             
-            logs = []
-            with open(log_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        logs.append(json.loads(line))
-                        if len(logs) >= limit:
-                            break
-            
-            return logs
+            # 各分片内部按时间顺序追加，按时间戳归并即可
+            merged = heapq.merge(
+                *(self._read_lines(path) for path in log_files),
+                key=lambda log: log.get('timestamp') or ''
+            )
+            return list(islice(merged, limit))
             
         except Exception as e:
             logger.error(f"读取日志失败: {str(e)}", exc_info=True)
             return []
     
+    @staticmethod
+    def _read_lines(path: Path) -> Iterator[Dict[str, Any]]:
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line)
+    
     def get_statistics(self, date: Optional[str] = None) -> Dict[str, Any]:
         """
         获取统计信息
@@ -134,12 +159,17 @@ class DataLogger:
                     "total_count": 0,
                     "success_count": 0,
                     "error_count": 0,
+                    "cancelled_count": 0,
                     "avg_processing_time": 0,
-                    "emotion_distribution": {}
+                    "emotion_distribution": {},
+                    "audio": {},
+                    "cascade": {},
+                    "semantic_cache": {}
                 }
             
             success_count = sum(1 for log in logs if log.get('success'))
-            error_count = len(logs) - success_count
+            cancelled_count = sum(1 for log in logs if log.get('cancelled'))
+            error_count = len(logs) - success_count - cancelled_count
             
             processing_times = [log.get('processing_time_seconds', 0) for log in logs]
             avg_processing_time = sum(processing_times) / len(processing_times) if processing_times else 0
@@ -152,12 +182,82 @@ class DataLogger:
                     if primary_emotion:
                         emotion_distribution[primary_emotion] = emotion_distribution.get(primary_emotion, 0) + 1
             
+            # 统计音频传输量
+            audio_logs = [log['audio'] for log in logs if log.get('audio')]
+            audio_stats = {}
+            if audio_logs:
+                format_distribution = {}
+                mode_distribution = {}
+                for audio in audio_logs:
+                    fmt = audio.get('format')
+                    format_distribution[fmt] = format_distribution.get(fmt, 0) + 1
+                    mode = audio.get('mode', 'omni')
+                    mode_distribution[mode] = mode_distribution.get(mode, 0) + 1
+                audio_stats = {
+                    "count": len(audio_logs),
+                    "avg_file_bytes": round(sum(a.get('file_bytes', 0) for a in audio_logs) / len(audio_logs)),
+                    "avg_payload_bytes": round(sum(a.get('payload_bytes', 0) for a in audio_logs) / len(audio_logs)),
+                    "converted_count": sum(1 for a in audio_logs if a.get('converted')),
+                    "windowed_count": sum(1 for a in audio_logs if a.get('windowed')),
+                    "format_distribution": format_distribution,
+                    "mode_distribution": mode_distribution
+                }
+            
+            # 统计级联分析：升级率及未升级请求节省的延迟和上行负载
+            cascade_logs = [a for a in audio_logs if a.get('cascade')]
+            cascade_stats = {}
+            if cascade_logs:
+                kept = [a for a in cascade_logs if not a['cascade'].get('escalated')]
+                escalated = [a for a in cascade_logs if a['cascade'].get('escalated')]
+                cheap_latencies = [a['cascade'].get('cheap_latency', 0) for a in cascade_logs]
+                omni_latencies = [a['cascade']['omni_latency'] for a in escalated if 'omni_latency' in a['cascade']]
+                avg_omni_latency = sum(omni_latencies) / len(omni_latencies) if omni_latencies else None
+                # 未升级的请求若直接走 omni，上行负载约为音频 base64 编码后的大小
+                payload_saved = sum(
+                    max((a.get('file_bytes', 0) + 2) // 3 * 4 - a.get('payload_bytes', 0), 0) for a in kept
+                )
+                cascade_stats = {
+                    "count": len(cascade_logs),
+                    "escalated_count": len(escalated),
+                    "escalation_rate": round(len(escalated) / len(cascade_logs), 3),
+                    "avg_cheap_latency": round(sum(cheap_latencies) / len(cascade_logs), 3),
+                    "avg_omni_latency": round(avg_omni_latency, 3) if avg_omni_latency is not None else None,
+                    # 以升级请求的 omni 平均耗时估算未升级请求节省的时间
+                    "estimated_latency_saved_seconds": round(sum(
+                        max(avg_omni_latency - a['cascade'].get('cheap_latency', 0), 0) for a in kept
+                    ), 3) if avg_omni_latency is not None else None,
+                    "estimated_payload_bytes_saved": payload_saved
+                }
+            
+            # 统计近似重复缓存：命中率及命中 / 未命中请求的平均耗时
+            cache_logs = [log for log in logs if log.get('cache')]
+            cache_stats = {}
+            if cache_logs:
+                hit_logs = [log for log in cache_logs if log['cache'].get('hit')]
+                miss_logs = [log for log in cache_logs if not log['cache'].get('hit')]
+                cache_stats = {
+                    "lookups": len(cache_logs),
+                    "hits": len(hit_logs),
+                    "near_hits": sum(1 for log in hit_logs if not log['cache'].get('exact')),
+                    "hit_rate": round(len(hit_logs) / len(cache_logs), 3),
+                    "avg_hit_processing_time": round(
+                        sum(log.get('processing_time_seconds', 0) for log in hit_logs) / len(hit_logs), 3
+                    ) if hit_logs else None,
+                    "avg_miss_processing_time": round(
+                        sum(log.get('processing_time_seconds', 0) for log in miss_logs) / len(miss_logs), 3
+                    ) if miss_logs else None
+                }
+            
             return {
                 "total_count": len(logs),
                 "success_count": success_count,
                 "error_count": error_count,
+                "cancelled_count": cancelled_count,
                 "avg_processing_time": round(avg_processing_time, 3),
-                "emotion_distribution": emotion_distribution
+                "emotion_distribution": emotion_distribution,
+                "audio": audio_stats,
+                "cascade": cascade_stats,
+                "semantic_cache": cache_stats
             }
             
         except Exception as e:
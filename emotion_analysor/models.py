@@ -3,6 +3,7 @@
 """
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
+from dataclasses import dataclass, field
 from datetime import datetime
 
 class EmotionDetectRequest(BaseModel):
@@ -32,12 +33,21 @@ class EmotionResult(BaseModel):
     confidence: float = Field(..., ge=0.0, le=1.0, description="置信度 (0-1)")
     reason: str = Field(..., description="识别理由")
 
+class EmotionTimelineEntry(BaseModel):
+    """长音频单个窗口的情绪结果"""
+    start: float = Field(..., description="窗口起始时间（秒）")
+    end: float = Field(..., description="窗口结束时间（秒）")
+    primary_emotion: str = Field(..., description="该窗口的主要情绪")
+    emotions: List[EmotionResult] = Field(..., description="该窗口识别出的情绪列表")
+
 class EmotionDetectResponse(BaseModel):
     """情绪识别响应模型"""
     success: bool = Field(..., description="是否成功")
     emotions: List[EmotionResult] = Field(..., description="识别出的情绪列表")
     primary_emotion: str = Field(..., description="主要情绪")
     timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
+    timeline: Optional[List[EmotionTimelineEntry]] = Field(None, description="长音频按窗口的情绪时间线")
+    audio_info: Optional[Dict[str, Any]] = Field(None, description="音频传输信息（仅内部记录，不返回给客户端）", exclude=True)
     
     class Config:
         json_schema_extra = {
@@ -60,6 +70,54 @@ class EmotionDetectResponse(BaseModel):
             }
         }
 
+# ==================== 内部结果结构 ====================
+# 上面的 pydantic 模型描述对外接口（请求校验和 OpenAPI 文档）。服务内部的分析结果
+# 使用下面的 slots dataclass：构建时不经过 pydantic 校验，orjson 可以直接序列化，
+# HTTP 响应、数据日志和流式推送共用同一份结果。
+
+@dataclass(slots=True)
+class EmotionScore:
+    """单个情绪结果（字段同 EmotionResult）"""
+    emotion: str
+    confidence: float
+    reason: str
+
+@dataclass(slots=True)
+class EmotionWindow:
+    """长音频单个窗口的情绪结果（字段同 EmotionTimelineEntry）"""
+    start: float
+    end: float
+    primary_emotion: str
+    emotions: List[EmotionScore]
+
+@dataclass(slots=True)
+class EmotionAnalysis:
+    """情绪识别结果（字段同 EmotionDetectResponse）"""
+    success: bool
+    emotions: List[EmotionScore]
+    primary_emotion: str
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    timeline: Optional[List[EmotionWindow]] = None
+    audio_info: Optional[Dict[str, Any]] = None  # 仅内部记录，不返回给客户端
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """对外输出的字段（不含 audio_info），可直接交给 orjson 序列化"""
+        return {
+            "success": self.success,
+            "emotions": self.emotions,
+            "primary_emotion": self.primary_emotion,
+            "timestamp": self.timestamp,
+            "timeline": self.timeline
+        }
+
+def make_emotion(emotion: Any, confidence: Any, reason: Any) -> EmotionScore:
+    """构建情绪结果，取值由这里规范：置信度截断到 [0, 1]，其余字段转为字符串"""
+    return EmotionScore(
+        emotion=str(emotion),
+        confidence=min(max(float(confidence), 0.0), 1.0),
+        reason=str(reason)
+    )
+
 class HealthResponse(BaseModel):
     """健康检查响应"""
     status: str = Field(..., description="服务状态")
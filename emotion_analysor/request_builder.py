@@ -0,0 +1,154 @@
+"""
+情绪分析请求构建 - 提示词、音频输入和 chat.completions 参数
+
+EmotionDetectionCrew 和 AudioProcessorTool 共用，保证两条路径发给上游的请求一致。
+"""
+import base64
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from openai import BadRequestError
+
+from config import config
+from audio_format import sniff_file, convert_audio
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_PROMPT = """请综合分析用户的情绪状态，识别出所有可能的情绪类型。
+
+可选的情绪类型包括但不限于：
+开心、快乐、兴奋、满足、悲伤、难过、失落、沮丧、愤怒、生气、烦躁、不满、
+焦虑、担心、紧张、恐惧、惊讶、震惊、困惑、平静、放松、淡定、厌恶、反感、
+无聊、期待、希望、好奇、感激、感动、温暖、孤独、寂寞、无助、自信、自豪、
+骄傲、羞愧、内疚、尴尬、疲惫、困倦、无力
+
+请以 JSON 格式返回分析结果，格式如下：
+{
+    "emotions": [
+        {
+            "emotion": "情绪类型",
+            "confidence": 0.85,
+            "reason": "识别理由"
+        }
+    ],
+    "primary_emotion": "主要情绪"
+}
+
+"""
+
+# 运行中发现被上游拒绝的 (模型, 音频格式)，进程内共享
+_rejected_formats: Set[Tuple[str, str]] = set()
+
+
+def format_history(conversation_history: Optional[List[Dict[str, str]]], last_n: int = 5) -> str:
+    """将对话历史格式化为提示词中的上下文（只取最近 last_n 条）"""
+    if not conversation_history:
+        return ""
+    return "\n".join([
+        f"{'用户' if msg.get('role') == 'user' else '助手'}: {msg.get('content', '')}"
+        for msg in conversation_history[-last_n:]
+    ])
+
+
+def build_prompt(text: Optional[str] = None, conversation_context: str = "") -> str:
+    """
+    构建分析提示词
+
+    Args:
+        text: 当前文本
+        conversation_context: 已格式化的对话历史
+
+    Returns:
+        提示词
+    """
+    prompt = ANALYSIS_PROMPT
+    if conversation_context:
+        prompt += f"\n对话历史:\n{conversation_context}\n"
+    if text:
+        prompt += f"\n当前文本: {text}\n"
+    return prompt
+
+
+def encode_audio(audio_path: str, model: Optional[str] = None) -> Tuple[str, str, bool]:
+    """
+    读取音频文件并编码为 base64
+
+    按文件头识别真实格式，模型支持时原样发送；不支持时转换为 AUDIO_FALLBACK_FORMAT。
+
+    Args:
+        audio_path: 音频文件路径
+        model: 使用的模型
+
+    Returns:
+        (base64 字符串, 音频格式, 是否经过转换)
+    """
+    audio_format = sniff_file(audio_path)
+    if audio_format is None:
+        # 无法识别时退回按扩展名判断
+        audio_format = os.path.splitext(audio_path)[1].lstrip('.').lower() or 'wav'
+
+    rejected = (model, audio_format) in _rejected_formats
+    if audio_format in config.OMNI_AUDIO_FORMATS and not rejected:
+        with open(audio_path, 'rb') as f:
+            return base64.b64encode(f.read()).decode('utf-8'), audio_format, False
+
+    target = config.AUDIO_FALLBACK_FORMAT
+    logger.info(f"音频格式 {audio_format} 不被模型 {model} 支持，转换为 {target}")
+    audio_data = convert_audio(audio_path, target)
+    return base64.b64encode(audio_data).decode('utf-8'), target, True
+
+
+def audio_content(audio_path: str, model: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    构建 input_audio 消息内容
+
+    Args:
+        audio_path: 音频文件路径
+        model: 使用的模型
+
+    Returns:
+        (消息内容项, 音频传输信息：格式、文件大小、上行负载大小、是否转换)
+    """
+    audio_base64, audio_format, converted = encode_audio(audio_path, model)
+    data_uri = f"data:;base64,{audio_base64}"
+    item = {
+        "type": "input_audio",
+        "input_audio": {
+            "data": data_uri,
+            "format": audio_format
+        }
+    }
+    audio_info = {
+        "mode": "omni",
+        "format": audio_format,
+        "file_bytes": os.path.getsize(audio_path),
+        "payload_bytes": len(data_uri),
+        "converted": converted
+    }
+    return item, audio_info
+
+
+def is_format_error(error: BadRequestError) -> bool:
+    """判断上游 400 错误是否由音频格式引起"""
+    message = str(error).lower()
+    return "format" in message or "audio" in message
+
+
+def reject_format(model: str, audio_format: str):
+    """记住上游拒绝的 (模型, 音频格式)，之后同一组合直接转换"""
+    _rejected_formats.add((model, audio_format))
+
+
+def completion_kwargs(model: str, message_content: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """chat.completions.create 的参数（同步和异步客户端通用）"""
+    return {
+        "model": model,
+        "messages": [{
+            "role": "user",
+            "content": message_content
+        }],
+        "extra_body": {'enable_thinking': config.ENABLE_THINKING},
+        "temperature": config.LLM_TEMPERATURE,
+        "max_tokens": config.LLM_MAX_TOKENS
+    }
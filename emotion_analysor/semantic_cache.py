@@ -0,0 +1,525 @@
+"""
+近似重复文本缓存 - 对纯文本情绪识别请求做 MinHash + LSH 近似匹配
+
+大量消息只在标点、表情或重复字上有差别（"太好了！！" / "太好了!" / "太好了～"），
+精确匹配缓存命中不了，但模型给出的结果相同。这里先对文本做规范化，再按字符 n-gram
+计算 MinHash 签名，用 LSH 分段（banding）索引，候选项再用真实 Jaccard 相似度确认，
+达到阈值时直接复用缓存结果。差别中含否定词或程度词（"很喜欢" / "很不喜欢"、"有点生气" /
+"非常生气"）的文本即使相似度达到阈值也不复用：插入一个字就可能反转或改变情绪，而 n-gram
+相似度几乎不变。
+
+为了安全地调整阈值，近似命中（规范化后不完全相同）会按比例抽样复核：后台重新分析一次，
+比较主要情绪是否一致，统计误复用率并保留最近的不一致样本。
+"""
+import difflib
+import hashlib
+import json
+import logging
+import pickle
+import random
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, FrozenSet, List, Optional, Tuple
+
+import shared_state
+
+logger = logging.getLogger(__name__)
+
+# MinHash 使用的梅森素数
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# 连续重复超过 2 次的字符折叠为 2 次（"哈哈哈哈哈" -> "哈哈"）
+_REPEAT_RE = re.compile(r"(.)\1{2,}")
+# 每次查询最多做精确 Jaccard 确认的候选项数
+MAX_CANDIDATES = 32
+# 否定词和程度词用字，出现在两段文本的差别中时不算近似重复
+_POLARITY_CHARS = frozenset("不没别非无未莫勿甭很太超极最更稍略挺蛮")
+
+
+def normalize_text(text: str) -> str:
+    """
+    规范化文本：全角转半角、转小写，去掉标点、符号（含 emoji）和空白，折叠重复字符
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    kept = [ch for ch in text if unicodedata.category(ch)[0] not in ("P", "S", "Z", "C")]
+    return _REPEAT_RE.sub(r"\1\1", "".join(kept))
+
+
+def shingles(text: str, n: int) -> FrozenSet[str]:
+    """字符 n-gram 集合，文本短于 n 时整体作为一个 gram"""
+    if len(text) <= n:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def polarity_differs(a: str, b: str) -> bool:
+    """两段规范化文本的差别中是否有否定词或程度词"""
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    return any(
+        tag != "equal" and not _POLARITY_CHARS.isdisjoint(a[i1:i2] + b[j1:j2])
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+    )
+
+
+def _stable_hash(value: str) -> int:
+    """与进程无关的 32 位哈希（内置 hash() 每个进程的种子不同）"""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+class MinHasher:
+    """MinHash 签名：num_perm 个 (a*x + b) mod p 形式的哈希函数"""
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, grams: FrozenSet[str]) -> Tuple[int, ...]:
+        hashes = [_stable_hash(g) for g in grams]
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(
+            min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH
+            for a, b in self._params
+        )
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class _CacheEntry:
+    """缓存项"""
+    text: str
+    normalized: str
+    grams: FrozenSet[str]
+    context: str
+    bucket_keys: List[Tuple[int, int, str]]
+    value: Any
+    created_at: float
+
+
+@dataclass
+class CacheHit:
+    """一次缓存命中"""
+    value: Any
+    similarity: float
+    exact: bool          # 规范化后完全相同
+    cached_text: str
+
+
+class SemanticCache:
+    """
+    近似重复文本缓存
+
+    - 键：规范化文本的字符 n-gram MinHash 签名，分为 bands 段做 LSH 索引；
+      context（对话历史等）必须完全相同才会匹配
+    - 候选项用真实 Jaccard 相似度确认，不低于 threshold 且差别中没有否定词、程度词才算命中
+    - 按条目数做 LRU 淘汰，超过 TTL 的条目视为过期
+    - 近似命中按 audit_rate 抽样复核，统计误复用率
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 2,
+        max_entries: int = 10000,
+        ttl_seconds: float = 3600,
+        audit_rate: float = 0.05,
+        max_samples: int = 50
+    ):
+        """
+        初始化缓存
+
+        Args:
+            threshold: 命中所需的最低 Jaccard 相似度
+            num_perm: MinHash 签名长度
+            bands: LSH 分段数（num_perm 须能被整除），段越多召回越高
+            shingle_size: 字符 n-gram 的 n
+            max_entries: 最多缓存的条目数
+            ttl_seconds: 条目有效期（秒）
+            audit_rate: 近似命中的抽样复核比例
+            max_samples: 保留的最近误复用样本数
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) 必须能被 bands ({bands}) 整除")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.audit_rate = audit_rate
+
+        self._hasher = MinHasher(num_perm)
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, int, str], set] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self._lookups = 0
+        self._exact_hits = 0
+        self._near_hits = 0
+        self._evictions = 0
+        self._audits = 0
+        self._false_reuse = 0
+        self._samples: Deque[Dict[str, Any]] = deque(maxlen=max_samples)
+
+    def _index(self, text: str, context: str):
+        normalized = normalize_text(text)
+        grams = shingles(normalized, self.shingle_size)
+        signature = self._hasher.signature(grams)
+        # 整数元组的 hash 不受 PYTHONHASHSEED 影响，多个 worker 计算出的分段键一致
+        bucket_keys = [
+            (band, hash(signature[band * self.rows:(band + 1) * self.rows]), context)
+            for band in range(self.bands)
+        ]
+        return normalized, grams, bucket_keys
+
+    def get(self, text: str, context: str = "") -> Optional[CacheHit]:
+        """
+        查找近似重复的缓存结果
+
+        Args:
+            text: 请求文本
+            context: 必须完全匹配的上下文键（如对话历史的哈希）
+
+        Returns:
+            命中时返回 CacheHit，否则返回 None
+        """
+        normalized, grams, bucket_keys = self._index(text, context)
+        if not normalized:
+            return None
+        now = time.time()
+
+        with self._lock:
+            self._lookups += 1
+            # 按碰撞的分段数排序，只确认最可能相似的候选项，避免模板化文本把整个桶都拉进来
+            collisions = Counter()
+            for key in bucket_keys:
+                collisions.update(self._buckets.get(key, ()))
+
+            candidates = [
+                (entry_id, self._entries[entry_id])
+                for entry_id, _ in collisions.most_common(MAX_CANDIDATES)
+                if now - self._entries[entry_id].created_at <= self.ttl_seconds
+            ]
+            best = self._select(normalized, grams, candidates)
+            if best is None:
+                return None
+
+            best_id, entry, similarity = best
+            self._entries.move_to_end(best_id)
+            exact = entry.normalized == normalized
+            if exact:
+                self._exact_hits += 1
+            else:
+                self._near_hits += 1
+            return CacheHit(value=entry.value, similarity=round(similarity, 4), exact=exact, cached_text=entry.text)
+
+    def _select(
+        self,
+        normalized: str,
+        grams: FrozenSet[str],
+        candidates: List[Tuple[int, _CacheEntry]]
+    ) -> Optional[Tuple[int, _CacheEntry, float]]:
+        """用真实 Jaccard 相似度确认候选项，返回不低于阈值的最相似一项"""
+        best = None
+        for entry_id, entry in candidates:
+            similarity = 1.0 if entry.normalized == normalized else jaccard(grams, entry.grams)
+            if best is not None and similarity <= best[2]:
+                continue
+            if similarity < 1.0 and similarity >= self.threshold and polarity_differs(normalized, entry.normalized):
+                continue
+            best = (entry_id, entry, similarity)
+        if best is None or best[2] < self.threshold:
+            return None
+        return best
+
+    def put(self, text: str, value: Any, context: str = ""):
+        """写入缓存"""
+        normalized, grams, bucket_keys = self._index(text, context)
+        if not normalized:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _CacheEntry(
+                text=text,
+                normalized=normalized,
+                grams=grams,
+                context=context,
+                bucket_keys=bucket_keys,
+                value=value,
+                created_at=time.time()
+            )
+            for key in bucket_keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                old_id, old = self._entries.popitem(last=False)
+                self._remove_from_buckets(old_id, old)
+                self._evictions += 1
+
+    def _remove_from_buckets(self, entry_id: int, entry: _CacheEntry):
+        for key in entry.bucket_keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def should_audit(self, hit: CacheHit) -> bool:
+        """近似命中按比例抽样复核（规范化后完全相同的命中不复核）"""
+        return not hit.exact and random.random() < self.audit_rate
+
+    def record_audit(self, text: str, hit: CacheHit, cached_label: str, fresh_label: str):
+        """
+        记录一次复核结果
+
+        Args:
+            text: 请求文本
+            hit: 缓存命中
+            cached_label: 缓存结果的主要情绪
+            fresh_label: 重新分析得到的主要情绪
+        """
+        with self._lock:
+            self._audits += 1
+            if cached_label != fresh_label:
+                self._false_reuse += 1
+                self._samples.append({
+                    "text": text,
+                    "cached_text": hit.cached_text,
+                    "similarity": hit.similarity,
+                    "cached_primary_emotion": cached_label,
+                    "fresh_primary_emotion": fresh_label,
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%S")
+                })
+        if cached_label != fresh_label:
+            logger.warning(f"近似缓存误复用: '{text}' 复用了 '{hit.cached_text}'（相似度 {hit.similarity}），"
+                           f"缓存 {cached_label} / 重新分析 {fresh_label}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """命中率、复核和误复用统计"""
+        with self._lock:
+            hits = self._exact_hits + self._near_hits
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "lookups": self._lookups,
+                "hits": hits,
+                "exact_hits": self._exact_hits,
+                "near_hits": self._near_hits,
+                "hit_rate": round(hits / self._lookups, 4) if self._lookups else 0,
+                "evictions": self._evictions,
+                "audit_rate": self.audit_rate,
+                "audits": self._audits,
+                "false_reuse": self._false_reuse,
+                "false_reuse_rate": round(self._false_reuse / self._audits, 4) if self._audits else None,
+                "false_reuse_samples": list(self._samples)
+            }
+
+
+def history_context(conversation_history: Optional[List[Dict[str, str]]], last_n: int = 5) -> str:
+    """对话历史的上下文键（与 analyze_emotion 一样只取最近 last_n 条）"""
+    if not conversation_history:
+        return ""
+    parts = [f"{m.get('role', '')}:{normalize_text(m.get('content', ''))}" for m in conversation_history[-last_n:]]
+    return hashlib.blake2b("\n".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+class SharedSemanticCache(SemanticCache):
+    """
+    多 worker 共享的近似重复缓存：条目、LSH 分段、统计计数和误复用样本都存放在
+    SQLite（WAL 模式）中，任一 worker 写入的结果其他 worker 都能命中，统计为所有 worker 的合计
+
+    缓存值以 pickle 序列化，数据库只应由本服务读写。
+    """
+
+    def __init__(self, db_path: str, threshold: float, max_samples: int = 50, **kwargs):
+        super().__init__(threshold, max_samples=max_samples, **kwargs)
+        self.max_samples = max_samples
+        self._conn = shared_state.connect(db_path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS semantic_cache_entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                text TEXT NOT NULL,
+                normalized TEXT NOT NULL,
+                grams TEXT NOT NULL,
+                value BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS semantic_cache_entries_access ON semantic_cache_entries(last_access);
+            CREATE TABLE IF NOT EXISTS semantic_cache_buckets (bucket TEXT NOT NULL, entry_id INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS semantic_cache_buckets_bucket ON semantic_cache_buckets(bucket);
+            CREATE INDEX IF NOT EXISTS semantic_cache_buckets_entry ON semantic_cache_buckets(entry_id);
+            CREATE TABLE IF NOT EXISTS semantic_cache_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS semantic_cache_samples (id INTEGER PRIMARY KEY AUTOINCREMENT, sample TEXT NOT NULL);
+        """)
+
+    @staticmethod
+    def _bucket_names(bucket_keys: List[Tuple[int, int, str]]) -> List[str]:
+        return [f"{band}:{band_hash}:{context}" for band, band_hash, context in bucket_keys]
+
+    def _count(self, **increments: int):
+        self._conn.executemany(
+            "INSERT INTO semantic_cache_counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            list(increments.items())
+        )
+
+    def get(self, text: str, context: str = "") -> Optional[CacheHit]:
+        normalized, grams, bucket_keys = self._index(text, context)
+        if not normalized:
+            return None
+        buckets = self._bucket_names(bucket_keys)
+        now = time.time()
+
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT e.id, e.text, e.normalized, e.grams, e.value
+                FROM semantic_cache_entries e
+                JOIN (
+                    SELECT entry_id, COUNT(*) AS collisions FROM semantic_cache_buckets
+                    WHERE bucket IN ({",".join("?" * len(buckets))})
+                    GROUP BY entry_id ORDER BY collisions DESC LIMIT {MAX_CANDIDATES}
+                ) c ON c.entry_id = e.id
+                WHERE e.created_at >= ?
+            """, (*buckets, now - self.ttl_seconds)).fetchall()
+            candidates = [
+                (row[0], _CacheEntry(
+                    text=row[1], normalized=row[2], grams=frozenset(row[3].split("\x1f")),
+                    context=context, bucket_keys=[], value=row[4], created_at=0.0
+                ))
+                for row in rows
+            ]
+            best = self._select(normalized, grams, candidates)
+            if best is None:
+                self._count(lookups=1)
+                return None
+
+            best_id, entry, similarity = best
+            exact = entry.normalized == normalized
+            self._conn.execute("UPDATE semantic_cache_entries SET last_access = ? WHERE id = ?", (now, best_id))
+            self._count(lookups=1, **{"exact_hits" if exact else "near_hits": 1})
+
+        return CacheHit(value=pickle.loads(entry.value), similarity=round(similarity, 4), exact=exact, cached_text=entry.text)
+
+    def put(self, text: str, value: Any, context: str = ""):
+        normalized, grams, bucket_keys = self._index(text, context)
+        if not normalized:
+            return
+        now = time.time()
+        blob = pickle.dumps(value)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                entry_id = self._conn.execute(
+                    "INSERT INTO semantic_cache_entries (text, normalized, grams, value, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (text, normalized, "\x1f".join(grams), blob, now, now)
+                ).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO semantic_cache_buckets (bucket, entry_id) VALUES (?, ?)",
+                    [(bucket, entry_id) for bucket in self._bucket_names(bucket_keys)]
+                )
+
+                # 过期条目和超出容量的最久未访问条目
+                excess = self._conn.execute("SELECT COUNT(*) FROM semantic_cache_entries").fetchone()[0] - self.max_entries
+                victims = self._conn.execute(
+                    "SELECT id FROM semantic_cache_entries WHERE created_at < ? "
+                    "UNION SELECT id FROM (SELECT id FROM semantic_cache_entries ORDER BY last_access LIMIT ?)",
+                    (now - self.ttl_seconds, max(excess, 0))
+                ).fetchall()
+                if victims:
+                    self._conn.executemany("DELETE FROM semantic_cache_buckets WHERE entry_id = ?", victims)
+                    self._conn.executemany("DELETE FROM semantic_cache_entries WHERE id = ?", victims)
+                    self._count(evictions=len(victims))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def record_audit(self, text: str, hit: CacheHit, cached_label: str, fresh_label: str):
+        false_reuse = cached_label != fresh_label
+        with self._lock:
+            self._count(audits=1, false_reuse=int(false_reuse))
+            if false_reuse:
+                sample = {
+                    "text": text,
+                    "cached_text": hit.cached_text,
+                    "similarity": hit.similarity,
+                    "cached_primary_emotion": cached_label,
+                    "fresh_primary_emotion": fresh_label,
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%S")
+                }
+                cursor = self._conn.execute(
+                    "INSERT INTO semantic_cache_samples (sample) VALUES (?)", (json.dumps(sample, ensure_ascii=False),)
+                )
+                self._conn.execute("DELETE FROM semantic_cache_samples WHERE id <= ?", (cursor.lastrowid - self.max_samples,))
+        if false_reuse:
+            logger.warning(f"近似缓存误复用: '{text}' 复用了 '{hit.cached_text}'（相似度 {hit.similarity}），"
+                           f"缓存 {cached_label} / 重新分析 {fresh_label}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM semantic_cache_counters").fetchall())
+            entries = self._conn.execute("SELECT COUNT(*) FROM semantic_cache_entries").fetchone()[0]
+            samples = [json.loads(row[0]) for row in self._conn.execute("SELECT sample FROM semantic_cache_samples ORDER BY id")]
+        lookups = counters.get("lookups", 0)
+        hits = counters.get("exact_hits", 0) + counters.get("near_hits", 0)
+        audits = counters.get("audits", 0)
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "lookups": lookups,
+            "hits": hits,
+            "exact_hits": counters.get("exact_hits", 0),
+            "near_hits": counters.get("near_hits", 0),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0,
+            "evictions": counters.get("evictions", 0),
+            "audit_rate": self.audit_rate,
+            "audits": audits,
+            "false_reuse": counters.get("false_reuse", 0),
+            "false_reuse_rate": round(counters.get("false_reuse", 0) / audits, 4) if audits else None,
+            "false_reuse_samples": samples,
+            "shared": True
+        }
+
+
+# 全局缓存实例
+_semantic_cache: Optional[SemanticCache] = None
+
+def get_semantic_cache() -> SemanticCache:
+    """获取全局近似重复文本缓存实例"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        from config import config
+        options = dict(
+            threshold=config.SEMANTIC_CACHE_THRESHOLD,
+            num_perm=config.SEMANTIC_CACHE_NUM_PERM,
+            bands=config.SEMANTIC_CACHE_BANDS,
+            shingle_size=config.SEMANTIC_CACHE_SHINGLE_SIZE,
+            max_entries=config.SEMANTIC_CACHE_MAX_ENTRIES,
+            ttl_seconds=config.SEMANTIC_CACHE_TTL_SECONDS,
+            audit_rate=config.SEMANTIC_CACHE_AUDIT_RATE
+        )
+        # 多 worker 模式下缓存放在共享的 SQLite 中
+        if shared_state.is_shared():
+            _semantic_cache = SharedSemanticCache(config.SHARED_STATE_DB, **options)
+        else:
+            _semantic_cache = SemanticCache(**options)
+    return _semantic_cache
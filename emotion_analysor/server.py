@@ -1,15 +1,17 @@
 """
 FastAPI服务器 - 情绪识别系统
 """
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, WebSocket
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
+import asyncio
+import dataclasses
 import logging
 import os
 import shutil
 import time
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
@@ -18,10 +20,17 @@ from models import (
     EmotionDetectRequest,
     EmotionDetectResponse,
     HealthResponse,
-    ErrorResponse
+    ErrorResponse,
+    EmotionAnalysis
 )
 from crew.emotion_crew import EmotionDetectionCrew
 from data_logger import get_data_logger
+from upload_store import UploadMissing, get_upload_store
+from audio_format import sniff_audio_format, SNIFF_BYTES
+from stream_session import EmotionStreamSession
+from static_assets import StaticAssets
+from cancellation import RequestCancelled, run_until_disconnect
+from semantic_cache import get_semantic_cache, history_context, CacheHit
 
 # 配置日志
 logging.basicConfig(
@@ -46,11 +55,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 挂载静态文件
+# 静态文件（启动时读入内存并预压缩，DEBUG 模式下文件变化时自动重新加载）
 static_path = os.path.join(os.path.dirname(__file__), "static")
-app.mount("/static", StaticFiles(directory=static_path), name="static")
+static_assets = StaticAssets(static_path, dev_mode=config.DEBUG, max_age=config.STATIC_MAX_AGE)
+static_assets.load()
 
-# 初始化Crew（延迟加载）
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_static(path: str, request: Request):
+    """静态文件"""
+    return static_assets.response(request, path)
+
+# 初始化Crew（启动时构建，见 startup_event）
 emotion_crew: Optional[EmotionDetectionCrew] = None
 
 def get_emotion_crew() -> EmotionDetectionCrew:
@@ -61,6 +76,26 @@ def get_emotion_crew() -> EmotionDetectionCrew:
         emotion_crew = EmotionDetectionCrew()
     return emotion_crew
 
+# 流式分析共享的上游并发限制
+stream_limiter = asyncio.Semaphore(config.STREAM_MAX_CONCURRENT_UPSTREAM)
+
+def _analyze_pinned(crew: EmotionDetectionCrew, request: EmotionDetectRequest) -> EmotionAnalysis:
+    """执行情绪识别，分析期间音频文件不会被清理（文件不存在时抛出 UploadMissing）"""
+    with get_upload_store().pinned(request.audio_url):
+        return crew.analyze_emotion(request)
+
+# 近似缓存复核任务（保留引用，避免任务被回收）
+_audit_tasks = set()
+
+async def _audit_cache_hit(request: EmotionDetectRequest, hit: CacheHit):
+    """后台重新分析一次近似命中的请求，比较主要情绪是否一致"""
+    try:
+        fresh = await asyncio.to_thread(get_emotion_crew().analyze_emotion, request)
+        if fresh.success:
+            get_semantic_cache().record_audit(request.text, hit, hit.value.primary_emotion, fresh.primary_emotion)
+    except Exception as e:
+        logger.warning(f"近似缓存复核失败: {e}")
+
 @app.on_event("startup")
 async def startup_event():
     """应用启动时的初始化"""
@@ -73,24 +108,29 @@ async def startup_event():
         os.makedirs(config.UPLOAD_DIR, exist_ok=True)
         logger.info(f"上传目录: {config.UPLOAD_DIR}")
         
+        # 启动上传目录后台清理
+        upload_store = get_upload_store()
+        upload_store.scan()
+        upload_store.start()
+        
+        # 提前构建客户端并预热上游连接，避免第一个请求承担 DNS 解析和 TLS 握手
+        if config.WARMUP_ON_STARTUP:
+            await asyncio.to_thread(get_emotion_crew().warm_up)
+        
         logger.info("服务器启动成功")
     except Exception as e:
         logger.error(f"启动失败: {e}")
         raise
 
-@app.get("/", response_class=HTMLResponse)
-async def read_root():
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时的清理"""
+    await get_upload_store().stop()
+
+@app.api_route("/", methods=["GET", "HEAD"], response_class=HTMLResponse)
+async def read_root(request: Request):
     """返回主页"""
-    index_path = os.path.join(static_path, "index.html")
-    try:
-        with open(index_path, 'r', encoding='utf-8') as f:
-            return HTMLResponse(content=f.read())
-    except Exception as e:
-        logger.error(f"读取index.html失败: {e}")
-        return HTMLResponse(
-            content="<h1>错误: 无法加载前端页面</h1>",
-            status_code=500
-        )
+    return static_assets.response(request, "index.html")
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -120,12 +160,19 @@ async def upload_audio(file: UploadFile = File(...)):
                 detail=f"不支持的文件格式: {file_ext}. 支持的格式: {', '.join(config.ALLOWED_AUDIO_EXTENSIONS)}"
             )
         
+        # 按文件头识别真实格式（浏览器录音的扩展名不一定可靠）
+        header = await file.read(SNIFF_BYTES)
+        await file.seek(0)
+        audio_format = sniff_audio_format(header)
+        if audio_format:
+            file_ext = f".{audio_format}"
+        
         # 生成唯一文件名
         import uuid
         unique_filename = f"{uuid.uuid4()}{file_ext}"
         file_path = os.path.join(config.UPLOAD_DIR, unique_filename)
         
-        # 保存文件
+        # 保存文件（原样保存，不做转码）
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
         
@@ -138,13 +185,15 @@ async def upload_audio(file: UploadFile = File(...)):
                 detail=f"文件过大: {file_size} 字节. 最大允许: {config.MAX_FILE_SIZE} 字节"
             )
         
-        logger.info(f"文件上传成功: {unique_filename}, 大小: {file_size} 字节")
+        get_upload_store().register(file_path, file_size)
+        logger.info(f"文件上传成功: {unique_filename}, 格式: {audio_format or '未识别'}, 大小: {file_size} 字节")
         
         return {
             "success": True,
             "filename": unique_filename,
             "file_path": file_path,
-            "file_size": file_size
+            "file_size": file_size,
+            "format": audio_format
         }
         
     except HTTPException:
@@ -154,12 +203,15 @@ async def upload_audio(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"文件上传失败: {str(e)}")
 
 @app.post("/api/emotion_detect", response_model=EmotionDetectResponse)
-async def detect_emotion(request: EmotionDetectRequest):
+async def detect_emotion(request: EmotionDetectRequest, http_request: Request):
     """
     情绪识别端点
     
+    分析在工作线程中执行，客户端断开时取消进行中的上游调用。
+    
     Args:
         request: 情绪识别请求
+        http_request: HTTP 请求（用于检测客户端断开）
         
     Returns:
         情绪识别结果
@@ -178,7 +230,7 @@ async def detect_emotion(request: EmotionDetectRequest):
                 detail="请提供文本或音频输入"
             )
         
-        # 如果有音频URL，检查文件是否存在
+        # 如果有音频URL，转换为绝对路径（文件是否存在在分析前引用文件时检查，见 _analyze_pinned）
         if request.audio_url:
             # 如果是相对路径，转换为绝对路径
             if not os.path.isabs(request.audio_url):
@@ -186,26 +238,48 @@ async def detect_emotion(request: EmotionDetectRequest):
             else:
                 audio_path = request.audio_url
             
-            if not os.path.exists(audio_path):
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"音频文件不存在: {request.audio_url}"
-                )
-            
             # 更新请求中的音频路径为绝对路径
             request.audio_url = audio_path
         
-        # 获取Crew实例
-        crew = get_emotion_crew()
+        # 纯文本请求先查近似重复缓存（对话历史须完全一致）
+        semantic_cache = None
+        cache_info = None
+        result = None
+        if config.SEMANTIC_CACHE_ENABLED and request.text and not request.audio_url:
+            semantic_cache = get_semantic_cache()
+            context = history_context(request.conversation_history)
+            hit = semantic_cache.get(request.text, context)
+            cache_info = {"hit": hit is not None}
+            if hit is not None:
+                result = dataclasses.replace(hit.value, timestamp=datetime.now().isoformat())
+                cache_info.update(exact=hit.exact, similarity=hit.similarity)
+                if semantic_cache.should_audit(hit):
+                    task = asyncio.create_task(_audit_cache_hit(request.model_copy(), hit))
+                    _audit_tasks.add(task)
+                    task.add_done_callback(_audit_tasks.discard)
         
-        # 执行情绪识别
-        logger.info("开始执行情绪识别...")
-        result = crew.analyze_emotion(request)
+        if result is None:
+            # 获取Crew实例
+            crew = get_emotion_crew()
+            
+            # 执行情绪识别（分析期间音频文件不会被清理）
+            logger.info("开始执行情绪识别...")
+            result = await run_until_disconnect(
+                http_request, _analyze_pinned, crew, request,
+                poll_interval=config.DISCONNECT_POLL_INTERVAL
+            )
+            
+            if semantic_cache is not None and result.success:
+                semantic_cache.put(request.text, result, context)
         
         # 计算处理耗时
         processing_time = time.time() - start_time
         
-        logger.info(f"情绪识别完成 - 主要情绪: {result.primary_emotion}, 耗时: {processing_time:.3f}秒")
+        logger.info(f"情绪识别完成 - 主要情绪: {result.primary_emotion}, 耗时: {processing_time:.3f}秒"
+                    + (f", 缓存命中(相似度 {cache_info['similarity']})" if cache_info and cache_info["hit"] else ""))
+        
+        # 结果只转换一次，HTTP 响应和数据日志共用
+        body = result.to_dict()
         
         # 记录数据到日志文件
         data_logger.log_analysis(
@@ -214,24 +288,40 @@ async def detect_emotion(request: EmotionDetectRequest):
             audio_input=request.audio_url,
             conversation_history=request.conversation_history or [],
             analysis_result={
-                "success": result.success,
-                "emotions": [
-                    {
-                        "emotion": e.emotion,
-                        "confidence": e.confidence,
-                        "reason": e.reason
-                    } for e in result.emotions
-                ],
-                "primary_emotion": result.primary_emotion
+                "success": body["success"],
+                "emotions": body["emotions"],
+                "primary_emotion": body["primary_emotion"]
             },
             processing_time=processing_time,
-            success=result.success
+            success=result.success,
+            audio_info=result.audio_info,
+            cache_info=cache_info
         )
         
-        return result
+        return ORJSONResponse(body)
         
+    except UploadMissing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"音频文件不存在: {request.audio_url}"
+        )
     except HTTPException:
         raise
+    except RequestCancelled:
+        processing_time = time.time() - start_time
+        logger.info(f"客户端已断开，取消情绪识别，耗时: {processing_time:.3f}秒")
+        data_logger.log_analysis(
+            timestamp=time.strftime("%Y-%m-%dT%H:%M:%S"),
+            text_input=request.text,
+            audio_input=request.audio_url,
+            conversation_history=request.conversation_history or [],
+            analysis_result={},
+            processing_time=processing_time,
+            success=False,
+            cancelled=True
+        )
+        # 499: 客户端关闭了连接（响应不会被收到）
+        return Response(status_code=499)
     except Exception as e:
         # 计算处理耗时
         processing_time = time.time() - start_time
@@ -250,11 +340,21 @@ async def detect_emotion(request: EmotionDetectRequest):
             error_message=str(e)
         )
         
-        return EmotionDetectResponse(
-            success=False,
-            emotions=[],
-            primary_emotion="未知"
-        )
+        return ORJSONResponse(EmotionAnalysis(success=False, emotions=[], primary_emotion="未知").to_dict())
+
+@app.websocket("/ws/emotion_stream")
+async def emotion_stream(websocket: WebSocket):
+    """
+    实时情绪流
+    
+    接收浏览器 MediaRecorder 产生的 WebM/Opus 分片，按滚动窗口持续推送情绪分析结果。
+    协议见 stream_session.py。
+    """
+    await websocket.accept()
+    logger.info("流式分析连接建立")
+    session = EmotionStreamSession(websocket, get_emotion_crew(), stream_limiter)
+    await session.run()
+    logger.info("流式分析连接关闭")
 
 @app.get("/api/statistics")
 async def get_statistics(date: Optional[str] = None):
@@ -314,6 +414,33 @@ async def get_logs(date: Optional[str] = None, limit: int = 100):
             detail=f"获取日志记录失败: {str(e)}"
         )
 
+@app.get("/api/uploads/stats")
+async def get_upload_stats():
+    """
+    获取上传目录使用情况
+    
+    Returns:
+        文件数、占用空间、配额和淘汰统计
+    """
+    return {
+        "success": True,
+        "uploads": get_upload_store().get_stats()
+    }
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """
+    获取近似重复缓存统计
+    
+    Returns:
+        命中率、抽样复核次数、误复用率和最近的误复用样本（用于调整 SEMANTIC_CACHE_THRESHOLD）
+    """
+    return {
+        "success": True,
+        "enabled": config.SEMANTIC_CACHE_ENABLED,
+        "cache": get_semantic_cache().get_stats() if config.SEMANTIC_CACHE_ENABLED else {}
+    }
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """全局异常处理器"""
@@ -336,10 +463,17 @@ def main():
         "app": "server:app",
         "host": config.HOST,
         "port": config.PORT,
-        "reload": config.DEBUG,
+        "reload": config.DEBUG and config.WORKERS == 1,
+        "workers": config.WORKERS,
         "log_level": "info"
     }
     
+    # 多 worker 模式（自动重载只支持单进程）
+    if config.WORKERS > 1:
+        logger.info(f"多 worker 模式: {config.WORKERS} 个进程，共享状态: {config.SHARED_STATE_DB}")
+        if config.DEBUG:
+            logger.info("多 worker 模式下不启用自动重载")
+    
     # 如果启用 HTTPS，添加 SSL 证书配置
     if config.USE_HTTPS:
         if not os.path.exists(config.SSL_CERT_FILE) or not os.path.exists(config.SSL_KEY_FILE):
@@ -0,0 +1,80 @@
+"""
+多进程共享状态 - 多 worker 模式（WORKERS > 1）下各 worker 共用的 SQLite 连接和文件锁
+"""
+import logging
+import os
+import sqlite3
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只支持单 worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def is_shared() -> bool:
+    """是否运行在多 worker 模式"""
+    from config import config
+    return config.WORKERS > 1
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    打开共享的 SQLite 数据库（WAL 模式：读不阻塞写，多个进程可同时读写）
+
+    返回的连接可以跨线程使用，调用方需自行加锁。
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def pid_alive(pid: int) -> bool:
+    """进程是否仍在运行"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class FileLock:
+    """
+    非阻塞的进程间排他锁（flock），用于在多个 worker 中选出唯一执行后台任务的一个
+
+    持有锁的进程退出时锁由操作系统自动释放，其他 worker 下次尝试时即可接管。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def try_acquire(self) -> bool:
+        """尝试获取锁，已持有时直接返回 True"""
+        if self._fd is not None or fcntl is None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        logger.info(f"进程 {os.getpid()} 获得锁: {self.path}")
+        return True
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None or fcntl is None
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
@@ -8,9 +8,23 @@ const state = {
     audioChunks: [],
     recordingStartTime: null,
     recordingTimer: null,
-    stream: null
+    stream: null,
+    // 实时分析相关
+    streamSocket: null,
+    streamRecorder: null,
+    streamMedia: null,
+    streamAudioContext: null,
+    silenceTimer: null,
+    silenceSince: null,
+    speaking: false
 };
 
+// 实时分析参数
+const STREAM_TIMESLICE_MS = 500;           // MediaRecorder 分片间隔
+const STREAM_MAX_BUFFERED_BYTES = 1 << 20; // WebSocket 发送缓冲上限，超过则丢弃分片
+const PAUSE_RMS_THRESHOLD = 0.01;          // 低于该音量视为静音
+const PAUSE_MIN_MS = 600;                  // 静音持续多久视为停顿
+
 // DOM元素（在DOM加载完成后初始化）
 let elements = {};
 
@@ -38,7 +52,12 @@ document.addEventListener('DOMContentLoaded', () => {
         recordBtn: document.getElementById('recordBtn'),
         stopRecordBtn: document.getElementById('stopRecordBtn'),
         recordingInfo: document.getElementById('recordingInfo'),
-        recordingTime: document.getElementById('recordingTime')
+        recordingTime: document.getElementById('recordingTime'),
+        // 实时分析相关
+        streamBtn: document.getElementById('streamBtn'),
+        stopStreamBtn: document.getElementById('stopStreamBtn'),
+        streamInfo: document.getElementById('streamInfo'),
+        streamStatus: document.getElementById('streamStatus')
     };
     
     // 初始化事件监听和其他功能
@@ -54,6 +73,10 @@ function initEventListeners() {
     elements.recordBtn.addEventListener('click', startRecording);
     elements.stopRecordBtn.addEventListener('click', stopRecording);
     
+    // 实时分析按钮
+    elements.streamBtn.addEventListener('click', startStreaming);
+    elements.stopStreamBtn.addEventListener('click', stopStreaming);
+    
     // 文件上传
     elements.uploadArea.addEventListener('click', () => {
         elements.audioInput.click();
@@ -251,19 +274,27 @@ async function handleRecordingStop() {
         return;
     }
     
-    // 创建音频 Blob
-    const audioBlob = new Blob(state.audioChunks, { type: 'audio/webm' });
+    // 直接上传录音器产出的压缩音频（WebM/Opus 等），不在浏览器端转码，
+    // 服务端按文件头识别格式并原样转发给模型
+    const mimeType = state.mediaRecorder.mimeType || 'audio/webm';
+    const audioBlob = new Blob(state.audioChunks, { type: mimeType });
     
-    // 转换为 WAV 格式（更通用）
     try {
         showToast('正在处理录音...', 'warning');
         
         // 创建 File 对象
-        const audioFile = new File([audioBlob], `recording_${Date.now()}.webm`, {
-            type: 'audio/webm'
+        const audioFile = new File([audioBlob], `recording_${Date.now()}.${recordingExtension(mimeType)}`, {
+            type: mimeType
         });
         
-        // 上传录音文件
+        // 根据录音 MIME 类型选择文件扩展名
+function recordingExtension(mimeType) {
+    if (mimeType.includes('ogg')) return 'ogg';
+    if (mimeType.includes('mp4')) return 'm4a';
+    return 'webm';
+}
+
+// 上传录音文件
         await uploadRecordedAudio(audioFile);
         
     } catch (error) {
@@ -306,6 +337,191 @@ async function uploadRecordedAudio(audioFile) {
     }
 }
 
+// ==================== 实时情绪分析 ====================
+
+// 开始实时分析：录音分片通过 WebSocket 持续发送，服务端按滚动窗口推送分析结果
+async function startStreaming() {
+    if (state.streamSocket) return;
+    
+    try {
+        if (!navigator.mediaDevices || !navigator.mediaDevices.getUserMedia) {
+            showToast('您的浏览器不支持录音功能，请使用最新版 Chrome、Firefox 或 Edge', 'error');
+            return;
+        }
+        
+        const media = await navigator.mediaDevices.getUserMedia({
+            audio: {
+                echoCancellation: true,
+                noiseSuppression: true
+            }
+        });
+        
+        const protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const socket = new WebSocket(`${protocol}//${location.host}/ws/emotion_stream`);
+        socket.binaryType = 'arraybuffer';
+        
+        state.streamMedia = media;
+        state.streamSocket = socket;
+        
+        socket.addEventListener('open', () => {
+            socket.send(JSON.stringify({
+                type: 'start',
+                text: elements.textInput.value.trim() || null,
+                conversation_history: state.conversationHistory
+            }));
+            startStreamRecorder(media, socket);
+            startPauseDetection(media, socket);
+            
+            elements.streamBtn.classList.add('recording');
+            elements.streamInfo.style.display = 'block';
+            elements.streamStatus.textContent = '正在实时分析...';
+            showToast('实时分析已开始', 'success');
+        });
+        
+        socket.addEventListener('message', event => {
+            const message = JSON.parse(event.data);
+            if (message.type === 'emotion') {
+                displayResult(message.result);
+                elements.emptyState.style.display = 'none';
+                elements.streamStatus.textContent =
+                    `实时分析中 · 第 ${message.seq} 次更新 · 耗时 ${message.latency.toFixed(1)}s`;
+            } else if (message.type === 'error') {
+                console.error('实时分析出错:', message.message);
+            }
+        });
+        
+        socket.addEventListener('close', () => {
+            cleanupStreaming();
+        });
+        
+        socket.addEventListener('error', error => {
+            console.error('WebSocket 错误:', error);
+            showToast('实时分析连接失败', 'error');
+        });
+        
+    } catch (error) {
+        console.error('实时分析启动失败:', error);
+        showToast('实时分析启动失败: ' + error.message, 'error');
+        cleanupStreaming();
+    }
+}
+
+// 按固定时间片录音，每个分片到达后立即发送
+function startStreamRecorder(media, socket) {
+    const options = { mimeType: 'audio/webm;codecs=opus' };
+    if (!MediaRecorder.isTypeSupported(options.mimeType)) {
+        options.mimeType = 'audio/webm';
+    }
+    
+    const recorder = new MediaRecorder(media, options);
+    recorder.addEventListener('dataavailable', async event => {
+        if (event.data.size === 0 || socket.readyState !== WebSocket.OPEN) return;
+        // 网络跟不上时丢弃分片，避免延迟越积越大（首个分片包含文件头，必须发送）；
+        // 通知服务端字节流在此断开，服务端从下一个 Cluster 重新开始解析
+        if (socket.bufferedAmount > STREAM_MAX_BUFFERED_BYTES && recorder.sentHeader) {
+            console.warn('发送缓冲已满，丢弃音频分片');
+            socket.send(JSON.stringify({ type: 'gap' }));
+            return;
+        }
+        recorder.sentHeader = true;
+        socket.send(await event.data.arrayBuffer());
+    });
+    recorder.start(STREAM_TIMESLICE_MS);
+    state.streamRecorder = recorder;
+}
+
+// 基于音量检测说话停顿，停顿时通知服务端立即分析
+function startPauseDetection(media, socket) {
+    const AudioContextClass = window.AudioContext || window.webkitAudioContext;
+    if (!AudioContextClass) return;
+    
+    const audioContext = new AudioContextClass();
+    const analyser = audioContext.createAnalyser();
+    analyser.fftSize = 2048;
+    audioContext.createMediaStreamSource(media).connect(analyser);
+    const samples = new Float32Array(analyser.fftSize);
+    
+    state.streamAudioContext = audioContext;
+    state.silenceTimer = setInterval(() => {
+        analyser.getFloatTimeDomainData(samples);
+        let sum = 0;
+        for (let i = 0; i < samples.length; i++) {
+            sum += samples[i] * samples[i];
+        }
+        const rms = Math.sqrt(sum / samples.length);
+        
+        if (rms >= PAUSE_RMS_THRESHOLD) {
+            state.speaking = true;
+            state.silenceSince = null;
+            return;
+        }
+        
+        if (!state.speaking) return;
+        if (state.silenceSince === null) {
+            state.silenceSince = Date.now();
+        } else if (Date.now() - state.silenceSince >= PAUSE_MIN_MS) {
+            state.speaking = false;
+            state.silenceSince = null;
+            if (socket.readyState === WebSocket.OPEN) {
+                socket.send(JSON.stringify({ type: 'pause' }));
+            }
+        }
+    }, 100);
+}
+
+// 停止实时分析：通知服务端做最后一次分析，等待其关闭连接
+function stopStreaming() {
+    const socket = state.streamSocket;
+    if (!socket) return;
+    
+    const sendStop = () => {
+        if (socket.readyState === WebSocket.OPEN) {
+            socket.send(JSON.stringify({ type: 'stop' }));
+        }
+    };
+    
+    if (state.streamRecorder && state.streamRecorder.state !== 'inactive') {
+        // 等最后一个分片发出后再发送 stop
+        state.streamRecorder.addEventListener('stop', () => setTimeout(sendStop, 0));
+        state.streamRecorder.stop();
+    } else {
+        sendStop();
+    }
+    stopStreamInputs();
+    elements.streamStatus.textContent = '正在完成最后一次分析...';
+}
+
+// 释放麦克风和音频分析资源
+function stopStreamInputs() {
+    if (state.silenceTimer) {
+        clearInterval(state.silenceTimer);
+        state.silenceTimer = null;
+    }
+    if (state.streamAudioContext) {
+        state.streamAudioContext.close();
+        state.streamAudioContext = null;
+    }
+    if (state.streamMedia) {
+        state.streamMedia.getTracks().forEach(track => track.stop());
+        state.streamMedia = null;
+    }
+    state.speaking = false;
+    state.silenceSince = null;
+}
+
+// 连接关闭后恢复界面
+function cleanupStreaming() {
+    if (state.streamRecorder && state.streamRecorder.state !== 'inactive') {
+        state.streamRecorder.stop();
+    }
+    state.streamRecorder = null;
+    stopStreamInputs();
+    state.streamSocket = null;
+    
+    elements.streamBtn.classList.remove('recording');
+    elements.streamInfo.style.display = 'none';
+}
+
 // 文件选择处理
 function handleFileSelect(e) {
     const file = e.target.files[0];
@@ -485,6 +701,19 @@ function displayResult(result) {
         elements.emotionsList.appendChild(item);
     });
     
+    // 长音频的情绪时间线
+    if (result.timeline && result.timeline.length > 0) {
+        const timeline = document.createElement('div');
+        timeline.className = 'emotion-timeline';
+        timeline.innerHTML = '<h4>情绪时间线</h4>' + result.timeline.map(entry => `
+            <div class="timeline-entry">
+                <span class="timeline-range">${entry.start.toFixed(1)}s - ${entry.end.toFixed(1)}s</span>
+                <span class="emotion-name">${entry.primary_emotion}</span>
+            </div>
+        `).join('');
+        elements.emotionsList.appendChild(timeline);
+    }
+    
     // 时间戳
     const timestamp = new Date(result.timestamp).toLocaleString('zh-CN');
     elements.timestamp.textContent = `分析时间: ${timestamp}`;
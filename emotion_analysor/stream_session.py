@@ -0,0 +1,266 @@
+"""
+实时情绪流 - 基于 WebSocket 的滚动窗口情绪分析
+
+浏览器端 MediaRecorder 以固定时间片（timeslice）产生 WebM/Opus 分片，
+每个分片通过 WebSocket 以二进制消息发送到服务端。服务端为每个连接维护
+一个滚动窗口，按固定节奏或在客户端检测到停顿时触发分析，并持续推送结果。
+
+客户端 -> 服务端：
+    二进制消息                       音频分片
+    {"type": "start", "text": ..., "conversation_history": [...]}
+    {"type": "text", "text": ...}    更新伴随文本
+    {"type": "pause"}                客户端检测到停顿，立即触发分析
+    {"type": "gap"}                  客户端丢弃了分片，之后的数据从下一个 Cluster 开始使用
+    {"type": "stop"}                 结束，对剩余窗口做最后一次分析
+
+服务端 -> 客户端：
+    {"type": "emotion", "seq": n, "trigger": ..., "window_seconds": ..., "latency": ..., "result": {...}}
+    {"type": "error", "message": ...}
+    {"type": "done"}
+"""
+import asyncio
+import json
+import logging
+import orjson
+import os
+import tempfile
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from cancellation import RequestCancelled, run_cancellable
+from config import config
+from data_logger import get_data_logger
+from models import EmotionDetectRequest
+from webm_stream import WebMStreamParser, build_webm
+
+logger = logging.getLogger(__name__)
+
+
+class EmotionStreamSession:
+    """
+    单个 WebSocket 连接的流式分析会话
+
+    - 滚动窗口：分片按 EBML 结构解析（见 webm_stream.py），保留初始化段（EBML 头到
+      第一个 Cluster 之前）以及最近 STREAM_WINDOW_SECONDS 秒内到达的完整音频块，
+      窗口按块边界截取、按 Cluster 重新组装，拼接后即可独立解码
+    - 背压：每个连接同一时间最多一个分析在进行，期间的触发会被合并为一次，
+      分析开始时才对窗口取快照，因此总是分析最新的音频
+    - 缓冲上限：窗口超过 STREAM_MAX_BUFFER_BYTES 时丢弃最旧的块
+    - 并发上限：所有连接共享 upstream_limiter，限制同时发往上游的请求数
+    """
+
+    def __init__(self, websocket: WebSocket, crew, upstream_limiter: asyncio.Semaphore):
+        self.websocket = websocket
+        self.crew = crew
+        self.upstream_limiter = upstream_limiter
+
+        self.text: Optional[str] = None
+        self.conversation_history: List[Dict[str, str]] = []
+
+        self._parser = WebMStreamParser(max_init_bytes=config.STREAM_MAX_BUFFER_BYTES)
+        self._blocks: Deque[Tuple[float, bytes, bytes]] = deque()  # (到达时间, Cluster 前缀, 块)
+        self._buffered_bytes = 0
+        self._first_chunk_at: Optional[float] = None
+        self._has_new_audio = False
+
+        self._trigger = asyncio.Event()
+        self._trigger_reason = "interval"
+        self._closed = False
+        self._seq = 0
+
+    def add_chunk(self, data: bytes):
+        """
+        接收一个音频分片
+
+        Raises:
+            ValueError: 分片不是 WebM 流
+        """
+        now = time.monotonic()
+        if self._first_chunk_at is None:
+            self._first_chunk_at = now
+
+        blocks = self._parser.feed(data)
+        for prefix, block in blocks:
+            self._blocks.append((now, prefix, block))
+            self._buffered_bytes += len(block)
+        if blocks:
+            self._has_new_audio = True
+
+        # 移出窗口外的块
+        cutoff = now - config.STREAM_WINDOW_SECONDS
+        while self._blocks and (self._blocks[0][0] < cutoff or self._buffered_bytes > config.STREAM_MAX_BUFFER_BYTES):
+            _, _, old = self._blocks.popleft()
+            self._buffered_bytes -= len(old)
+
+    def handle_control(self, message: Dict) -> bool:
+        """
+        处理控制消息
+
+        Returns:
+            是否结束会话
+        """
+        msg_type = message.get("type")
+        if msg_type in ("start", "text"):
+            if "text" in message:
+                self.text = message.get("text") or None
+            if "conversation_history" in message:
+                self.conversation_history = message.get("conversation_history") or []
+        elif msg_type == "pause":
+            self.request_analysis("pause")
+        elif msg_type == "gap":
+            self._parser.skip_to_next_cluster()
+        elif msg_type == "stop":
+            return True
+        return False
+
+    def request_analysis(self, reason: str):
+        """请求一次分析（进行中时会合并）"""
+        self._trigger_reason = reason
+        self._trigger.set()
+
+    def _window_seconds(self) -> float:
+        if not self._blocks or self._first_chunk_at is None:
+            return 0.0
+        start = max(self._first_chunk_at, time.monotonic() - config.STREAM_WINDOW_SECONDS)
+        return round(self._blocks[-1][0] - start, 2)
+
+    def _snapshot(self) -> Optional[bytes]:
+        """取当前窗口的快照（初始化段 + 按 Cluster 重新组装的窗口内音频块）"""
+        if self._parser.init_segment is None or not self._blocks:
+            return None
+        self._has_new_audio = False
+        return build_webm(self._parser.init_segment, ((prefix, block) for _, prefix, block in self._blocks))
+
+    def _audio_long_enough(self) -> bool:
+        if self._first_chunk_at is None or not self._blocks:
+            return False
+        return self._blocks[-1][0] - self._first_chunk_at >= config.STREAM_MIN_AUDIO_SECONDS
+
+    async def _analyze(self, reason: str):
+        """对当前窗口做一次分析并推送结果"""
+        async with self.upstream_limiter:
+            # 拿到并发许可后再取快照，排队期间到达的音频也会被包含
+            audio = self._snapshot()
+            if audio is None:
+                return
+            window_seconds = self._window_seconds()
+
+            # 写到系统临时目录：放在 UPLOAD_DIR 会被上传目录的清理当作未登记的上传删除，并占用上传配额
+            fd, audio_path = tempfile.mkstemp(prefix="stream_", suffix=".webm")
+            request = EmotionDetectRequest(
+                text=self.text,
+                audio_url=audio_path,
+                conversation_history=self.conversation_history
+            )
+            start = time.perf_counter()
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(audio)
+                # 连接断开时分析协程被取消，进行中的上游调用随之中止
+                result = await run_cancellable(self.crew.analyze_emotion, request)
+            except (asyncio.CancelledError, RequestCancelled):
+                self._log(request, time.perf_counter() - start, cancelled=True)
+                raise
+            except Exception as e:
+                self._log(request, time.perf_counter() - start, error_message=str(e))
+                raise
+            finally:
+                try:
+                    os.remove(audio_path)
+                except OSError:
+                    pass
+            latency = time.perf_counter() - start
+
+        body = result.to_dict()
+        self._log(request, latency, result=result, body=body)
+
+        self._seq += 1
+        await self.websocket.send_text(orjson.dumps({
+            "type": "emotion",
+            "seq": self._seq,
+            "trigger": reason,
+            "window_seconds": window_seconds,
+            "audio_bytes": len(audio),
+            "latency": round(latency, 3),
+            "result": body
+        }).decode('utf-8'))
+        logger.info(f"流式分析 #{self._seq} ({reason}) - 主要情绪: {result.primary_emotion}, "
+                    f"窗口: {window_seconds}s, 耗时: {latency:.3f}秒")
+
+    def _log(self, request: EmotionDetectRequest, processing_time: float, result=None, body: Optional[Dict] = None,
+             error_message: Optional[str] = None, cancelled: bool = False):
+        """与 /api/detect_emotion 相同格式写入数据日志（音频路径是分析用的临时文件，分析后即删除）"""
+        get_data_logger().log_analysis(
+            timestamp=result.timestamp if result is not None else time.strftime("%Y-%m-%dT%H:%M:%S"),
+            text_input=request.text,
+            audio_input=request.audio_url,
+            conversation_history=request.conversation_history or [],
+            analysis_result={
+                "success": body["success"],
+                "emotions": body["emotions"],
+                "primary_emotion": body["primary_emotion"]
+            } if body is not None else {},
+            processing_time=processing_time,
+            success=result.success if result is not None else False,
+            error_message=error_message,
+            cancelled=cancelled,
+            audio_info=result.audio_info if result is not None else None
+        )
+
+    async def _analysis_loop(self):
+        """按节奏或停顿触发分析，每个连接同时只有一个分析在进行"""
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._trigger.wait(), timeout=config.STREAM_ANALYSIS_INTERVAL)
+                reason = self._trigger_reason
+            except asyncio.TimeoutError:
+                reason = "interval"
+            self._trigger.clear()
+
+            if not self._has_new_audio or not self._audio_long_enough():
+                continue
+            try:
+                await self._analyze(reason)
+            except WebSocketDisconnect:
+                return
+            except Exception as e:
+                logger.error(f"流式分析失败: {e}", exc_info=True)
+                await self.websocket.send_text(json.dumps({"type": "error", "message": str(e)}, ensure_ascii=False))
+
+    async def run(self):
+        """会话主循环：接收消息，同时在后台执行分析"""
+        analysis_task = asyncio.create_task(self._analysis_loop())
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("bytes") is not None:
+                    try:
+                        self.add_chunk(message["bytes"])
+                    except ValueError as e:
+                        logger.warning(f"流式分析收到无法解析的音频: {e}")
+                        await self.websocket.send_text(json.dumps({"type": "error", "message": str(e)}, ensure_ascii=False))
+                        await self.websocket.close(code=1003)
+                        return
+                elif message.get("text") is not None:
+                    if self.handle_control(json.loads(message["text"])):
+                        break
+
+            # 客户端主动结束：唤醒分析循环做最后一次分析；若它正忙，则结束后补一次
+            self._closed = True
+            self.request_analysis("final")
+            await analysis_task
+            if self._has_new_audio:
+                await self._analyze("final")
+            await self.websocket.send_text(json.dumps({"type": "done"}))
+            await self.websocket.close()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self._closed = True
+            if not analysis_task.done():
+                analysis_task.cancel()
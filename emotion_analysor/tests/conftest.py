@@ -0,0 +1,11 @@
+"""
+测试配置：模块按 emotion_analysor 目录下的顶层模块导入（与 server.py 相同），
+导入前设置好不依赖外部服务的环境变量
+"""
+import os
+import sys
+
+os.environ.setdefault("DASHSCOPE_API_KEY", "test")
+os.environ.setdefault("DASHSCOPE_API_BASE", "http://127.0.0.1:9/v1")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,95 @@
+"""
+请求取消：上游调用在等待首字节、分片之间被取消时立即关闭连接并释放并发名额
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+import clients
+from cancellation import RequestCancelled, run_cancellable
+from config import config
+from crew.emotion_crew import EmotionDetectionCrew
+
+MESSAGE = [{"type": "text", "text": "今天很开心"}]
+
+
+class StallingUpstream:
+    """接受请求后不再响应（或只发出第一个分片）的上游，记录连接是否被客户端关闭"""
+
+    def __init__(self, first_chunk: bool):
+        self.first_chunk = first_chunk
+        self.requested = asyncio.Event()
+        self.closed = asyncio.Event()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await reader.readuntil(b"\r\n\r\n")
+        self.requested.set()
+        if self.first_chunk:
+            chunk = {"choices": [{"index": 0, "delta": {"content": "{"}}]}
+            writer.write(
+                b"HTTP/1.1 200 OK\r\ncontent-type: text/event-stream\r\ntransfer-encoding: chunked\r\n\r\n"
+            )
+            data = f"data: {json.dumps(chunk)}\n\n".encode()
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            await writer.drain()
+        # 客户端关闭连接时读到 EOF
+        while await reader.read(1024):
+            pass
+        self.closed.set()
+        writer.close()
+
+
+async def _cancel_while_stalled(monkeypatch, first_chunk: bool):
+    upstream = StallingUpstream(first_chunk)
+    server = await asyncio.start_server(upstream.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    monkeypatch.setattr(config, "DASHSCOPE_API_BASE", f"http://127.0.0.1:{port}/v1")
+    # 上游事件循环上的客户端按新的地址重新创建
+    monkeypatch.setattr(clients, "_async_clients", type(clients._async_clients)())
+
+    crew = EmotionDetectionCrew()
+    work = asyncio.ensure_future(run_cancellable(crew._create_completion, config.TEXT_LLM_MODEL, MESSAGE))
+    try:
+        await asyncio.wait_for(upstream.requested.wait(), 5)
+        await asyncio.sleep(0.1)
+        start = time.perf_counter()
+        work.cancel()
+        await asyncio.wait_for(upstream.closed.wait(), 2)
+        closed_after = time.perf_counter() - start
+
+        # 工作线程随即以 RequestCancelled 结束并释放并发名额
+        deadline = time.monotonic() + 2
+        while not crew._upstream_limiter.acquire(blocking=False):
+            assert time.monotonic() < deadline, "并发名额没有释放"
+            await asyncio.sleep(0.01)
+        crew._upstream_limiter.release()
+        return closed_after
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.parametrize("first_chunk", [False, True], ids=["before_first_chunk", "between_chunks"])
+def test_cancel_closes_stalled_upstream(monkeypatch, first_chunk):
+    closed_after = asyncio.run(_cancel_while_stalled(monkeypatch, first_chunk))
+    assert closed_after < 1
+
+
+def test_cancelled_request_is_not_sent(monkeypatch):
+    async def run():
+        crew = EmotionDetectionCrew()
+        calls = []
+        monkeypatch.setattr(clients, "get_upstream_loop", lambda: calls.append(1))
+
+        def cancel_then_call():
+            from cancellation import _cancel_event
+            _cancel_event.get().set()
+            return crew._create_completion(config.TEXT_LLM_MODEL, MESSAGE)
+
+        with pytest.raises(RequestCancelled):
+            await run_cancellable(cancel_then_call)
+        assert not calls
+
+    asyncio.run(run())
@@ -0,0 +1,62 @@
+"""
+级联分析：文本模型的回复没有按 JSON 解析成功时总是升级到多模态模型
+"""
+import pytest
+
+from config import config
+from crew.emotion_crew import EmotionDetectionCrew
+from models import EmotionAnalysis, make_emotion
+
+
+
+def omni_result() -> EmotionAnalysis:
+    return EmotionAnalysis(
+        success=True,
+        emotions=[make_emotion("悲伤", 0.8, "语气低沉")],
+        primary_emotion="悲伤",
+        audio_info={"format": "wav", "converted": False}
+    )
+
+
+@pytest.fixture
+def crew(tmp_path, monkeypatch):
+    # 启发式解析的固定置信度（0.7）足以通过门槛时也必须升级
+    monkeypatch.setattr(config, "CASCADE_MIN_CONFIDENCE", 0.6)
+    monkeypatch.setattr(config, "CASCADE_MIN_MARGIN", 0.2)
+    crew = EmotionDetectionCrew()
+    crew.omni_calls = 0
+
+    def analyze_omni(prompt, audio_path):
+        crew.omni_calls += 1
+        return omni_result()
+
+    monkeypatch.setattr(crew, "_analyze_omni", analyze_omni)
+    audio = tmp_path / "sample.wav"
+    audio.write_bytes(b"RIFF\x00\x00\x00\x00WAVEfmt ")
+    crew.audio_path = str(audio)
+    return crew
+
+
+def test_unparseable_cheap_reply_escalates(crew, monkeypatch):
+    monkeypatch.setattr(crew, "_create_completion", lambda model, content: "用户听起来很开心。")
+
+    result = crew._analyze_cascade("分析情绪", crew.audio_path, None)
+
+    assert crew.omni_calls == 1
+    assert result.primary_emotion == "悲伤"
+    cascade = result.audio_info["cascade"]
+    assert cascade["escalated"] is True
+    assert cascade["parsed"] is False
+
+
+def test_confident_json_reply_is_kept(crew, monkeypatch):
+    reply = '{"emotions": [{"emotion": "开心", "confidence": 0.9, "reason": "用词积极"}], "primary_emotion": "开心"}'
+    monkeypatch.setattr(crew, "_create_completion", lambda model, content: reply)
+
+    result = crew._analyze_cascade("分析情绪", crew.audio_path, None)
+
+    assert crew.omni_calls == 0
+    assert result.primary_emotion == "开心"
+    cascade = result.audio_info["cascade"]
+    assert cascade["escalated"] is False
+    assert cascade["parsed"] is True
@@ -0,0 +1,43 @@
+"""
+韵律特征：没有静音的短句整段视为语音，有停顿时仍能检测出来
+"""
+import numpy as np
+
+from audio_features import extract_prosody_features
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds: float, hz: float = 180.0, amplitude: float = 0.3) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * hz * t) * amplitude).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_clip_without_silence_is_all_speech():
+    features = extract_prosody_features(np.concatenate([tone(2.8), silence(0.2)]), SAMPLE_RATE)
+    assert features["voiced_ratio"] > 0.85
+    assert abs(features["pitch_mean_hz"] - 180) < 5
+    assert features["speech_segments"] == 1
+    assert features["pause_count"] == 0
+
+    features = extract_prosody_features(tone(3.0), SAMPLE_RATE)
+    assert features["voiced_ratio"] > 0.95
+
+
+def test_pause_between_phrases():
+    samples = np.concatenate([tone(1.0), silence(0.8), tone(1.0, hz=220)])
+    features = extract_prosody_features(samples, SAMPLE_RATE)
+    assert features["speech_segments"] == 2
+    assert features["pause_count"] == 1
+    assert 0.2 < features["pause_ratio"] < 0.4
+
+
+def test_quiet_noise_is_not_speech():
+    noise = np.random.default_rng(0).normal(0, 10 ** (-60 / 20), SAMPLE_RATE * 2).astype(np.float32)
+    features = extract_prosody_features(noise, SAMPLE_RATE)
+    assert features["voiced_ratio"] == 0.0
+    assert "speech_segments" not in features
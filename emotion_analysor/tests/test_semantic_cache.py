@@ -0,0 +1,31 @@
+"""
+近似重复缓存：插入否定词、改变程度词的文本不复用缓存结果
+"""
+import pytest
+
+from semantic_cache import SemanticCache
+
+CACHED = "我真的很喜欢这家餐厅的服务和环境，下次还会再来的"
+
+
+@pytest.fixture
+def cache():
+    cache = SemanticCache(threshold=0.8)
+    cache.put(CACHED, "开心")
+    return cache
+
+
+@pytest.mark.parametrize("text", [
+    "我真的很不喜欢这家餐厅的服务和环境，下次还会再来的",
+    "我真的没喜欢这家餐厅的服务和环境，下次还会再来的",
+    "我真的超喜欢这家餐厅的服务和环境，下次还会再来的",
+])
+def test_negation_or_intensity_change_is_a_miss(cache, text):
+    assert cache.get(text) is None
+
+
+def test_punctuation_variant_still_hits(cache):
+    hit = cache.get(CACHED + "！！")
+    assert hit is not None and hit.exact
+    hit = cache.get("我真的很喜欢这家餐厅的服务和环境，下次还会再来")
+    assert hit is not None and not hit.exact and hit.value == "开心"
@@ -0,0 +1,107 @@
+"""
+上传目录管理：未分析的文件不被配额淘汰，引用前检查文件是否存在，多 worker 标记
+"""
+import os
+import time
+
+import pytest
+
+from upload_store import UploadMissing, UploadStore
+
+
+def _upload(store: UploadStore, name: str, size: int = 100) -> str:
+    path = store.upload_dir / name
+    path.write_bytes(b"\0" * size)
+    store.register(str(path), size)
+    return str(path)
+
+
+def _store(tmp_path, shared: bool) -> UploadStore:
+    return UploadStore(str(tmp_path), max_total_bytes=150, ttl_seconds=3600, sweep_interval=60, shared=shared)
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_quota_skips_pending_uploads(tmp_path, shared):
+    store = _store(tmp_path, shared)
+    analyzed = _upload(store, "a.wav")
+    with store.pinned(analyzed):
+        pass
+    pending = _upload(store, "b.wav")
+
+    removed = store.sweep()
+    assert removed["quota"] == 1
+    assert not os.path.exists(analyzed)
+    assert os.path.exists(pending)
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_quota_evicts_least_recently_used(tmp_path, shared):
+    store = _store(tmp_path, shared)
+    reused = _upload(store, "b.wav")
+    with store.pinned(reused):
+        pass
+    unused = _upload(store, "a.wav")
+    with store.pinned(unused):
+        pass
+    # 先上传的文件再次被分析，淘汰的应是之后没有再用过的文件
+    with store.pinned(reused):
+        pass
+
+    assert store.sweep()["quota"] == 1
+    assert os.path.exists(reused)
+    assert not os.path.exists(unused)
+
+
+def test_pending_marker_survives_rescan_by_other_worker(tmp_path):
+    uploader = _store(tmp_path, shared=True)
+    sweeper = _store(tmp_path, shared=True)
+    first = _upload(uploader, "a.wav")
+    second = _upload(uploader, "b.wav")
+    assert list(tmp_path.glob(".pending-*-a.wav"))
+
+    # 清理的 worker 只从目录得知两个文件，都未分析，不能按配额淘汰
+    assert sweeper.sweep()["quota"] == 0
+    assert os.path.exists(first) and os.path.exists(second)
+
+    # 由另一个 worker 分析后标记删除，此后可以被淘汰
+    with sweeper.pinned(first):
+        pass
+    assert not list(tmp_path.glob(".pending-*-a.wav"))
+    assert sweeper.sweep()["quota"] == 1
+    assert not os.path.exists(first)
+
+
+def test_stale_pending_marker_is_ignored(tmp_path):
+    store = _store(tmp_path, shared=True)
+    path = _upload(store, "a.wav", size=200)
+    marker = next(tmp_path.glob(".pending-*-a.wav"))
+    # 模拟上传的 worker 已退出（pid 不存在）
+    marker.rename(tmp_path / ".pending-999999999-a.wav")
+
+    assert store.sweep()["quota"] == 1
+    assert not os.path.exists(path)
+    assert not list(tmp_path.glob(".pending-*"))
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_pinned_raises_for_missing_file(tmp_path, shared):
+    store = _store(tmp_path, shared)
+    path = _upload(store, "a.wav")
+    os.remove(path)
+    with pytest.raises(UploadMissing):
+        with store.pinned(path):
+            pass
+    # 失败的引用不残留
+    assert not store._pins
+    assert not list(tmp_path.glob(".pin-*"))
+
+
+def test_pinned_file_is_not_removed(tmp_path):
+    store = _store(tmp_path, shared=True)
+    path = _upload(store, "a.wav", size=200)
+    store.ttl_seconds = 0
+    time.sleep(0.01)
+    with store.pinned(path):
+        assert store.sweep() == {"ttl": 0, "quota": 0, "bytes": 0}
+        assert os.path.exists(path)
+    assert store.sweep()["ttl"] == 1
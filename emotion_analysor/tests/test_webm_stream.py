@@ -0,0 +1,182 @@
+"""
+WebM 流解析：初始化段只取到第一个 Cluster 之前，窗口按块边界截取并按 Cluster 重新组装
+"""
+import asyncio
+import json
+import os
+
+import pytest
+
+import stream_session
+from data_logger import DataLogger
+from models import EmotionAnalysis
+from stream_session import EmotionStreamSession
+from webm_stream import CLUSTER_ID, EBML_ID, SEGMENT_ID, WebMStreamParser, build_webm, read_element_header
+
+UNKNOWN = b"\x01\xff\xff\xff\xff\xff\xff\xff"
+
+
+def element(element_id: int, payload: bytes) -> bytes:
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    return id_bytes + (0x4000 | len(payload)).to_bytes(2, "big") + payload
+
+
+def simple_block(timecode: int, fill: int) -> bytes:
+    return element(0xA3, b"\x81" + timecode.to_bytes(2, "big") + b"\x80" + bytes([fill]) * 40)
+
+
+INIT = (
+    element(EBML_ID, element(0x4282, b"webm"))
+    + SEGMENT_ID.to_bytes(4, "big") + UNKNOWN
+    + element(0x1549A966, element(0x2AD7B1, b"\x0f\x42\x40"))
+    + element(0x1654AE6B, element(0xAE, element(0xD7, b"\x01") + element(0x86, b"A_OPUS")))
+)
+
+
+def cluster(timecode: int, blocks, known_size: bool = False) -> bytes:
+    body = element(0xE7, timecode.to_bytes(2, "big")) + b"".join(blocks)
+    if known_size:
+        return element(CLUSTER_ID, body)
+    return CLUSTER_ID.to_bytes(4, "big") + UNKNOWN + body
+
+
+BLOCKS_1 = [simple_block(i * 20, i) for i in range(5)]
+BLOCKS_2 = [simple_block(i * 20, 10 + i) for i in range(5)]
+STREAM = INIT + cluster(0, BLOCKS_1) + cluster(100, BLOCKS_2)
+
+
+def split(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def feed_all(parser: WebMStreamParser, chunks):
+    blocks = []
+    for chunk in chunks:
+        blocks.extend(parser.feed(chunk))
+    return blocks
+
+
+def test_element_header_sizes():
+    assert read_element_header(bytearray(b"\x1a\x45\xdf\xa3\x84")) == (EBML_ID, 4, 5)
+    assert read_element_header(bytearray(CLUSTER_ID.to_bytes(4, "big") + UNKNOWN)) == (CLUSTER_ID, None, 12)
+    assert read_element_header(bytearray(b"\x1a\x45")) is None
+
+
+def test_init_segment_stops_at_first_cluster():
+    # 第一个分片除了初始化段还带着第一个 Cluster 的音频
+    parser = WebMStreamParser()
+    blocks = parser.feed(STREAM[:len(INIT) + 60])
+    assert parser.init_segment == INIT
+    blocks += parser.feed(STREAM[len(INIT) + 60:])
+    assert [block for _, block in blocks] == BLOCKS_1 + BLOCKS_2
+
+
+def test_blocks_survive_arbitrary_chunk_boundaries():
+    for size in (1, 7, 33, 500):
+        parser = WebMStreamParser()
+        blocks = feed_all(parser, split(STREAM, size))
+        assert parser.init_segment == INIT
+        assert [block for _, block in blocks] == BLOCKS_1 + BLOCKS_2
+        # 同一 Cluster 的块共享前缀，前缀保留原 Timecode
+        assert blocks[0][0] is blocks[4][0]
+        assert blocks[0][0].endswith(b"\xe7\x40\x02\x00\x00")
+        assert blocks[5][0].endswith(b"\xe7\x40\x02\x00\x64")
+
+
+def test_known_size_clusters_and_trailing_elements():
+    data = INIT + cluster(0, BLOCKS_1, known_size=True) + element(0x1C53BB6B, b"\x00" * 8) \
+        + cluster(100, BLOCKS_2, known_size=True)
+    parser = WebMStreamParser()
+    blocks = feed_all(parser, split(data, 13))
+    assert [block for _, block in blocks] == BLOCKS_1 + BLOCKS_2
+
+
+def test_skip_to_next_cluster_after_dropped_chunk():
+    chunks = split(STREAM, 50)
+    # 丢掉第一个 Cluster 中间的一个分片，之后的字节从块中间开始
+    dropped = len(INIT) // 50 + 2
+    parser = WebMStreamParser()
+    blocks = feed_all(parser, chunks[:dropped])
+    parser.skip_to_next_cluster()
+    blocks += feed_all(parser, chunks[dropped + 1:])
+    assert [block for _, block in blocks] == BLOCKS_1[:1] + BLOCKS_2
+
+
+def test_resync_on_unparseable_bytes():
+    parser = WebMStreamParser()
+    blocks = parser.feed(INIT + cluster(0, BLOCKS_1[:2]) + b"\x00" * 16 + cluster(100, BLOCKS_2))
+    assert [block for _, block in blocks] == BLOCKS_1[:2] + BLOCKS_2
+
+
+def test_not_webm():
+    with pytest.raises(ValueError):
+        WebMStreamParser().feed(b"RIFF\x00\x00\x00\x00WAVEfmt ")
+
+
+def test_rebuilt_window_is_parseable():
+    parser = WebMStreamParser()
+    blocks = feed_all(parser, split(STREAM, 64))
+    # 窗口从第一个 Cluster 中间开始
+    window = build_webm(parser.init_segment, blocks[3:])
+    assert window.startswith(INIT + CLUSTER_ID.to_bytes(4, "big"))
+    again = WebMStreamParser()
+    assert [block for _, block in again.feed(window)] == BLOCKS_1[3:] + BLOCKS_2
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+
+class FakeCrew:
+    def __init__(self):
+        self.audio = []
+        self.paths = []
+
+    def analyze_emotion(self, request):
+        self.paths.append(request.audio_url)
+        with open(request.audio_url, "rb") as f:
+            self.audio.append(f.read())
+        return EmotionAnalysis(success=True, emotions=[], primary_emotion="平静",
+                               audio_info={"format": "webm", "file_bytes": len(self.audio[-1])})
+
+
+def test_session_window_and_data_log(tmp_path, monkeypatch):
+    data_logger = DataLogger(log_dir=str(tmp_path), sharded=False)
+    monkeypatch.setattr(stream_session, "get_data_logger", lambda: data_logger)
+    clock = [1000.0]
+    monkeypatch.setattr(stream_session.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(stream_session.config, "STREAM_WINDOW_SECONDS", 1.0)
+
+    crew = FakeCrew()
+    websocket = FakeWebSocket()
+    session = EmotionStreamSession(websocket, crew, asyncio.Semaphore(1))
+
+    # 第一个分片：初始化段 + 第一个 Cluster 的前两个块
+    first_end = len(INIT) + 12 + 5 + len(BLOCKS_1[0]) * 2
+    session.add_chunk(STREAM[:first_end])
+    clock[0] += 2
+    session.add_chunk(STREAM[first_end:])
+
+    asyncio.run(session._analyze("interval"))
+
+    # 初始化段只出现一次，超出窗口的块被丢弃，窗口从重新组装的 Cluster 开头开始
+    audio = crew.audio[0]
+    assert audio.startswith(INIT + CLUSTER_ID.to_bytes(4, "big"))
+    assert audio.count(INIT) == 1
+    assert BLOCKS_1[0] not in audio and BLOCKS_1[1] not in audio
+    assert [block for _, block in WebMStreamParser().feed(audio)] == BLOCKS_1[2:] + BLOCKS_2
+
+    # 快照写在上传目录之外，分析后删除
+    assert not os.path.abspath(crew.paths[0]).startswith(os.path.abspath(stream_session.config.UPLOAD_DIR))
+    assert not os.path.exists(crew.paths[0])
+
+    assert websocket.sent[0]["type"] == "emotion"
+    logs = data_logger.get_logs()
+    assert len(logs) == 1
+    assert logs[0]["success"] is True
+    assert logs[0]["result"]["primary_emotion"] == "平静"
+    assert logs[0]["audio"]["format"] == "webm"
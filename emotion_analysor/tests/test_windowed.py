@@ -0,0 +1,49 @@
+"""
+长音频分窗分析：合并结果的 converted 取自各窗口实际的转换情况
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from audio_features import encode_wav
+from config import config
+from crew.emotion_crew import EmotionDetectionCrew
+from models import EmotionAnalysis, make_emotion
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture
+def long_audio(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "AUDIO_WINDOW_SECONDS", 2.0)
+    samples = (np.sin(np.arange(SAMPLE_RATE * 5) * 0.05) * 0.3).astype(np.float32)
+    path = tmp_path / "long.wav"
+    path.write_bytes(encode_wav(samples, SAMPLE_RATE))
+    return str(path), samples
+
+
+@pytest.mark.parametrize("converted", [False, True])
+def test_converted_follows_windows(long_audio, monkeypatch, converted):
+    path, samples = long_audio
+    crew = EmotionDetectionCrew()
+    calls = []
+    order = itertools.count()
+
+    def analyze_audio(prompt, audio_path, has_text):
+        calls.append(audio_path)
+        # 只有一个窗口被转换
+        first = next(order) == 0
+        return EmotionAnalysis(
+            success=True,
+            emotions=[make_emotion("平静", 0.8, "语速平稳")],
+            primary_emotion="平静",
+            audio_info={"format": "wav", "payload_bytes": 100, "converted": converted and first}
+        )
+
+    monkeypatch.setattr(crew, "_analyze_audio", analyze_audio)
+    result = crew._analyze_windowed("分析情绪", path, samples, SAMPLE_RATE, has_text=False)
+
+    assert len(calls) > 1
+    assert result.audio_info["converted"] is converted
+    assert result.audio_info["windowed"]["windows"] == len(calls)
@@ -1,7 +1,14 @@
 """
 工具模块初始化
+
+AudioProcessorTool 依赖 CrewAI，按需导入，避免服务启动时加载 CrewAI。
 """
-from .audio_processor import AudioProcessorTool
 
 __all__ = ['AudioProcessorTool']
 
+
+def __getattr__(name):
+    if name == 'AudioProcessorTool':
+        from .audio_processor import AudioProcessorTool
+        return AudioProcessorTool
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
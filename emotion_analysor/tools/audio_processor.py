@@ -1,13 +1,17 @@
 """
 音频处理工具 - 使用 qwen-omni 直接处理音频
+
+请求构建与 EmotionDetectionCrew 共用 request_builder，上游连接复用 clients 中的共享连接池。
 """
 from crewai.tools import BaseTool
-from typing import Type, Optional, Any
+from typing import Type, Optional, Any, Dict, List, Tuple
 from pydantic import BaseModel, Field
+import asyncio
 import os
-import base64
-from openai import OpenAI
+from openai import BadRequestError
 from config import config
+from clients import get_openai_client, get_async_openai_client
+from request_builder import build_prompt, audio_content, is_format_error, reject_format, completion_kwargs
 
 class AudioProcessorInput(BaseModel):
     """音频处理工具输入模型"""
@@ -17,7 +21,7 @@ class AudioProcessorInput(BaseModel):
 
 class AudioProcessorTool(BaseTool):
     """音频处理工具 - 使用 qwen-omni 综合分析音频、文本和对话历史"""
-    
+
     name: str = "多模态情绪分析工具"
     description: str = (
         "使用 qwen-omni 模型综合分析音频、文本和对话历史，识别用户的情绪状态。"
@@ -25,115 +29,81 @@ class AudioProcessorTool(BaseTool):
         "返回: 完整的情绪分析结果"
     )
     args_schema: Type[BaseModel] = AudioProcessorInput
-    
+
     def _run(self, audio_path: str = "", text: str = "", conversation_history: str = "") -> str:
         """
         执行多模态情绪分析
-        
+
         Args:
             audio_path: 音频文件路径（可选）
             text: 当前文本内容（可选）
             conversation_history: 对话历史（可选）
-            
+
         Returns:
             综合情绪分析结果
         """
         try:
-            # 使用 OpenAI SDK 调用 qwen-omni
-            client = OpenAI(
-                api_key=config.DASHSCOPE_API_KEY,
-                base_url=config.DASHSCOPE_API_BASE,
-            )
-            
-            # 构建分析提示词
-            analysis_prompt = """请综合分析用户的情绪状态，识别出所有可能的情绪类型。
-
-可选的情绪类型包括但不限于：
-开心、快乐、兴奋、满足、悲伤、难过、失落、沮丧、愤怒、生气、烦躁、不满、
-焦虑、担心、紧张、恐惧、惊讶、震惊、困惑、平静、放松、淡定、厌恶、反感、
-无聊、期待、希望、好奇、感激、感动、温暖、孤独、寂寞、无助、自信、自豪、
-骄傲、羞愧、内疚、尴尬、疲惫、困倦、无力
-
-请以 JSON 格式返回分析结果，格式如下：
-{
-    "emotions": [
-        {
-            "emotion": "情绪类型",
-            "confidence": 0.85,
-            "reason": "识别理由"
-        }
-    ],
-    "primary_emotion": "主要情绪",
-    "analysis": "综合分析（200字以内）"
-}
+            model, message_content, audio_info = self._build(audio_path, text, conversation_history)
+            client = get_openai_client()
+            try:
+                response = client.chat.completions.create(**completion_kwargs(model, message_content))
+            except BadRequestError as e:
+                if not self._should_retry(e, model, audio_info):
+                    raise
+                model, message_content, audio_info = self._build(audio_path, text, conversation_history)
+                response = client.chat.completions.create(**completion_kwargs(model, message_content))
+
+            return response.choices[0].message.content
 
-"""
-            
-            # 添加对话历史上下文
-            if conversation_history:
-                analysis_prompt += f"\n对话历史:\n{conversation_history}\n"
-            
-            # 添加当前文本
-            if text:
-                analysis_prompt += f"\n当前文本: {text}\n"
-            
-            # 构建消息内容
-            message_content = [
-                {
-                    "type": "text",
-                    "text": analysis_prompt
-                }
-            ]
-            
-            # 如果有音频，添加音频输入
-            if audio_path and os.path.exists(audio_path):
-                # 读取音频文件
-                with open(audio_path, 'rb') as f:
-                    audio_data = f.read()
-                    audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-                
-                file_ext = os.path.splitext(audio_path)[1].lstrip('.')
-                
-                # 处理格式映射（某些格式需要转换）
-                format_mapping = {
-                    'webm': 'webm',
-                    'wav': 'wav',
-                    'mp3': 'mp3',
-                    'm4a': 'm4a',
-                    'ogg': 'ogg',
-                    'flac': 'flac'
-                }
-                audio_format = format_mapping.get(file_ext, 'wav')
-                
-                message_content.append({
-                    "type": "input_audio",
-                    "input_audio": {
-                        "data": audio_base64,
-                        "format": audio_format
-                    }
-                })
-            
-            # 调用 API
-            response = client.chat.completions.create(
-                model="qwen-audio-turbo" if audio_path else config.QWEN_LLM_MODEL,
-                messages=[{
-                    "role": "user",
-                    "content": message_content
-                }],
-                extra_body={'enable_thinking': config.ENABLE_THINKING},
-                temperature=config.LLM_TEMPERATURE,
-                max_tokens=config.LLM_MAX_TOKENS
-            )
-            
-            # 提取分析结果
-            analysis = response.choices[0].message.content
-            
-            return analysis
-            
         except Exception as e:
             return f"情绪分析失败: {str(e)}"
-    
+
     async def _arun(self, audio_path: str = "", text: str = "", conversation_history: str = "") -> str:
-        """异步执行"""
-        return self._run(audio_path, text, conversation_history)
+        """异步执行：音频读取和编码放到线程中，上游调用使用共享的异步客户端"""
+        try:
+            model, message_content, audio_info = await asyncio.to_thread(
+                self._build, audio_path, text, conversation_history
+            )
+            client = get_async_openai_client()
+            try:
+                response = await client.chat.completions.create(**completion_kwargs(model, message_content))
+            except BadRequestError as e:
+                if not self._should_retry(e, model, audio_info):
+                    raise
+                model, message_content, audio_info = await asyncio.to_thread(
+                    self._build, audio_path, text, conversation_history
+                )
+                response = await client.chat.completions.create(**completion_kwargs(model, message_content))
+
+            return response.choices[0].message.content
+
+        except Exception as e:
+            return f"情绪分析失败: {str(e)}"
+
+    def _build(
+        self,
+        audio_path: str,
+        text: str,
+        conversation_history: str
+    ) -> Tuple[str, List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        构建请求：有音频时使用 OMNI_LLM_MODEL，否则使用 TEXT_LLM_MODEL
+
+        Returns:
+            (模型, 消息内容, 音频传输信息)
+        """
+        message_content = [{"type": "text", "text": build_prompt(text, conversation_history)}]
+        if not (audio_path and os.path.exists(audio_path)):
+            return config.TEXT_LLM_MODEL, message_content, None
+
+        model = config.OMNI_LLM_MODEL
+        item, audio_info = audio_content(audio_path, model)
+        message_content.append(item)
+        return model, message_content, audio_info
 
+    def _should_retry(self, error: BadRequestError, model: str, audio_info: Optional[Dict[str, Any]]) -> bool:
+        """上游拒绝原样发送的音频格式时，记住该组合并转换后重试一次"""
+        if audio_info is None or audio_info["converted"] or not is_format_error(error):
+            return False
+        reject_format(model, audio_info["format"])
+        return True
@@ -0,0 +1,374 @@
+"""
+上传文件生命周期管理 - 为 UPLOAD_DIR 提供容量配额、TTL 过期和 LRU 淘汰
+"""
+import asyncio
+import glob
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from shared_state import FileLock, is_shared, pid_alive
+
+logger = logging.getLogger(__name__)
+
+# 多 worker 模式下的标记文件：<前缀><pid>-<文件名>，所属进程退出后失效
+_PIN = ".pin-"          # 正在被分析引用
+_PENDING = ".pending-"  # 已上传、尚未被分析
+
+
+class UploadMissing(FileNotFoundError):
+    """要引用的上传文件不存在（未上传或已被清理）"""
+
+
+@dataclass
+class _UploadEntry:
+    """单个上传文件的记录"""
+    size: int
+    created_at: float
+    last_access: float
+    pending: bool = False  # 已上传但尚未被分析
+
+
+class UploadStore:
+    """
+    上传目录管理器
+
+    - 按最近访问时间维护 LRU 顺序（上传和 analyze_emotion 读取时更新）
+    - 超过 TTL 未被访问的文件会被删除
+    - 总大小超过配额时，从最久未访问的文件开始淘汰
+    - 被进行中的分析任务引用（pin）的文件永远不会被删除
+    - 已上传但尚未被分析的文件不参与配额淘汰，只会在 TTL 到期后删除
+    - 清理在后台执行，不占用请求路径
+
+    多 worker 模式下各 worker 通过上传目录本身共享状态：
+    - 只有持有 .sweeper.lock 的一个 worker 执行清理，清理前重新扫描目录，以文件修改时间作为最近访问时间
+    - 访问文件时更新其修改时间，其他 worker 能看到
+    - 引用中的文件在目录中留有 .pin-<pid>-<文件名> 标记，尚未分析的文件留有 .pending-<pid>-<文件名> 标记
+      （上传时写入，任一 worker 分析后删除），所属进程退出后标记失效
+    """
+
+    def __init__(
+        self,
+        upload_dir: Optional[str] = None,
+        max_total_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        sweep_interval: Optional[float] = None,
+        shared: Optional[bool] = None
+    ):
+        """
+        初始化上传目录管理器
+
+        Args:
+            upload_dir: 上传目录，默认使用配置中的目录
+            max_total_bytes: 上传目录总大小配额（字节）
+            ttl_seconds: 文件最后一次访问后的保留时间（秒）
+            sweep_interval: 后台清理的间隔（秒）
+            shared: 是否与其他 worker 共享上传目录，默认在多 worker 模式下启用
+        """
+        from config import config
+        self.upload_dir = Path(upload_dir or config.UPLOAD_DIR).resolve()
+        self.max_total_bytes = max_total_bytes if max_total_bytes is not None else config.UPLOAD_MAX_TOTAL_BYTES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else config.UPLOAD_TTL_SECONDS
+        self.sweep_interval = sweep_interval if sweep_interval is not None else config.UPLOAD_SWEEP_INTERVAL
+        self.shared = shared if shared is not None else is_shared()
+        self._sweeper_lock = FileLock(str(self.upload_dir / ".sweeper.lock")) if self.shared else None
+
+        self._entries: "OrderedDict[str, _UploadEntry]" = OrderedDict()
+        self._pins: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self._evicted_ttl = 0
+        self._evicted_quota = 0
+        self._evicted_bytes = 0
+        self._last_sweep: Optional[float] = None
+
+    def _key(self, path: str) -> Optional[str]:
+        """将路径规范化为 key，不在上传目录中的文件不做管理"""
+        resolved = Path(path).resolve()
+        if resolved.parent != self.upload_dir:
+            return None
+        return resolved.name
+
+    def scan(self):
+        """
+        扫描上传目录，纳入已有文件（以修改时间作为最近访问时间）
+
+        多 worker 模式下未分析标记以目录中的 .pending-* 标记为准（文件可能由其他 worker 上传或分析）
+        """
+        pending_keys = self._live_markers(_PENDING) if self.shared else None
+        entries = []
+        for item in self.upload_dir.iterdir():
+            if not item.is_file() or item.name.startswith('.'):
+                continue
+            stat = item.stat()
+            entries.append((stat.st_mtime, item.name, stat.st_size))
+
+        with self._lock:
+            # 重新扫描时保留本进程已知的状态（未分析标记、更晚的访问时间）
+            known = self._entries
+            self._entries = OrderedDict()
+            self._total_bytes = 0
+            for mtime, name, size in sorted(entries):
+                old = known.get(name)
+                self._entries[name] = _UploadEntry(
+                    size=size,
+                    created_at=old.created_at if old else mtime,
+                    last_access=max(mtime, old.last_access) if old else mtime,
+                    pending=name in pending_keys if pending_keys is not None else bool(old and old.pending)
+                )
+                self._total_bytes += size
+
+        # 多 worker 模式下每次清理前都会扫描，只在调试日志中输出
+        (logger.debug if self.shared else logger.info)(
+            f"上传目录扫描完成: {len(entries)} 个文件, 共 {self._total_bytes} 字节"
+        )
+
+    def register(self, path: str, size: int):
+        """记录新上传的文件"""
+        key = self._key(path)
+        if key is None:
+            return
+        now = time.time()
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._total_bytes -= old.size
+            self._entries[key] = _UploadEntry(size=size, created_at=now, last_access=now, pending=True)
+            self._total_bytes += size
+            over_quota = self._total_bytes > self.max_total_bytes
+        if self.shared:
+            self._marker(_PENDING, key).touch()
+
+        if over_quota:
+            self._request_sweep()
+
+    def touch(self, path: str):
+        """更新文件的最近访问时间（pinned 引用文件时调用），配额淘汰按最近使用的先后进行"""
+        key = self._key(path)
+        if key is None:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                entry.last_access = time.time()
+                self._entries.move_to_end(key)
+        if self.shared:
+            self._utime(key)
+
+    def _utime(self, key: str):
+        try:
+            os.utime(self.upload_dir / key)
+        except OSError:
+            pass
+
+    def _marker(self, prefix: str, key: str) -> Path:
+        return self.upload_dir / f"{prefix}{os.getpid()}-{key}"
+
+    def _markers(self, prefix: str, key: str = "*"):
+        """[(标记路径, pid, 文件名), ...]，key 为 * 时列出该前缀的全部标记"""
+        pattern = f"{prefix}*-{key if key == '*' else glob.escape(key)}"
+        for marker in self.upload_dir.glob(pattern):
+            pid, _, name = marker.name[len(prefix):].partition("-")
+            if key == "*" or name == key:
+                yield marker, pid, name
+
+    def _live_markers(self, prefix: str) -> Set[str]:
+        """带有存活标记的文件（顺带清理已退出进程留下的标记）"""
+        keys = set()
+        for marker, pid, name in self._markers(prefix):
+            if pid.isdigit() and pid_alive(int(pid)):
+                keys.add(name)
+            else:
+                marker.unlink(missing_ok=True)
+        return keys
+
+    def _has_live_marker(self, prefix: str, key: str) -> bool:
+        return any(pid.isdigit() and pid_alive(int(pid)) for _, pid, _ in self._markers(prefix, key))
+
+    def _clear_markers(self, prefix: str, key: str):
+        for marker, _, _ in self._markers(prefix, key):
+            marker.unlink(missing_ok=True)
+
+    @contextmanager
+    def pinned(self, path: Optional[str]):
+        """
+        在上下文内引用文件，期间不会被淘汰；退出时文件不再算作未分析
+
+        先登记引用再检查文件是否存在：检查通过后清理不会再删除该文件
+
+        Raises:
+            UploadMissing: 文件不存在
+        """
+        key = self._key(path) if path else None
+        if key is None:
+            if path and not os.path.exists(path):
+                raise UploadMissing(path)
+            yield
+            return
+        with self._lock:
+            self._pins[key] = self._pins.get(key, 0) + 1
+            first_pin = self._pins[key] == 1
+        if self.shared and first_pin:
+            self._marker(_PIN, key).touch()
+        try:
+            if not (self.upload_dir / key).exists():
+                raise UploadMissing(path)
+            self.touch(path)
+            yield
+        finally:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry:
+                    entry.pending = False
+                self._pins[key] -= 1
+                last_unpin = self._pins[key] <= 0
+                if last_unpin:
+                    del self._pins[key]
+            if self.shared:
+                if last_unpin:
+                    self._marker(_PIN, key).unlink(missing_ok=True)
+                self._clear_markers(_PENDING, key)
+
+    def sweep(self) -> Dict[str, int]:
+        """
+        执行一次清理：先删除过期文件，再按 LRU 淘汰直到满足配额
+
+        Returns:
+            本次清理的统计
+        """
+        shared_pins: Set[str] = set()
+        if self.shared:
+            # 其他 worker 上传、访问和分析的文件只体现在目录中
+            self.scan()
+            shared_pins = self._live_markers(_PIN)
+
+        now = time.time()
+        victims = []
+        with self._lock:
+            # 按 LRU 顺序（最久未访问在前）挑选待删除文件
+            projected = self._total_bytes
+            for key, entry in self._entries.items():
+                if key in self._pins or key in shared_pins:
+                    continue
+                if now - entry.last_access > self.ttl_seconds:
+                    victims.append((key, entry.size, "ttl"))
+                    projected -= entry.size
+                elif projected > self.max_total_bytes and not entry.pending:
+                    victims.append((key, entry.size, "quota"))
+                    projected -= entry.size
+            self._last_sweep = now
+
+        removed = {"ttl": 0, "quota": 0, "bytes": 0}
+        for key, size, reason in victims:
+            # 挑选之后才被引用的文件不删除；本进程内 pinned() 在锁内登记引用，与这里的检查和删除不会交错
+            with self._lock:
+                if key in self._pins or (self.shared and self._has_live_marker(_PIN, key)):
+                    continue
+                try:
+                    os.remove(self.upload_dir / key)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"删除上传文件失败: {key}, {e}")
+                    continue
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._total_bytes -= entry.size
+            if self.shared:
+                self._clear_markers(_PENDING, key)
+            removed[reason] += 1
+            removed["bytes"] += size
+
+        with self._lock:
+            self._evicted_ttl += removed["ttl"]
+            self._evicted_quota += removed["quota"]
+            self._evicted_bytes += removed["bytes"]
+
+        if victims:
+            logger.info(f"上传目录清理: 过期 {removed['ttl']} 个, 超配额淘汰 {removed['quota']} 个, "
+                        f"释放 {removed['bytes']} 字节")
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取上传目录使用情况"""
+        if self.shared:
+            self.scan()
+        with self._lock:
+            oldest = next(iter(self._entries.values()), None)
+            return {
+                "file_count": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_total_bytes": self.max_total_bytes,
+                "usage_ratio": round(self._total_bytes / self.max_total_bytes, 4) if self.max_total_bytes else 0,
+                "ttl_seconds": self.ttl_seconds,
+                "pinned_files": len(self._pins),
+                "pending_files": sum(1 for e in self._entries.values() if e.pending),
+                "oldest_access_age_seconds": round(time.time() - oldest.last_access, 1) if oldest else 0,
+                "evicted_ttl": self._evicted_ttl,
+                "evicted_quota": self._evicted_quota,
+                "evicted_bytes": self._evicted_bytes,
+                "last_sweep": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self._last_sweep))
+                if self._last_sweep else None,
+                # 多 worker 模式下清理统计只由执行清理的 worker 记录
+                "sweeper": self._sweeper_lock.held if self.shared else True
+            }
+
+    def _request_sweep(self):
+        """超过配额时提前唤醒后台清理"""
+        if self._wakeup is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _sweep_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.sweep_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            # 多 worker 模式下只有持有锁的 worker 清理，其他 worker 每个周期尝试接管
+            if self.shared and not self._sweeper_lock.try_acquire():
+                continue
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                logger.error(f"上传目录清理失败: {e}", exc_info=True)
+
+    def start(self):
+        """启动后台清理任务（需在事件循环中调用）"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._sweep_loop())
+        self._wakeup.set()
+
+    async def stop(self):
+        """停止后台清理任务"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._sweeper_lock is not None:
+            self._sweeper_lock.release()
+
+
+# 全局上传目录管理器实例
+_upload_store: Optional[UploadStore] = None
+
+def get_upload_store() -> UploadStore:
+    """获取全局上传目录管理器实例"""
+    global _upload_store
+    if _upload_store is None:
+        _upload_store = UploadStore()
+    return _upload_store
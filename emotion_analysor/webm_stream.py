@@ -0,0 +1,256 @@
+"""
+WebM 流解析 - 把 MediaRecorder 的分片按 EBML 元素边界切分
+
+MediaRecorder 的 timeslice 分片只是按时间截断的字节流，分片边界可能落在任意元素中间。
+这里增量解析字节流：开头到第一个 Cluster 之前的部分是初始化段（EBML 头、Segment 头、
+Info、Tracks），之后逐个取出 Cluster 中的完整音频块（SimpleBlock / BlockGroup）。
+
+每个块附带所属 Cluster 的前缀（Cluster ID + 未知大小 + Timecode）。块内时间戳相对于
+Cluster 的 Timecode，因此“初始化段 + 若干组（前缀 + 连续的块）”总是一个可以独立解码的
+WebM 文件，可以在任意块边界截取窗口。
+
+客户端在网络拥塞时会丢弃分片，之后的字节无法接续：客户端随后发送的 gap 通知会让解析器丢弃
+未完成的元素并跳到下一个 Cluster 开头（skip_to_next_cluster）；没有通知时，遇到无法解析的字节
+也会同样处理，但丢失处恰好拼出形式合法的块时无法察觉。
+"""
+import logging
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EBML_ID = 0x1A45DFA3
+SEGMENT_ID = 0x18538067
+CLUSTER_ID = 0x1F43B675
+
+# Segment 的直接子元素（遇到它们时，未知大小的 Cluster 结束）
+_TOP_LEVEL_IDS = {
+    0x114D9B74,  # SeekHead
+    0x1549A966,  # Info
+    0x1654AE6B,  # Tracks
+    0x1C53BB6B,  # Cues
+    0x1941A469,  # Attachments
+    0x1043A770,  # Chapters
+    0x1254C367,  # Tags
+    CLUSTER_ID,
+}
+_VOID_ID = 0xEC
+
+_TIMECODE_ID = 0xE7
+_BLOCK_IDS = {0xA3, 0xA0}  # SimpleBlock, BlockGroup
+# Cluster 的其他子元素（Position、PrevSize、CRC-32、Void、SilentTracks），解析后丢弃
+_SKIPPED_CHILD_IDS = {0xA7, 0xAB, 0xBF, _VOID_ID, 0x5854}
+
+# 单个元素的大小上限，超出说明字节流已经错位
+_MAX_ELEMENT_BYTES = 1024 * 1024
+
+_CLUSTER_MARKER = CLUSTER_ID.to_bytes(4, "big")
+# 8 字节的“未知大小”：改写后的 Cluster 只保留部分块，不能沿用原来的大小
+_UNKNOWN_SIZE = b"\x01\xff\xff\xff\xff\xff\xff\xff"
+
+
+def _vint_length(buf: bytearray, pos: int) -> Optional[int]:
+    """EBML 变长整数的字节数；数据不足时返回 None"""
+    if pos >= len(buf):
+        return None
+    first = buf[pos]
+    if first == 0:
+        raise ValueError("无效的 EBML 变长整数")
+    length = 9 - first.bit_length()
+    if pos + length > len(buf):
+        return None
+    return length
+
+
+def read_element_header(buf: bytearray, pos: int = 0) -> Optional[Tuple[int, Optional[int], int]]:
+    """
+    读取元素头
+
+    Args:
+        buf: 字节缓冲
+        pos: 元素开始位置
+
+    Returns:
+        (元素 ID, 内容大小（未知大小为 None）, 元素头长度)，数据不足时返回 None
+
+    Raises:
+        ValueError: 字节不构成合法的元素头
+    """
+    id_length = _vint_length(buf, pos)
+    if id_length is None:
+        return None
+    if id_length > 4:
+        raise ValueError("无效的 EBML 元素 ID")
+    size_length = _vint_length(buf, pos + id_length)
+    if size_length is None:
+        return None
+
+    element_id = int.from_bytes(buf[pos:pos + id_length], "big")
+    raw = int.from_bytes(buf[pos + id_length:pos + id_length + size_length], "big")
+    mask = (1 << (7 * size_length)) - 1
+    size = raw & mask
+    return element_id, (None if size == mask else size), id_length + size_length
+
+
+class WebMStreamParser:
+    """增量解析 MediaRecorder 产生的 WebM 字节流"""
+
+    def __init__(self, max_init_bytes: int = 1024 * 1024):
+        """
+        Args:
+            max_init_bytes: 初始化段的大小上限，超出仍未找到 Cluster 时认为不是 WebM 流
+        """
+        self.max_init_bytes = max_init_bytes
+        self.init_segment: Optional[bytes] = None
+        self._buf = bytearray()
+        self._in_cluster = False
+        self._cluster_remaining: Optional[int] = None  # 已知大小的 Cluster 还剩多少字节
+        self._cluster_prefix: Optional[bytes] = None
+        self._seeking = False  # 丢弃数据直到下一个 Cluster 开头
+
+    def skip_to_next_cluster(self):
+        """字节流中间丢失了数据：丢弃未完成的元素，之后的数据从下一个 Cluster 开始解析"""
+        if self.init_segment is None:
+            return
+        self._buf.clear()
+        self._in_cluster = False
+        self._cluster_prefix = None
+        self._seeking = True
+
+    def feed(self, data: bytes) -> List[Tuple[bytes, bytes]]:
+        """
+        追加一个分片
+
+        Returns:
+            新解析出的完整音频块 [(所属 Cluster 的前缀, 块)]，同一 Cluster 的块共享同一个前缀对象
+
+        Raises:
+            ValueError: 字节流不是 WebM
+        """
+        self._buf += data
+        if self.init_segment is None and not self._parse_init():
+            return []
+        return self._parse_clusters()
+
+    def _parse_init(self) -> bool:
+        """解析初始化段，完整收到时返回 True"""
+        buf = self._buf
+        header = read_element_header(buf)
+        if header is None:
+            return False
+        element_id, size, header_length = header
+        if element_id != EBML_ID or size is None:
+            raise ValueError("不是 WebM 流")
+        pos = header_length + size
+
+        header = read_element_header(buf, pos)
+        if header is None:
+            return self._check_init_size()
+        if header[0] != SEGMENT_ID:
+            raise ValueError("WebM 流缺少 Segment")
+        pos += header[2]
+
+        while True:
+            header = read_element_header(buf, pos)
+            if header is None:
+                return self._check_init_size()
+            element_id, size, header_length = header
+            if element_id == CLUSTER_ID:
+                self.init_segment = bytes(buf[:pos])
+                del buf[:pos]
+                return True
+            if (element_id not in _TOP_LEVEL_IDS and element_id != _VOID_ID) or size is None:
+                raise ValueError("无法解析的 WebM 初始化段")
+            pos += header_length + size
+
+    def _check_init_size(self) -> bool:
+        if len(self._buf) > self.max_init_bytes:
+            raise ValueError("WebM 初始化段过大")
+        return False
+
+    def _parse_clusters(self) -> List[Tuple[bytes, bytes]]:
+        buf = self._buf
+        blocks = []
+        if self._seeking:
+            index = buf.find(_CLUSTER_MARKER)
+            if index < 0:
+                # 保留末尾 3 字节，Cluster ID 可能被分片边界截断
+                del buf[:-3]
+                return blocks
+            del buf[:index]
+            self._seeking = False
+        while buf:
+            try:
+                header = read_element_header(buf)
+            except ValueError:
+                self._resync()
+                continue
+            if header is None:
+                break
+            element_id, size, header_length = header
+
+            if not self._in_cluster or element_id in _TOP_LEVEL_IDS:
+                if element_id == CLUSTER_ID:
+                    self._in_cluster = True
+                    self._cluster_remaining = size
+                    self._cluster_prefix = None
+                    del buf[:header_length]
+                elif (element_id in _TOP_LEVEL_IDS or element_id == _VOID_ID) \
+                        and size is not None and size <= _MAX_ELEMENT_BYTES:
+                    # 流末尾的 Cues / Tags 等，与音频无关
+                    if len(buf) < header_length + size:
+                        break
+                    self._in_cluster = False
+                    del buf[:header_length + size]
+                else:
+                    self._resync()
+                continue
+
+            if (element_id not in _BLOCK_IDS and element_id != _TIMECODE_ID
+                    and element_id not in _SKIPPED_CHILD_IDS) or size is None or size > _MAX_ELEMENT_BYTES:
+                self._resync()
+                continue
+            total = header_length + size
+            if len(buf) < total:
+                break
+            element = bytes(buf[:total])
+            del buf[:total]
+
+            if element_id == _TIMECODE_ID:
+                self._cluster_prefix = _CLUSTER_MARKER + _UNKNOWN_SIZE + element
+            elif element_id in _BLOCK_IDS and self._cluster_prefix is not None:
+                blocks.append((self._cluster_prefix, element))
+            if self._cluster_remaining is not None:
+                self._cluster_remaining -= total
+                if self._cluster_remaining <= 0:
+                    self._in_cluster = False
+        return blocks
+
+    def _resync(self):
+        """字节流错位（通常是客户端丢弃了分片）：跳到下一个 Cluster 开头"""
+        buf = self._buf
+        index = buf.find(_CLUSTER_MARKER, 1)
+        if index < 0:
+            # 保留末尾 3 字节，Cluster ID 可能被分片边界截断
+            index = max(len(buf) - 3, 1)
+        logger.debug(f"WebM 流错位，跳过 {index} 字节")
+        del buf[:index]
+        self._in_cluster = False
+        self._cluster_prefix = None
+
+
+def build_webm(init_segment: bytes, blocks) -> bytes:
+    """
+    拼接可独立解码的 WebM 文件
+
+    Args:
+        init_segment: 初始化段
+        blocks: 按时间顺序的 [(所属 Cluster 的前缀, 块)]，属于同一 Cluster 的连续块只写一次前缀
+    """
+    parts = [init_segment]
+    prefix = None
+    for block_prefix, block in blocks:
+        if block_prefix is not prefix:
+            prefix = block_prefix
+            parts.append(prefix)
+        parts.append(block)
+    return b"".join(parts)
@@ -0,0 +1,357 @@
+"""
+本地模拟上游服务 - 兼容 OpenAI 接口的假 Provider
+
+用于在不消耗 DashScope / DeepSeek / Whisper 配额的情况下压测两个服务：
+- POST /v1/chat/completions      （流式 / 非流式，文本 / input_audio）
+- POST /v1/audio/transcriptions  （verbose_json，带 segments）
+
+同时注册了不带 /v1 前缀的路由，以兼容 base_url 写法不同的客户端。
+
+使用方式：
+    python fake_provider.py --port 9000 --latency-dist lognormal --latency-ms 800 --error-rate 0.01
+
+然后把被测服务的上游地址指向它：
+    DASHSCOPE_API_BASE=http://127.0.0.1:9000/v1
+    DEEPSEEK_API_BASE=http://127.0.0.1:9000/v1
+    WHISPER_API_BASE=http://127.0.0.1:9000/v1
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import random
+import time
+import uuid
+import wave
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+# 默认的预置输出：按提示词中的关键词匹配，第一个命中的生效
+DEFAULT_CANNED_OUTPUTS: List[Dict[str, str]] = [
+    {
+        "match": "情绪",
+        "content": json.dumps({
+            "emotions": [
+                {"emotion": "开心", "confidence": 0.9, "reason": "文本中包含积极的表达"},
+                {"emotion": "兴奋", "confidence": 0.6, "reason": "语气较为强烈"}
+            ],
+            "primary_emotion": "开心"
+        }, ensure_ascii=False)
+    },
+    {
+        "match": "会议纪要",
+        "content": (
+            "## 会议概览\n产品规划会议\n\n"
+            "## 主要讨论点\n- 移动端功能规划\n\n"
+            "## 关键决策\n1. 优先开发移动端\n\n"
+            "## 行动项\n| 任务 | 负责人 | 截止日期 |\n|---|---|---|\n| 架构设计 | 李四 | 下周五 |\n\n"
+            "## 下一步计划\n按排期推进\n\n"
+            "## 其他重要信息\n无"
+        )
+    },
+    {
+        "match": "依次回答多个问题",
+        "content": (
+            "【回答 1】李四负责移动端架构设计。\n"
+            "【回答 2】截止时间是下周五。\n"
+            "【回答 3】会议决定优先开发移动端。"
+        )
+    },
+    {
+        "match": "问题",
+        "content": "根据会议内容，李四负责移动端架构设计，下周五前完成。"
+    },
+    {
+        "match": "",
+        "content": "张三：大家好，今天我们主要讨论下一季度的产品路线图。"
+    }
+]
+
+DEFAULT_TRANSCRIPT_SEGMENTS: List[Dict[str, Any]] = [
+    {"start": 0.0, "end": 4.2, "text": "各位同事大家好，现在开始我们的产品规划会议。"},
+    {"start": 4.2, "end": 9.8, "text": "今天我们主要讨论下一季度的产品路线图。"},
+    {"start": 9.8, "end": 15.5, "text": "行动项：李四负责移动端架构设计，下周五前完成。"}
+]
+
+
+@dataclass
+class ProviderSettings:
+    """模拟上游的行为配置"""
+    latency_dist: str = "fixed"          # fixed / uniform / normal / lognormal
+    latency_ms: float = 300.0            # 均值（或 fixed 时的固定值）
+    latency_spread_ms: float = 100.0     # uniform 半宽 / normal 标准差
+    latency_sigma: float = 0.5           # lognormal 的 sigma
+    audio_latency_factor: float = 2.0    # 含 input_audio 的请求额外放大的倍数
+    transcription_latency_ms: float = 1500.0
+    transcription_ms_per_audio_second: float = 0.0  # 按上传音频时长追加的转写延迟（模拟 Whisper 耗时随时长增长）
+    error_rate: float = 0.0
+    error_status: int = 500
+    stream_chunk_chars: int = 8
+    stream_chunk_delay_ms: float = 20.0
+    canned_outputs: List[Dict[str, str]] = field(default_factory=lambda: list(DEFAULT_CANNED_OUTPUTS))
+    transcript_segments: List[Dict[str, Any]] = field(default_factory=lambda: list(DEFAULT_TRANSCRIPT_SEGMENTS))
+
+    def sample_latency(self, base_ms: Optional[float] = None) -> float:
+        """按配置的分布采样一次延迟（秒）"""
+        mean = self.latency_ms if base_ms is None else base_ms
+        if self.latency_dist == "uniform":
+            value = random.uniform(mean - self.latency_spread_ms, mean + self.latency_spread_ms)
+        elif self.latency_dist == "normal":
+            value = random.gauss(mean, self.latency_spread_ms)
+        elif self.latency_dist == "lognormal":
+            # 以 mean 作为中位数
+            value = mean * random.lognormvariate(0.0, self.latency_sigma)
+        else:
+            value = mean
+        return max(value, 0.0) / 1000.0
+
+
+class ProviderStats:
+    """模拟上游收到的请求计数"""
+
+    def __init__(self):
+        self.chat_requests = 0
+        self.audio_chat_requests = 0
+        self.stream_requests = 0
+        self.transcription_requests = 0
+        self.injected_errors = 0
+        self.bytes_received = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+def _has_audio(messages: List[Dict[str, Any]]) -> bool:
+    """判断消息中是否带有 input_audio 内容"""
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "input_audio":
+                    return True
+    return False
+
+
+def _prompt_text(messages: List[Dict[str, Any]]) -> str:
+    """拼接消息中的所有文本部分，用于匹配预置输出"""
+    texts = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            texts.append(content)
+        elif isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "text":
+                    texts.append(part.get("text", ""))
+    return "\n".join(texts)
+
+
+def _pick_canned(settings: ProviderSettings, prompt: str) -> str:
+    for item in settings.canned_outputs:
+        if item.get("match", "") in prompt:
+            return item["content"]
+    return ""
+
+
+def _audio_seconds(data: bytes) -> float:
+    """上传音频的时长：WAV 读取文件头，其他格式按 16kHz 16-bit 单声道估算"""
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except (wave.Error, EOFError):
+        return len(data) / 32000.0
+
+
+def _error_response(settings: ProviderSettings) -> JSONResponse:
+    return JSONResponse(
+        status_code=settings.error_status,
+        content={"error": {"message": "fake provider injected error", "type": "server_error"}}
+    )
+
+
+def create_app(settings: Optional[ProviderSettings] = None) -> FastAPI:
+    """创建模拟上游应用"""
+    settings = settings or ProviderSettings()
+    stats = ProviderStats()
+    app = FastAPI(title="Fake OpenAI-compatible Provider")
+    app.state.settings = settings
+    app.state.stats = stats
+
+    async def chat_completions(request: Request):
+        body = await request.body()
+        stats.chat_requests += 1
+        stats.bytes_received += len(body)
+        payload = json.loads(body or b"{}")
+        messages = payload.get("messages", [])
+        model = payload.get("model", "fake-model")
+        with_audio = _has_audio(messages)
+        if with_audio:
+            stats.audio_chat_requests += 1
+
+        latency = settings.sample_latency()
+        if with_audio:
+            latency *= settings.audio_latency_factor
+        await asyncio.sleep(latency)
+
+        if random.random() < settings.error_rate:
+            stats.injected_errors += 1
+            return _error_response(settings)
+
+        prompt = _prompt_text(messages)
+        content = _pick_canned(settings, prompt)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": len(prompt),
+            "completion_tokens": len(content),
+            "total_tokens": len(prompt) + len(content)
+        }
+
+        if payload.get("stream"):
+            stats.stream_requests += 1
+
+            async def event_stream():
+                step = max(settings.stream_chunk_chars, 1)
+                for i in range(0, len(content), step):
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"content": content[i:i + step]},
+                            "finish_reason": None
+                        }]
+                    }
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                    await asyncio.sleep(settings.stream_chunk_delay_ms / 1000.0)
+                final = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    "usage": usage
+                }
+                yield f"data: {json.dumps(final, ensure_ascii=False)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        }
+
+    async def audio_transcriptions(request: Request):
+        form = await request.form()
+        stats.transcription_requests += 1
+        upload = form.get("file")
+        audio_seconds = 0.0
+        if upload is not None and hasattr(upload, "read"):
+            data = await upload.read()
+            stats.bytes_received += len(data)
+            audio_seconds = _audio_seconds(data)
+
+        latency = settings.sample_latency(settings.transcription_latency_ms)
+        latency += audio_seconds * settings.transcription_ms_per_audio_second / 1000.0
+        await asyncio.sleep(latency)
+
+        if random.random() < settings.error_rate:
+            stats.injected_errors += 1
+            return _error_response(settings)
+
+        segments = [
+            {"id": i, "seek": 0, "start": s["start"], "end": s["end"], "text": s["text"]}
+            for i, s in enumerate(settings.transcript_segments)
+        ]
+        text = "".join(s["text"] for s in segments)
+        if form.get("response_format", "json") != "verbose_json":
+            return {"text": text}
+        return {
+            "task": "transcribe",
+            "language": form.get("language") or "zh",
+            "duration": segments[-1]["end"] if segments else 0.0,
+            "text": text,
+            "segments": segments
+        }
+
+    async def provider_stats():
+        return stats.to_dict()
+
+    for prefix in ("", "/v1"):
+        app.add_api_route(f"{prefix}/chat/completions", chat_completions, methods=["POST"])
+        app.add_api_route(f"{prefix}/audio/transcriptions", audio_transcriptions, methods=["POST"])
+    app.add_api_route("/_stats", provider_stats, methods=["GET"])
+
+    return app
+
+
+def main():
+    """启动模拟上游"""
+    parser = argparse.ArgumentParser(description="本地模拟 OpenAI 兼容上游")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-dist", default="fixed", choices=["fixed", "uniform", "normal", "lognormal"])
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="chat 请求的延迟均值/中位数（毫秒）")
+    parser.add_argument("--latency-spread-ms", type=float, default=100.0, help="uniform 半宽或 normal 标准差")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="lognormal 的 sigma")
+    parser.add_argument("--audio-latency-factor", type=float, default=2.0, help="含音频请求的延迟倍数")
+    parser.add_argument("--transcription-latency-ms", type=float, default=1500.0)
+    parser.add_argument("--transcription-ms-per-audio-second", type=float, default=0.0,
+                        help="每秒上传音频追加的转写延迟（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入错误的比例 (0-1)")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--stream-chunk-chars", type=int, default=8)
+    parser.add_argument("--stream-chunk-delay-ms", type=float, default=20.0)
+    parser.add_argument("--canned", default=None,
+                        help="预置输出 JSON 文件：{\"chat\": [{\"match\": ..., \"content\": ...}], \"segments\": [...]}")
+    args = parser.parse_args()
+
+    settings = ProviderSettings(
+        latency_dist=args.latency_dist,
+        latency_ms=args.latency_ms,
+        latency_spread_ms=args.latency_spread_ms,
+        latency_sigma=args.latency_sigma,
+        audio_latency_factor=args.audio_latency_factor,
+        transcription_latency_ms=args.transcription_latency_ms,
+        transcription_ms_per_audio_second=args.transcription_ms_per_audio_second,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        stream_chunk_chars=args.stream_chunk_chars,
+        stream_chunk_delay_ms=args.stream_chunk_delay_ms,
+    )
+    if args.canned:
+        with open(args.canned, 'r', encoding='utf-8') as f:
+            canned = json.load(f)
+        settings.canned_outputs = canned.get("chat", settings.canned_outputs)
+        settings.transcript_segments = canned.get("segments", settings.transcript_segments)
+
+    logger.info(f"模拟上游启动: http://{args.host}:{args.port}/v1 ({settings.latency_dist}, {settings.latency_ms}ms, "
+                f"错误率 {settings.error_rate:.1%})")
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+异步压测驱动 - 按目标 RPS 驱动被测服务的各个端点
+
+以开环方式（按固定间隔发起请求，不等待上一个完成）驱动场景，
+统计吞吐、延迟分位数、错误率，并采样被测进程的 RSS。
+
+使用方式：
+    # 先启动模拟上游和被测服务（上游地址指向 fake_provider）
+    python load_generator.py --target emotion --base-url https://127.0.0.1:8000 --insecure \\
+        --rps 20 --duration 60 --server-pid 12345
+
+    # 只跑指定场景
+    python load_generator.py --target meeting --base-url http://127.0.0.1:8000 \\
+        --scenario meeting_summary --scenario meeting_qa --rps 5
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+from scenarios import SCENARIOS, Scenario, scenarios_for
+
+
+@dataclass
+class ScenarioStats:
+    """单个场景的统计数据"""
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return len(self.latencies) + sum(self.errors.values())
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(p / 100.0 * len(ordered)) - 1))
+        return ordered[index]
+
+    def to_dict(self, elapsed: float) -> Dict:
+        return {
+            "requests": self.total,
+            "success": len(self.latencies),
+            "errors": self.error_count,
+            "error_rate": round(self.error_count / self.total, 4) if self.total else 0.0,
+            "throughput_rps": round(len(self.latencies) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(self.percentile(50) * 1000, 1),
+                "p90": round(self.percentile(90) * 1000, 1),
+                "p99": round(self.percentile(99) * 1000, 1),
+                "max": round(max(self.latencies) * 1000, 1) if self.latencies else 0.0,
+                "mean": round(sum(self.latencies) / len(self.latencies) * 1000, 1) if self.latencies else 0.0
+            },
+            "error_types": self.errors
+        }
+
+
+def read_rss_bytes(pid: int) -> Optional[int]:
+    """读取进程及其子进程（uvicorn workers / reload）的 RSS 总和"""
+    total = 0
+    pids = [pid]
+    children_path = f"/proc/{pid}/task/{pid}/children"
+    if os.path.exists(children_path):
+        with open(children_path) as f:
+            pids.extend(int(p) for p in f.read().split())
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except FileNotFoundError:
+            continue
+    return total or None
+
+
+async def sample_rss(pid: int, interval: float, samples: List[int], stop: asyncio.Event):
+    """周期性采样被测服务的 RSS"""
+    while not stop.is_set():
+        rss = read_rss_bytes(pid)
+        if rss is not None:
+            samples.append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _run_once(client: httpx.AsyncClient, scenario: Scenario, stats: ScenarioStats,
+                    semaphore: asyncio.Semaphore):
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            await scenario.run(client)
+            stats.latencies.append(time.perf_counter() - start)
+        except httpx.HTTPStatusError as e:
+            key = f"http_{e.response.status_code}"
+            stats.errors[key] = stats.errors.get(key, 0) + 1
+        except Exception as e:
+            key = type(e).__name__
+            stats.errors[key] = stats.errors.get(key, 0) + 1
+
+
+async def run_load(
+    base_url: str,
+    scenarios: List[Scenario],
+    rps: float,
+    duration: float,
+    max_in_flight: int = 1000,
+    timeout: float = 300.0,
+    verify: bool = True,
+    server_pid: Optional[int] = None
+) -> Dict:
+    """
+    以目标 RPS 轮流驱动各场景
+
+    Args:
+        base_url: 被测服务地址
+        scenarios: 要执行的场景列表（轮询分配）
+        rps: 目标每秒请求数（所有场景合计）
+        duration: 压测时长（秒）
+        max_in_flight: 同时在途的最大请求数，超过后发起会被阻塞
+        timeout: 单个请求的超时时间
+        verify: 是否校验 HTTPS 证书
+        server_pid: 被测服务进程号，用于采样 RSS
+
+    Returns:
+        压测报告
+    """
+    stats = {s.name: ScenarioStats(s.name) for s in scenarios}
+    semaphore = asyncio.Semaphore(max_in_flight)
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    rss_samples: List[int] = []
+    stop = asyncio.Event()
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, verify=verify, limits=limits) as client:
+        sampler = asyncio.create_task(sample_rss(server_pid, 1.0, rss_samples, stop)) if server_pid else None
+
+        tasks = []
+        interval = 1.0 / rps
+        start = time.perf_counter()
+        i = 0
+        while True:
+            scheduled = start + i * interval
+            if scheduled - start >= duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            scenario = scenarios[i % len(scenarios)]
+            tasks.append(asyncio.create_task(_run_once(client, scenario, stats[scenario.name], semaphore)))
+            i += 1
+
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        if sampler:
+            await sampler
+
+    report = {
+        "base_url": base_url,
+        "target_rps": rps,
+        "duration_seconds": round(elapsed, 2),
+        "scenarios": {name: s.to_dict(elapsed) for name, s in stats.items()},
+    }
+    total_ok = sum(len(s.latencies) for s in stats.values())
+    total_err = sum(s.error_count for s in stats.values())
+    report["overall"] = {
+        "requests": total_ok + total_err,
+        "throughput_rps": round(total_ok / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(total_err / (total_ok + total_err), 4) if total_ok + total_err else 0.0
+    }
+    if rss_samples:
+        report["server_rss_mb"] = {
+            "start": round(rss_samples[0] / 1024 / 1024, 1),
+            "end": round(rss_samples[-1] / 1024 / 1024, 1),
+            "peak": round(max(rss_samples) / 1024 / 1024, 1)
+        }
+    return report
+
+
+def print_report(report: Dict):
+    """以表格形式打印报告"""
+    print("\n" + "=" * 96)
+    print(f"  压测报告 - {report['base_url']}  目标 {report['target_rps']} RPS, 时长 {report['duration_seconds']}s")
+    print("=" * 96)
+    print(f"{'场景':<28}{'请求':>8}{'错误率':>9}{'吞吐/s':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    print("-" * 96)
+    for name, s in report["scenarios"].items():
+        lat = s["latency_ms"]
+        print(f"{name:<28}{s['requests']:>8}{s['error_rate']:>9.2%}{s['throughput_rps']:>9.2f}"
+              f"{lat['p50']:>10.1f}{lat['p90']:>10.1f}{lat['p99']:>10.1f}{lat['max']:>10.1f}")
+        if s["error_types"]:
+            print(f"{'':<28}错误类型: {s['error_types']}")
+    print("-" * 96)
+    overall = report["overall"]
+    print(f"总计: {overall['requests']} 请求, 吞吐 {overall['throughput_rps']}/s, 错误率 {overall['error_rate']:.2%}")
+    if "server_rss_mb" in report:
+        rss = report["server_rss_mb"]
+        print(f"服务端 RSS: 开始 {rss['start']} MB, 结束 {rss['end']} MB, 峰值 {rss['peak']} MB")
+    print("=" * 96 + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="异步压测驱动")
+    parser.add_argument("--target", choices=["emotion", "meeting"], required=True)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenario", action="append", default=None,
+                        help=f"要执行的场景，可多次指定。可选: {', '.join(SCENARIOS)}")
+    parser.add_argument("--rps", type=float, default=10.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--insecure", action="store_true", help="不校验 HTTPS 证书（自签名证书时使用）")
+    parser.add_argument("--server-pid", type=int, default=None, help="被测服务进程号，用于采样 RSS")
+    parser.add_argument("--output", default=None, help="将 JSON 报告写入文件")
+    args = parser.parse_args()
+
+    if args.scenario:
+        scenarios = [SCENARIOS[name] for name in args.scenario]
+    else:
+        scenarios = scenarios_for(args.target)
+
+    report = asyncio.run(run_load(
+        base_url=args.base_url,
+        scenarios=scenarios,
+        rps=args.rps,
+        duration=args.duration,
+        max_in_flight=args.max_in_flight,
+        timeout=args.timeout,
+        verify=not args.insecure,
+        server_pid=args.server_pid
+    ))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+压测场景 - 把 test_client.py 中的调用流程整理成可复用的异步场景
+
+每个场景接收一个 httpx.AsyncClient（base_url 已指向被测服务），
+执行一次完整的业务调用，非 2xx 响应会抛出异常并被计为错误。
+"""
+import io
+import math
+import os
+import struct
+import sys
+import wave
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+# 复用 meeting_assistant/test_client.py 中的测试会议内容
+_MEETING_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "meeting_assistant")
+if _MEETING_DIR not in sys.path:
+    sys.path.insert(0, _MEETING_DIR)
+from test_client import TEST_MEETING_CONTENT  # noqa: E402
+
+TEST_EMOTION_TEXT = "今天真的太开心了！工作进展顺利，还收到了好消息，感觉一切都很美好！"
+
+TEST_QUESTIONS = [
+    "会议的主要决策是什么？",
+    "移动端开发需要多长时间？",
+    "李四负责什么任务？"
+]
+
+
+@dataclass
+class Scenario:
+    """一个压测场景"""
+    name: str
+    target: str  # "emotion" 或 "meeting"
+    run: Callable[[httpx.AsyncClient], Awaitable[None]]
+
+
+def make_test_wav(duration: float = 3.0, sample_rate: int = 16000, frequency: float = 220.0) -> bytes:
+    """生成一段单声道 16bit 正弦波 WAV，用于音频场景"""
+    n_samples = int(duration * sample_rate)
+    frames = b"".join(
+        struct.pack('<h', int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate)))
+        for i in range(n_samples)
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(frames)
+    return buffer.getvalue()
+
+
+_TEST_WAV = make_test_wav()
+
+
+# ==================== emotion_analysor ====================
+
+async def emotion_health(client: httpx.AsyncClient):
+    response = await client.get("/health")
+    response.raise_for_status()
+
+
+async def emotion_text(client: httpx.AsyncClient):
+    response = await client.post("/api/emotion_detect", json={
+        "text": TEST_EMOTION_TEXT,
+        "conversation_history": [
+            {"role": "user", "content": "我今天升职了！"},
+            {"role": "assistant", "content": "恭喜你！这是个好消息！"}
+        ]
+    })
+    response.raise_for_status()
+    if not response.json().get("success"):
+        raise RuntimeError("emotion_detect 返回 success=false")
+
+
+async def emotion_audio(client: httpx.AsyncClient):
+    upload = await client.post(
+        "/api/upload_audio",
+        files={"file": ("loadtest.wav", _TEST_WAV, "audio/wav")}
+    )
+    upload.raise_for_status()
+    response = await client.post("/api/emotion_detect", json={
+        "text": TEST_EMOTION_TEXT,
+        "audio_url": upload.json()["file_path"],
+        "conversation_history": []
+    })
+    response.raise_for_status()
+    if not response.json().get("success"):
+        raise RuntimeError("emotion_detect 返回 success=false")
+
+
+async def emotion_statistics(client: httpx.AsyncClient):
+    response = await client.get("/api/statistics")
+    response.raise_for_status()
+
+
+async def emotion_logs(client: httpx.AsyncClient):
+    response = await client.get("/api/logs", params={"limit": 100})
+    response.raise_for_status()
+
+
+# ==================== meeting_assistant ====================
+
+async def meeting_health(client: httpx.AsyncClient):
+    response = await client.get("/health")
+    response.raise_for_status()
+
+
+async def meeting_transcribe_text(client: httpx.AsyncClient):
+    response = await client.post("/api/transcribe", data={
+        "text_content": TEST_MEETING_CONTENT,
+        "language": "zh"
+    })
+    response.raise_for_status()
+
+
+async def meeting_transcribe_audio(client: httpx.AsyncClient):
+    response = await client.post(
+        "/api/transcribe",
+        data={"language": "zh"},
+        files={"audio_file": ("loadtest.wav", _TEST_WAV, "audio/wav")}
+    )
+    response.raise_for_status()
+
+
+async def meeting_summary(client: httpx.AsyncClient):
+    response = await client.post("/api/summary", json={"transcription": TEST_MEETING_CONTENT})
+    response.raise_for_status()
+
+
+async def meeting_qa(client: httpx.AsyncClient):
+    for question in TEST_QUESTIONS:
+        response = await client.post("/api/qa", json={
+            "meeting_content": TEST_MEETING_CONTENT,
+            "question": question
+        })
+        response.raise_for_status()
+
+
+async def meeting_full(client: httpx.AsyncClient):
+    response = await client.post("/api/process-full", data={
+        "text_content": TEST_MEETING_CONTENT,
+        "language": "zh"
+    })
+    response.raise_for_status()
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    s.name: s for s in [
+        Scenario("emotion_health", "emotion", emotion_health),
+        Scenario("emotion_text", "emotion", emotion_text),
+        Scenario("emotion_audio", "emotion", emotion_audio),
+        Scenario("emotion_statistics", "emotion", emotion_statistics),
+        Scenario("emotion_logs", "emotion", emotion_logs),
+        Scenario("meeting_health", "meeting", meeting_health),
+        Scenario("meeting_transcribe_text", "meeting", meeting_transcribe_text),
+        Scenario("meeting_transcribe_audio", "meeting", meeting_transcribe_audio),
+        Scenario("meeting_summary", "meeting", meeting_summary),
+        Scenario("meeting_qa", "meeting", meeting_qa),
+        Scenario("meeting_full", "meeting", meeting_full),
+    ]
+}
+
+
+def scenarios_for(target: str) -> List[Scenario]:
+    """返回某个服务的全部场景"""
+    return [s for s in SCENARIOS.values() if s.target == target]
@@ -1,13 +1,18 @@
 """
 Agents模块
 """
-from .transcription_agent import create_transcription_agent
-from .summary_agent import create_summary_agent
-from .qa_agent import create_qa_agent
+from .base import AgentSpec
+from .transcription_agent import create_transcription_agent, TRANSCRIPTION_AGENT
+from .summary_agent import create_summary_agent, SUMMARY_AGENT
+from .qa_agent import create_qa_agent, QA_AGENT
 
 __all__ = [
+    'AgentSpec',
     'create_transcription_agent',
     'create_summary_agent',
-    'create_qa_agent'
+    'create_qa_agent',
+    'TRANSCRIPTION_AGENT',
+    'SUMMARY_AGENT',
+    'QA_AGENT'
 ]
 
@@ -0,0 +1,45 @@
+"""
+Agent 定义
+角色、目标、背景和温度与执行方式无关，CrewAI 和直接调用两种执行方式共用同一份定义
+"""
+import inspect
+from dataclasses import dataclass
+
+from config import API_KEY, API_BASE_URL, MODEL_NAME, CREW_VERBOSE
+from clients import get_http_client
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """单个 agent 的定义"""
+    role: str
+    goal: str
+    backstory: str
+    temperature: float
+
+    def system_prompt(self) -> str:
+        """渲染为直接调用时的系统消息"""
+        return f"你是{self.role}。\n{inspect.cleandoc(self.backstory)}\n\n你的目标：{self.goal}"
+
+
+def build_agent(spec: AgentSpec):
+    """按定义创建 CrewAI Agent"""
+    from crewai import Agent
+    from langchain_openai import ChatOpenAI
+    
+    llm = ChatOpenAI(
+        model=MODEL_NAME,
+        api_key=API_KEY,
+        base_url=API_BASE_URL,
+        http_client=get_http_client(API_BASE_URL),
+        temperature=spec.temperature
+    )
+    
+    return Agent(
+        role=spec.role,
+        goal=spec.goal,
+        backstory=spec.backstory,
+        verbose=CREW_VERBOSE,
+        allow_delegation=False,
+        llm=llm
+    )
@@ -0,0 +1,184 @@
+"""
+问答缓存 - 同一场会议上重复（或只在措辞上略有差别）的问题直接复用答案
+
+键为会议内容的哈希 + 规范化后的问题：会议内容一旦变化，哈希随之改变，旧答案不会再被命中，
+之后按 LRU / TTL 淘汰。规范化去掉标点、句首客套语和句末语气词，"有哪些行动项？" 与
+"请问有哪些行动项呢" 是同一个键。
+
+近似匹配默认关闭：长问题里只差一个关键字（"第一季度" / "第二季度"、"张三" / "李四"）时字符二元组
+Jaccard 相似度仍然很高，复用答案就是确定无疑的错误回答。开启后（阈值不高于 1）除相似度外还要求
+两个问题不同的字符全部是语气词，含数字、汉字实词或英文字母的差别一律不算同一个问题。
+一场会议缓存的问题通常只有几十个，逐一比较即可，不需要 LSH 索引。
+"""
+import difflib
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+# 句首不影响问题含义的客套语
+_FILLER = re.compile(r"^(请问一下|请问|我想问一下|想问一下|问一下)")
+# 不影响问题含义的语气词
+_PARTICLES = frozenset("呢吗吧啊呀嘛哦")
+_TRAILING_PARTICLES = re.compile(f"[{''.join(sorted(_PARTICLES))}]+$")
+
+
+def normalize_question(question: str) -> str:
+    """规范化问题：全角转半角、转小写，去掉标点、符号和空白，以及句首的客套语和句末的语气词"""
+    text = unicodedata.normalize("NFKC", question).lower()
+    kept = "".join(ch for ch in text if unicodedata.category(ch)[0] not in ("P", "S", "Z", "C"))
+    return _TRAILING_PARTICLES.sub("", _FILLER.sub("", kept)) or kept
+
+
+def _only_particles_differ(a: str, b: str) -> bool:
+    """两个规范化后的问题是否只在语气词上不同"""
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal" and not set(a[i1:i2] + b[j1:j2]) <= _PARTICLES:
+            return False
+    return True
+
+
+def _bigrams(text: str) -> FrozenSet[str]:
+    if len(text) <= 2:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + 2] for i in range(len(text) - 1))
+
+
+def meeting_key(meeting_content: str) -> str:
+    """会议内容的哈希"""
+    return hashlib.blake2b(meeting_content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class _Entry:
+    question: str
+    grams: FrozenSet[str]
+    value: Any
+    created_at: float
+
+
+@dataclass
+class CacheHit:
+    """一次缓存命中"""
+    value: Any
+    similarity: float
+    exact: bool             # 规范化后完全相同
+    cached_question: str
+
+    def to_dict(self) -> dict:
+        return {"hit": True, "exact": self.exact, "similarity": self.similarity, "cached_question": self.cached_question}
+
+
+class AnswerCache:
+    """
+    按会议分组的问答缓存（可跨线程使用）
+
+    条目总数超过 max_entries 时淘汰最久未命中的条目，超过 ttl_seconds 的条目视为过期
+    """
+
+    def __init__(self, threshold: float, max_entries: int, ttl_seconds: float):
+        """
+        Args:
+            threshold: 近似命中所需的最低 Jaccard 相似度，不低于 1 时只做规范化后的精确匹配
+            max_entries: 最多缓存的条目数
+            ttl_seconds: 条目有效期（秒）
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # (会议哈希, 规范化问题) -> 条目，按最近访问排序；另按会议分组便于近似查找
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._meetings: Dict[str, Dict[str, _Entry]] = {}
+        self._lock = threading.Lock()
+
+        self._lookups = 0
+        self._exact_hits = 0
+        self._near_hits = 0
+        self._evictions = 0
+        self._expired = 0
+
+    def _remove(self, key: Tuple[str, str]):
+        del self._entries[key]
+        meeting = self._meetings[key[0]]
+        del meeting[key[1]]
+        if not meeting:
+            del self._meetings[key[0]]
+
+    def get(self, meeting: str, question: str) -> Optional[CacheHit]:
+        """
+        查找缓存的答案
+
+        Args:
+            meeting: 会议内容的哈希（meeting_key）
+            question: 问题
+        """
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+        now = time.time()
+        with self._lock:
+            self._lookups += 1
+            candidates = self._meetings.get(meeting, {})
+            expired = [n for n, entry in candidates.items() if now - entry.created_at > self.ttl_seconds]
+            for n in expired:
+                self._remove((meeting, n))
+            self._expired += len(expired)
+            candidates = self._meetings.get(meeting, {})
+
+            best_key, similarity = (normalized, 1.0) if normalized in candidates else (None, 0.0)
+            if best_key is None and self.threshold < 1:
+                grams = _bigrams(normalized)
+                for n, entry in candidates.items():
+                    score = len(grams & entry.grams) / len(grams | entry.grams)
+                    if score >= self.threshold and score > similarity and _only_particles_differ(normalized, n):
+                        best_key, similarity = n, score
+            if best_key is None:
+                return None
+
+            best = candidates[best_key]
+            exact = best_key == normalized
+            self._entries.move_to_end((meeting, best_key))
+            if exact:
+                self._exact_hits += 1
+            else:
+                self._near_hits += 1
+            return CacheHit(best.value, round(similarity, 4), exact, best.question)
+
+    def put(self, meeting: str, question: str, value: Any):
+        """写入缓存（同一场会议规范化后相同的问题覆盖旧答案）"""
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        key = (meeting, normalized)
+        entry = _Entry(question, _bigrams(normalized), value, time.time())
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._meetings.setdefault(meeting, {})[normalized] = entry
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """条目数和命中率"""
+        with self._lock:
+            hits = self._exact_hits + self._near_hits
+            return {
+                "entries": len(self._entries),
+                "meetings": len(self._meetings),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "lookups": self._lookups,
+                "hits": hits,
+                "exact_hits": self._exact_hits,
+                "near_hits": self._near_hits,
+                "hit_rate": round(hits / self._lookups, 4) if self._lookups else 0,
+                "evictions": self._evictions,
+                "expired": self._expired
+            }
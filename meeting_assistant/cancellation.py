@@ -0,0 +1,111 @@
+"""
+请求取消 - 客户端断开后停止进行中的会议处理和后续的上游调用
+
+处理在工作线程中执行，线程的上下文里带有一个取消标记（threading.Event）。
+共享连接池（clients.get_http_client）在发出每个上游请求前检查标记，
+CrewAI 的后续推理轮次、完整处理流程的后续阶段都不会再发出；
+MeetingAssistantCrew 在每个阶段开始前也会检查。direct 执行方式以流式读取模型输出、每个片段检查标记，
+生成中途即可中止；crewai 执行方式下已经发出的单个请求会正常结束。
+
+与 emotion_analysor/cancellation.py 的区别只在本应用需要的地方：上游请求由 CrewAI 经共享连接池
+发出，无法登记取消回调，因此用 httpx 请求钩子（request_hook）代替 on_cancel；处理按端点提交到
+各自的有界线程池（execution.py），因此 run_cancellable / run_until_disconnect 多一个 executor 参数。
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Executor
+from typing import Any, Callable, Optional
+
+from fastapi import Request
+
+
+class RequestCancelled(Exception):
+    """客户端已断开，处理被取消"""
+
+
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar("cancel_event", default=None)
+
+
+def check_cancelled():
+    """当前请求已被取消时抛出 RequestCancelled"""
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise RequestCancelled("客户端已断开")
+
+
+def request_hook(request: Any):
+    """httpx 请求钩子：当前请求已被取消时不再发出上游请求"""
+    check_cancelled()
+
+
+def _run_with_event(event: threading.Event, func: Callable[..., Any], *args: Any) -> Any:
+    _cancel_event.set(event)
+    return func(*args)
+
+
+def _consume(task: "asyncio.Future"):
+    # 被放弃的工作线程随后以 RequestCancelled 结束，取出异常避免 "never retrieved" 警告
+    if not task.cancelled():
+        task.exception()
+
+
+async def run_cancellable(
+    func: Callable[..., Any],
+    *args: Any,
+    executor: Optional[Executor] = None
+) -> Any:
+    """
+    在工作线程中执行 func；等待它的协程被取消时（如 WebSocket 断开）设置取消标记，
+    工作线程中的上游调用随即中止
+
+    Args:
+        executor: 执行 func 的线程池，默认使用事件循环的默认线程池
+
+    Returns:
+        func 的返回值
+    """
+    event = threading.Event()
+    ctx = contextvars.copy_context()
+    task = asyncio.get_running_loop().run_in_executor(executor, ctx.run, _run_with_event, event, func, *args)
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        event.set()
+        task.add_done_callback(_consume)
+        raise
+
+
+async def run_until_disconnect(
+    request: Request,
+    func: Callable[..., Any],
+    *args: Any,
+    poll_interval: float = 0.25,
+    executor: Optional[Executor] = None
+) -> Any:
+    """
+    在工作线程中执行 func，期间定期检查客户端是否断开
+
+    断开时取消执行（见 run_cancellable）并抛出 RequestCancelled，不再等待工作线程结束。
+
+    Args:
+        request: 当前 HTTP 请求
+        func: 要执行的阻塞函数
+        poll_interval: 检查客户端连接的间隔（秒）
+        executor: 执行 func 的线程池，默认使用事件循环的默认线程池
+
+    Returns:
+        func 的返回值
+    """
+    work = asyncio.ensure_future(run_cancellable(func, *args, executor=executor))
+    try:
+        while True:
+            done, _ = await asyncio.wait({work}, timeout=poll_interval)
+            if done:
+                return work.result()
+            if await request.is_disconnected():
+                work.cancel()
+                raise RequestCancelled("客户端已断开")
+    except asyncio.CancelledError:
+        work.cancel()
+        raise
@@ -0,0 +1,90 @@
+"""
+共享的上游客户端
+所有请求复用同一组连接池，启动时预热连接
+"""
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+import openai
+
+from config import (
+    API_KEY,
+    API_BASE_URL,
+    WHISPER_API_KEY,
+    WHISPER_API_BASE,
+    UPSTREAM_MAX_CONNECTIONS,
+    UPSTREAM_KEEPALIVE_SECONDS,
+    WARMUP_TIMEOUT
+)
+from cancellation import request_hook
+
+logger = logging.getLogger(__name__)
+
+_http_clients: Dict[str, httpx.Client] = {}
+_llm_client: Optional[openai.OpenAI] = None
+_whisper_client: Optional[openai.OpenAI] = None
+
+
+def get_http_client(base_url: str) -> httpx.Client:
+    """
+    获取指定上游的连接池（同一个 base_url 共享一个）
+    
+    LLM 客户端、Whisper 客户端和 agents 使用的 ChatOpenAI 都通过它发请求，
+    预热建立的连接可以被所有调用复用；客户端断开的请求不会再通过它发出上游请求
+    """
+    client = _http_clients.get(base_url)
+    if client is None:
+        client = openai.DefaultHttpxClient(limits=httpx.Limits(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_CONNECTIONS,
+            keepalive_expiry=UPSTREAM_KEEPALIVE_SECONDS
+        ), event_hooks={"request": [request_hook]})
+        _http_clients[base_url] = client
+    return client
+
+
+def get_llm_client() -> openai.OpenAI:
+    """获取对话模型客户端"""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = openai.OpenAI(
+            api_key=API_KEY,
+            base_url=API_BASE_URL,
+            http_client=get_http_client(API_BASE_URL)
+        )
+    return _llm_client
+
+
+def get_whisper_client() -> openai.OpenAI:
+    """获取语音识别客户端"""
+    global _whisper_client
+    if _whisper_client is None:
+        _whisper_client = openai.OpenAI(
+            api_key=WHISPER_API_KEY,
+            base_url=WHISPER_API_BASE,
+            http_client=get_http_client(WHISPER_API_BASE)
+        )
+    return _whisper_client
+
+
+def warm_up() -> Dict[str, float]:
+    """
+    预热所有上游连接：各发一个轻量请求完成 DNS 解析和 TLS 握手
+    
+    Returns:
+        各上游的预热耗时（秒）
+    """
+    timings = {}
+    clients = {API_BASE_URL: get_llm_client(), WHISPER_API_BASE: get_whisper_client()}
+    for base_url, client in clients.items():
+        start = time.perf_counter()
+        try:
+            client.with_options(timeout=WARMUP_TIMEOUT, max_retries=0).models.list()
+        except Exception as e:
+            # 任何 HTTP 响应（包括 404）都说明连接已建立，只记录失败原因
+            logger.warning(f"上游连接预热未成功 {base_url}: {e}")
+        timings[base_url] = round(time.perf_counter() - start, 3)
+    logger.info(f"上游连接预热完成: {timings}")
+    return timings
@@ -31,9 +31,99 @@ WHISPER_API_BASE = os.getenv("WHISPER_API_BASE", "https://api.openai.com/v1")
 # 服务器配置
 SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
 SERVER_PORT = int(os.getenv("SERVER_PORT", 8000))
+DEV_MODE = os.getenv("DEV_MODE", "false").lower() == "true"  # 开发模式：静态文件变化时自动重新加载
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", 300))  # 不带版本号的静态资源缓存时间（秒）
 
 # 文件上传配置
 UPLOAD_DIR = "uploads"
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
 ALLOWED_AUDIO_FORMATS = [".mp3", ".wav", ".m4a", ".ogg", ".flac"]
 
+
+# 上游连接配置
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", 20))  # 每个上游的连接池大小
+UPSTREAM_KEEPALIVE_SECONDS = float(os.getenv("UPSTREAM_KEEPALIVE_SECONDS", 60))  # 空闲连接保留时间
+
+# 启动预热
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"  # 启动时预热上游连接
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", 5))
+PRELOAD_AGENTS = os.getenv("PRELOAD_AGENTS", "true").lower() == "true"  # 启动后在后台加载 CrewAI 并创建 agents（仅 crewai 执行方式）
+
+# 执行方式
+# direct: 把 agent 定义和任务描述渲染为一次对话调用（默认）
+# crewai: 每个任务创建单 agent 的 Crew 执行
+EXECUTION_MODE = os.getenv("EXECUTION_MODE", "direct").lower()
+CREW_VERBOSE = os.getenv("CREW_VERBOSE", "false").lower() == "true"  # CrewAI 控制台详细日志
+
+# 请求取消
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", 0.5))  # 处理期间检查客户端是否断开的间隔（秒）
+
+# 处理执行器：CrewAI kickoff 和 Whisper 调用在专用线程池中执行，不阻塞事件循环
+CREW_MAX_WORKERS = int(os.getenv("CREW_MAX_WORKERS", 16))  # 线程池大小
+ENDPOINT_CONCURRENCY = {  # 各端点同时处理的请求数上限，超出的请求排队等待
+    "transcribe": int(os.getenv("TRANSCRIBE_CONCURRENCY", 4)),
+    "summary": int(os.getenv("SUMMARY_CONCURRENCY", 4)),
+    "qa": int(os.getenv("QA_CONCURRENCY", 6)),
+    "qa_batch": int(os.getenv("QA_BATCH_CONCURRENCY", 2)),
+    "process_full": int(os.getenv("PROCESS_FULL_CONCURRENCY", 2)),
+}
+ENDPOINT_MAX_QUEUE = int(os.getenv("ENDPOINT_MAX_QUEUE", 32))  # 每个端点最多排队的请求数，超出时返回 503
+
+# 长录音分块转写：超过时长或上传上限的录音切分为多块（优先在静音处切分）并行转写
+LONG_AUDIO_ENABLED = os.getenv("LONG_AUDIO_ENABLED", "true").lower() == "true"
+LONG_AUDIO_SECONDS = float(os.getenv("LONG_AUDIO_SECONDS", 600))  # 超过该时长的录音分块转写
+WHISPER_MAX_UPLOAD_BYTES = int(os.getenv("WHISPER_MAX_UPLOAD_BYTES", 25 * 1024 * 1024))  # 上游单次上传上限
+WHISPER_CHUNK_SECONDS = float(os.getenv("WHISPER_CHUNK_SECONDS", 300))  # 每块的名义时长（16kHz WAV 约 9.6MB）
+WHISPER_CHUNK_OVERLAP_SECONDS = float(os.getenv("WHISPER_CHUNK_OVERLAP_SECONDS", 2))  # 非静音处切分时的重叠
+WHISPER_CONCURRENCY = int(os.getenv("WHISPER_CONCURRENCY", 4))  # 单个录音同时转写的块数
+
+# 语音活动检测：转写前去掉长静音（会前空白、中场休息等），只上传语音部分
+VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() == "true"
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", 12))  # 帧能量高于底噪该分贝数视为语音
+VAD_MIN_SILENCE_SECONDS = float(os.getenv("VAD_MIN_SILENCE_SECONDS", 1.0))  # 只去掉长于该时长的静音
+VAD_PADDING_SECONDS = float(os.getenv("VAD_PADDING_SECONDS", 0.25))  # 语音区间两侧保留的余量
+VAD_MIN_REMOVED_SECONDS = float(os.getenv("VAD_MIN_REMOVED_SECONDS", 5))  # 可去掉的静音少于该时长时不压缩
+
+# Token 计数（tiktoken 编码名；不可用时按字符估算）
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+
+# 长会议纪要：超过单次上限的转写按 token 切块，并行提炼各块要点后再汇总为纪要（map-reduce）
+SUMMARY_SINGLE_SHOT_MAX_TOKENS = int(os.getenv("SUMMARY_SINGLE_SHOT_MAX_TOKENS", 24000))  # 不超过该 token 数时一次生成
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", 8000))  # 每块的 token 数
+SUMMARY_REDUCE_MAX_TOKENS = int(os.getenv("SUMMARY_REDUCE_MAX_TOKENS", 16000))  # 一次汇总的要点 token 上限，超出时分层汇总
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", 4))  # 同时提炼的块数
+
+# 会议问答检索：长会议每场建一次 BM25 索引（字符二元组），每个问题只把相关片段交给模型
+QA_FULL_CONTEXT_MAX_TOKENS = int(os.getenv("QA_FULL_CONTEXT_MAX_TOKENS", 4000))  # 不超过该 token 数的会议直接用全文
+RETRIEVAL_PASSAGE_TOKENS = int(os.getenv("RETRIEVAL_PASSAGE_TOKENS", 200))  # 每个段落的 token 数（按行切分）
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", 6))  # 每个问题取得分最高的段落数
+RETRIEVAL_NEIGHBORS = int(os.getenv("RETRIEVAL_NEIGHBORS", 1))  # 命中段落前后各带上的相邻段落数
+RETRIEVAL_MAX_CONTEXT_TOKENS = int(os.getenv("RETRIEVAL_MAX_CONTEXT_TOKENS", 3000))  # 摘录的 token 上限
+RETRIEVAL_INDEX_CACHE_SIZE = int(os.getenv("RETRIEVAL_INDEX_CACHE_SIZE", 32))  # 缓存索引的会议数
+
+# 会议存储：转写和纪要按 meeting_id 保存（SQLite，文本 zstd 压缩），纪要和问答接口可只传 id
+MEETING_STORE_ENABLED = os.getenv("MEETING_STORE_ENABLED", "true").lower() == "true"
+MEETING_STORE_PATH = os.getenv(
+    "MEETING_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "meetings.db")
+)
+MEETING_STORE_TTL_DAYS = float(os.getenv("MEETING_STORE_TTL_DAYS", 30))  # 超过该天数未更新的会议被清理，0 表示永久保留
+MEETING_STORE_COMPRESSION_LEVEL = int(os.getenv("MEETING_STORE_COMPRESSION_LEVEL", 6))
+
+# 批量问答：同一场会议的多个问题按 token 预算分组，每组一次调用（会议内容只发送一次），答案逐个流式返回
+QA_BATCH_MAX_QUESTIONS = int(os.getenv("QA_BATCH_MAX_QUESTIONS", 8))  # 每次调用最多回答的问题数
+QA_BATCH_CONTEXT_TOKENS = int(os.getenv("QA_BATCH_CONTEXT_TOKENS", 6000))  # 长会议每次调用的检索片段 token 上限
+QA_BATCH_PARALLEL_CALLS = int(os.getenv("QA_BATCH_PARALLEL_CALLS", 3))  # 一个请求内同时进行的调用数
+QA_BATCH_MAX_REQUEST_QUESTIONS = int(os.getenv("QA_BATCH_MAX_REQUEST_QUESTIONS", 50))  # 单个请求的问题数上限
+
+# 问答缓存：同一场会议（内容哈希）上规范化后相同或字符二元组相似度不低于阈值的问题直接复用答案
+QA_CACHE_ENABLED = os.getenv("QA_CACHE_ENABLED", "true").lower() == "true"
+QA_CACHE_SIMILARITY = float(os.getenv("QA_CACHE_SIMILARITY", 1))  # 近似命中的最低 Jaccard 相似度，不低于 1 时只做规范化后的精确匹配
+QA_CACHE_MAX_ENTRIES = int(os.getenv("QA_CACHE_MAX_ENTRIES", 5000))
+QA_CACHE_TTL_SECONDS = float(os.getenv("QA_CACHE_TTL_SECONDS", 86400))
+
+# 流水线缓存：转写、整理和纪要各阶段的结果按输入内容和配置的哈希保存在磁盘上（diskcache），重试时跳过已完成的阶段
+PIPELINE_CACHE_ENABLED = os.getenv("PIPELINE_CACHE_ENABLED", "true").lower() == "true"
+PIPELINE_CACHE_DIR = os.getenv(
+    "PIPELINE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "pipeline_cache")
+)
+PIPELINE_CACHE_SIZE_MB = float(os.getenv("PIPELINE_CACHE_SIZE_MB", 1024))  # 超出时淘汰最久未使用的结果
@@ -0,0 +1,139 @@
+"""
+批量问答 - 同一场会议的多个问题合并为少数几次调用
+
+问题按会议内容的 token 预算分组（MeetingRetriever.plan_batch），每组一次调用，会议内容只发送一次。
+模型按“【回答 N】”分节输出，流式读取时每一节结束（下一节开始）就拆出对应问题的答案交给回调，
+不必等整组回答完。缺少对应分节（模型漏答或没有按格式输出）的问题改为单独问答。
+"""
+import logging
+import re
+from typing import Any, Callable, Dict, Iterator, List, Set, Tuple
+
+from retrieval import MeetingRetriever, QAContext
+from .parallel import run_parallel
+
+logger = logging.getLogger(__name__)
+
+# 行首的“【回答 N】”，允许模型加上 Markdown 标题 / 加粗 / 引用符号
+_MARK = re.compile(r"^[ \t>#*]*【回答\s*(\d+)】[ \t*：:]*", re.M)
+
+
+class AnswerSplitter:
+    """把按“【回答 N】”分节的输出拆成各问题的答案"""
+
+    def __init__(self, count: int):
+        self.count = count
+        self._text = ""
+        self._pos = 0       # 尚未结束的最后一节的起点，之前的内容都已拆分过
+        self._done: Set[int] = set()
+
+    def feed(self, delta: str) -> List[Tuple[int, str]]:
+        """追加一段输出，返回新结束的 [(问题序号（从 0 开始）, 答案), ...]"""
+        self._text += delta
+        return self._split(final=False)
+
+    def finish(self) -> List[Tuple[int, str]]:
+        """输出结束，返回剩余的答案"""
+        return self._split(final=True)
+
+    def _split(self, final: bool) -> List[Tuple[int, str]]:
+        marks = list(_MARK.finditer(self._text, self._pos))
+        ready = []
+        for k, mark in enumerate(marks):
+            if k + 1 == len(marks) and not final:
+                self._pos = mark.start()
+                break
+            end = marks[k + 1].start() if k + 1 < len(marks) else len(self._text)
+            number = int(mark.group(1))
+            answer = self._text[mark.end():end].strip()
+            # 序号越界或重复的分节忽略
+            if 1 <= number <= self.count and number not in self._done and answer:
+                self._done.add(number)
+                ready.append((number - 1, answer))
+        return ready
+
+
+class BatchQuestionAnswerer:
+    """批量问答"""
+
+    def __init__(
+        self,
+        stream: Callable[..., Iterator[str]],
+        answer_one: Callable[[str, str], Dict[str, Any]],
+        retriever: MeetingRetriever,
+        max_questions: int,
+        context_tokens: int,
+        concurrency: int
+    ):
+        """
+        Args:
+            stream: 流式执行单个任务的函数（MeetingAssistantCrew._stream）
+            answer_one: 单个问题的问答（MeetingAssistantCrew.answer_question），用于补答
+            retriever: 会议检索
+            max_questions: 每次调用最多回答的问题数
+            context_tokens: 每次调用的会议内容 token 上限（长会议按检索片段分组）
+            concurrency: 同时进行的调用数
+        """
+        self._stream = stream
+        self._answer_one = answer_one
+        self.retriever = retriever
+        self.max_questions = max_questions
+        self.context_tokens = context_tokens
+        self.concurrency = concurrency
+
+    def _answer_group(
+        self,
+        meeting_content: str,
+        questions: List[str],
+        context: QAContext,
+        members: List[int],
+        on_answer: Callable[[Dict[str, Any]], None]
+    ) -> int:
+        """一次调用回答一组问题，返回补答的问题数"""
+        answered: Set[int] = set()
+
+        def emit(local: int, answer: str):
+            index = members[local]
+            answered.add(index)
+            on_answer({"index": index, "question": questions[index], "answer": answer, "status": "success"})
+
+        splitter = AnswerSplitter(len(members))
+        for delta in self._stream("qa_batch", context.text, [questions[i] for i in members], context.excerpt):
+            for local, answer in splitter.feed(delta):
+                emit(local, answer)
+        for local, answer in splitter.finish():
+            emit(local, answer)
+
+        missing = [i for i in members if i not in answered]
+        if missing:
+            logger.warning(f"批量问答缺少 {len(missing)} 个问题的回答，改为单独问答")
+        for index in missing:
+            result = self._answer_one(meeting_content, questions[index])
+            on_answer({**result, "index": index, "fallback": True})
+        return len(missing)
+
+    def answer(
+        self,
+        meeting_content: str,
+        questions: List[str],
+        on_answer: Callable[[Dict[str, Any]], None]
+    ) -> Dict[str, Any]:
+        """
+        回答多个问题，每个答案完成时调用 on_answer（可能来自不同线程）
+
+        Returns:
+            分组和调用统计
+        """
+        plan = self.retriever.plan_batch(meeting_content, questions, self.max_questions, self.context_tokens)
+        fallbacks = run_parallel(
+            self._answer_group,
+            [(meeting_content, questions, context, members, on_answer) for context, members in plan],
+            self.concurrency,
+            "qa-batch"
+        )
+        return {
+            "questions": len(questions),
+            "calls": len(plan) + sum(fallbacks),
+            "fallbacks": sum(fallbacks),
+            "groups": [{"questions": members, **context.to_dict()} for context, members in plan]
+        }
@@ -0,0 +1,58 @@
+"""
+直接调用执行引擎
+把 agent 的角色 / 目标 / 背景渲染为系统消息、任务描述渲染为用户消息，一次对话调用完成任务。
+单 agent、单任务、不使用工具的场景下与 CrewAI 的结果等价，但没有 ReAct 提示词脚手架、
+多轮推理和对象构造的开销，也不需要加载 CrewAI / LangChain。
+"""
+from typing import Dict, Iterator, List
+
+from agents import AgentSpec
+from tasks import TaskSpec
+from cancellation import check_cancelled
+from clients import get_llm_client
+from config import MODEL_NAME
+
+
+def render_messages(agent: AgentSpec, task: TaskSpec) -> List[Dict[str, str]]:
+    """渲染对话消息"""
+    return [
+        {"role": "system", "content": agent.system_prompt()},
+        {"role": "user", "content": task.user_prompt()}
+    ]
+
+
+class DirectEngine:
+    """直接通过共享的对话模型客户端执行单 agent 任务"""
+    
+    def run(self, agent: AgentSpec, task: TaskSpec) -> str:
+        """
+        执行任务
+        
+        以流式读取完整输出，请求被取消时在下一个片段到达时中止（非流式调用要等整个回答生成完）。
+        
+        Args:
+            agent: agent 定义（决定系统消息和温度）
+            task: 任务内容
+            
+        Returns:
+            模型输出文本
+        """
+        return "".join(self.stream(agent, task))
+    
+    def stream(self, agent: AgentSpec, task: TaskSpec) -> Iterator[str]:
+        """
+        流式执行任务，逐个返回模型输出的文本片段
+        
+        每个片段检查一次取消标记；请求被取消时关闭流，上游随之停止生成。
+        """
+        stream = get_llm_client().chat.completions.create(
+            model=MODEL_NAME,
+            messages=render_messages(agent, task),
+            temperature=agent.temperature,
+            stream=True
+        )
+        with stream:
+            for chunk in stream:
+                check_cancelled()
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
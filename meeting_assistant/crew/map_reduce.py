@@ -0,0 +1,86 @@
+"""
+长会议纪要的 map-reduce 汇总
+
+转写按 token 切块后并行提炼各块要点（map），再把要点汇总为六部分的会议纪要（reduce）。
+要点合计仍超过一次汇总的上限时先分组合并为更少的要点，逐层汇总。
+"""
+import functools
+import logging
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from tokens import count_tokens, split_by_tokens
+from .parallel import run_parallel
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_OVERLAP_LINES = 2  # 相邻块重复的行数，避免在切分处丢失上下文
+
+
+class MapReduceSummarizer:
+    """map-reduce 纪要生成"""
+
+    def __init__(
+        self,
+        execute: Callable[..., str],
+        chunk_tokens: int,
+        reduce_max_tokens: int,
+        concurrency: int
+    ):
+        """
+        Args:
+            execute: 执行单个任务的函数（MeetingAssistantCrew._execute，接受 refresh 关键字参数）
+            chunk_tokens: map 阶段每块的 token 数
+            reduce_max_tokens: 一次汇总的要点 token 上限
+            concurrency: 同时执行的任务数
+        """
+        self._execute = execute
+        self.chunk_tokens = chunk_tokens
+        self.reduce_max_tokens = reduce_max_tokens
+        self.concurrency = concurrency
+
+    def _parallel(self, name: str, args_list: Sequence[Tuple[Any, ...]], refresh: bool) -> List[str]:
+        """并行执行同一种任务，结果保持输入顺序"""
+        execute = functools.partial(self._execute, refresh=refresh)
+        return run_parallel(execute, [(name, *args) for args in args_list], self.concurrency, "summary")
+
+    def _group(self, notes: List[str]) -> List[List[str]]:
+        """按 token 上限把要点分组（每组至少两条，保证每层都在收敛）"""
+        groups: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for note in notes:
+            tokens = count_tokens(note)
+            if current and current_tokens + tokens > self.reduce_max_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(note)
+            current_tokens += tokens
+        groups.append(current)
+        if len(groups) == len(notes):
+            groups = [notes[i:i + 2] for i in range(0, len(notes), 2)]
+        return groups
+
+    def summarize(self, transcription: str, refresh: bool = False) -> Tuple[str, Dict[str, Any]]:
+        """
+        生成纪要
+
+        Args:
+            transcription: 会议转写文本
+            refresh: 传给 execute，不使用缓存的要点和汇总
+
+        Returns:
+            (纪要, 汇总过程统计)
+        """
+        chunks = split_by_tokens(transcription, self.chunk_tokens, overlap_lines=_CHUNK_OVERLAP_LINES)
+        total = len(chunks)
+        notes = self._parallel("summary_map", [(chunk, i, total) for i, chunk in enumerate(chunks, 1)], refresh)
+
+        levels = 1
+        while len(notes) > 1 and sum(count_tokens(note) for note in notes) > self.reduce_max_tokens:
+            groups = self._group(notes)
+            notes = self._parallel("summary_reduce", [(group, False) for group in groups], refresh)
+            levels += 1
+
+        summary = self._execute("summary_reduce", notes, True, refresh=refresh)
+        logger.info(f"map-reduce 纪要完成: {total} 块，{levels + 1} 层")
+        return summary, {"mode": "map_reduce", "chunks": total, "levels": levels + 1}
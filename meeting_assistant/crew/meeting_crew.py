@@ -2,27 +2,201 @@
 会议助手Crew
 整合所有agents和tasks
 """
-from crewai import Crew, Process
-from agents import create_transcription_agent, create_summary_agent, create_qa_agent
-from tasks import create_transcription_task, create_summary_task, create_qa_task
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List
+
+from config import (
+    EXECUTION_MODE,
+    CREW_VERBOSE,
+    SUMMARY_SINGLE_SHOT_MAX_TOKENS,
+    SUMMARY_CHUNK_TOKENS,
+    SUMMARY_REDUCE_MAX_TOKENS,
+    SUMMARY_MAP_CONCURRENCY,
+    QA_BATCH_MAX_QUESTIONS,
+    QA_BATCH_CONTEXT_TOKENS,
+    QA_BATCH_PARALLEL_CALLS,
+    QA_CACHE_ENABLED,
+    QA_CACHE_SIMILARITY,
+    QA_CACHE_MAX_ENTRIES,
+    QA_CACHE_TTL_SECONDS,
+    PIPELINE_CACHE_ENABLED,
+    MODEL_NAME,
+    API_BASE_URL
+)
+from cancellation import check_cancelled
+from agents import (
+    create_transcription_agent, create_summary_agent, create_qa_agent,
+    TRANSCRIPTION_AGENT, SUMMARY_AGENT, QA_AGENT
+)
+from tasks import (
+    create_transcription_task, create_summary_task, create_qa_task,
+    create_summary_map_task, create_summary_reduce_task, create_qa_batch_task,
+    transcription_task_spec, summary_task_spec, qa_task_spec,
+    summary_map_task_spec, summary_reduce_task_spec, qa_batch_task_spec
+)
 from tools import TranscriptionTool
+from tokens import count_tokens
+from retrieval import MeetingRetriever
+from answer_cache import AnswerCache, meeting_key
+from pipeline_cache import create_pipeline_cache, file_digest, stage_key
+from .direct_engine import DirectEngine
+from .map_reduce import MapReduceSummarizer
+from .batch_qa import BatchQuestionAnswerer
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("direct", "crewai")
+
+# 各任务使用的 agent（名称和定义）、任务内容和 CrewAI 任务工厂
+_TASKS = {
+    "transcription": ("transcription", TRANSCRIPTION_AGENT, transcription_task_spec, create_transcription_task),
+    "summary": ("summary", SUMMARY_AGENT, summary_task_spec, create_summary_task),
+    "summary_map": ("summary", SUMMARY_AGENT, summary_map_task_spec, create_summary_map_task),
+    "summary_reduce": ("summary", SUMMARY_AGENT, summary_reduce_task_spec, create_summary_reduce_task),
+    "qa": ("qa", QA_AGENT, qa_task_spec, create_qa_task),
+    "qa_batch": ("qa", QA_AGENT, qa_batch_task_spec, create_qa_batch_task)
+}
+
+# 结果写入流水线缓存的任务（问答由问答缓存负责）
+_PIPELINE_TASKS = ("transcription", "summary", "summary_map", "summary_reduce")
 
 
 class MeetingAssistantCrew:
     """
     会议助手Crew类
     协调所有agents完成会议相关任务
+    
+    CrewAI / LangChain 的导入耗时数秒，agents 在第一次使用（或 preload）时才创建，
+    构造本类本身不会加载它们；direct 执行方式完全不使用 CrewAI
     """
     
-    def __init__(self):
-        # 创建agents
-        self.transcription_agent = create_transcription_agent()
-        self.summary_agent = create_summary_agent()
-        self.qa_agent = create_qa_agent()
+    def __init__(self, execution_mode: str = EXECUTION_MODE):
+        """
+        Args:
+            execution_mode: direct（一次对话调用）或 crewai（单 agent 的 Crew）
+        """
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"未知的执行方式: {execution_mode}，可选 {', '.join(EXECUTION_MODES)}")
+        self.execution_mode = execution_mode
+        self.direct_engine = DirectEngine()
+        self.summarizer = MapReduceSummarizer(
+            self._execute, SUMMARY_CHUNK_TOKENS, SUMMARY_REDUCE_MAX_TOKENS, SUMMARY_MAP_CONCURRENCY
+        )
+        self.retriever = MeetingRetriever()
+        self.answer_cache = (
+            AnswerCache(QA_CACHE_SIMILARITY, QA_CACHE_MAX_ENTRIES, QA_CACHE_TTL_SECONDS) if QA_CACHE_ENABLED else None
+        )
+        self.batch_answerer = BatchQuestionAnswerer(
+            self._stream, self.answer_question, self.retriever,
+            QA_BATCH_MAX_QUESTIONS, QA_BATCH_CONTEXT_TOKENS, QA_BATCH_PARALLEL_CALLS
+        )
+        self.pipeline_cache = create_pipeline_cache() if PIPELINE_CACHE_ENABLED else None
+        self._agents = None
+        self._agents_lock = threading.Lock()
         
         # 创建工具
         self.transcription_tool = TranscriptionTool()
     
+    def preload(self) -> float:
+        """
+        加载 CrewAI 并创建所有 agents（direct 执行方式无需加载）
+        
+        Returns:
+            耗时（秒）
+        """
+        if self.execution_mode == "direct":
+            return 0.0
+        start = time.perf_counter()
+        self._get_agents()
+        elapsed = time.perf_counter() - start
+        logger.info(f"agents 加载完成，耗时 {elapsed:.3f}秒")
+        return elapsed
+    
+    def _get_agents(self) -> dict:
+        if self._agents is None:
+            with self._agents_lock:
+                if self._agents is None:
+                    self._agents = {
+                        "transcription": create_transcription_agent(),
+                        "summary": create_summary_agent(),
+                        "qa": create_qa_agent()
+                    }
+        return self._agents
+    
+    @property
+    def transcription_agent(self):
+        return self._get_agents()["transcription"]
+    
+    @property
+    def summary_agent(self):
+        return self._get_agents()["summary"]
+    
+    @property
+    def qa_agent(self):
+        return self._get_agents()["qa"]
+    
+    def _kickoff(self, agent, task) -> str:
+        """创建单 agent 的 crew 并执行"""
+        from crewai import Crew, Process
+        
+        crew = Crew(
+            agents=[agent],
+            tasks=[task],
+            process=Process.sequential,
+            verbose=CREW_VERBOSE
+        )
+        return str(crew.kickoff())
+    
+    def _execute(self, name: str, *task_args, refresh: bool = False) -> str:
+        """
+        按执行方式执行单 agent 任务（请求已取消时不再开始）
+        
+        流水线任务先查流水线缓存，键为执行方式、模型和渲染后的 agent 定义与任务描述
+        
+        Args:
+            name: 任务名称（见 _TASKS）
+            task_args: 任务内容参数
+            refresh: 不使用流水线缓存中的结果，重新执行并覆盖
+        """
+        check_cancelled()
+        agent_name, agent_spec, task_spec, create_task = _TASKS[name]
+        spec = task_spec(*task_args)
+        
+        def run() -> str:
+            if self.execution_mode == "direct":
+                return self.direct_engine.run(agent_spec, spec)
+            agent = self._get_agents()[agent_name]
+            return self._kickoff(agent, create_task(agent, *task_args))
+        
+        if self.pipeline_cache is None or name not in _PIPELINE_TASKS:
+            return run()
+        key = stage_key(name, self.execution_mode, MODEL_NAME, API_BASE_URL, agent_spec, spec)
+        return self.pipeline_cache.get_or_compute(name, key, run, refresh=refresh)
+    
+    def _transcribe_audio(self, audio_file_path: str) -> dict:
+        """Whisper 转写，结果按录音内容和转写配置写入流水线缓存（失败的结果不缓存）"""
+        if self.pipeline_cache is None:
+            return self.transcription_tool.transcribe_audio(audio_file_path)
+        key = stage_key("whisper", file_digest(audio_file_path), self.transcription_tool.settings())
+        return self.pipeline_cache.get_or_compute(
+            "whisper", key,
+            lambda: self.transcription_tool.transcribe_audio(audio_file_path),
+            cacheable=lambda result: "error" not in result
+        )
+    
+    def _stream(self, name: str, *task_args) -> Iterator[str]:
+        """
+        流式执行单 agent 任务；crewai 执行方式不支持流式输出，完成后一次返回全部内容
+        """
+        if self.execution_mode != "direct":
+            yield self._execute(name, *task_args)
+            return
+        check_cancelled()
+        _, agent_spec, task_spec, _ = _TASKS[name]
+        yield from self.direct_engine.stream(agent_spec, task_spec(*task_args))
+    
     def transcribe_meeting(self, audio_file_path: str = None, text_content: str = None) -> dict:
         """
         转写会议内容
@@ -36,7 +210,8 @@ class MeetingAssistantCrew:
         """
         # 获取原始内容
         if audio_file_path:
-            transcription_result = self.transcription_tool.transcribe_audio(audio_file_path)
+            check_cancelled()
+            transcription_result = self._transcribe_audio(audio_file_path)
             if "error" in transcription_result:
                 return transcription_result
             raw_content = transcription_result["text"]
@@ -45,50 +220,44 @@ class MeetingAssistantCrew:
         else:
             return {"error": "必须提供音频文件或文本内容"}
         
-        # 创建任务
-        task = create_transcription_task(self.transcription_agent, raw_content)
-        
-        # 创建crew并执行
-        crew = Crew(
-            agents=[self.transcription_agent],
-            tasks=[task],
-            process=Process.sequential,
-            verbose=True
-        )
-        
-        result = crew.kickoff()
+        # 整理转写文本
+        result = self._execute("transcription", raw_content)
         
-        return {
+        response = {
             "raw_transcription": raw_content,
-            "formatted_transcription": str(result),
+            "formatted_transcription": result,
             "status": "success"
         }
+        if audio_file_path:
+            # 带时间戳的分段，长录音分块转写的块数、并发和耗时，VAD 去掉的静音时长
+            for key in ("segments", "chunking", "vad"):
+                if key in transcription_result:
+                    response[key] = transcription_result[key]
+        return response
     
-    def generate_summary(self, transcription: str) -> dict:
+    def generate_summary(self, transcription: str, refresh: bool = False) -> dict:
         """
         生成会议纪要
         
+        不超过 SUMMARY_SINGLE_SHOT_MAX_TOKENS 的转写一次生成，更长的按 map-reduce 汇总
+        
         Args:
             transcription: 会议转写文本
+            refresh: 重新生成（不使用流水线缓存中的纪要和要点）
             
         Returns:
-            会议纪要
+            会议纪要（strategy 说明生成方式）
         """
-        # 创建任务
-        task = create_summary_task(self.summary_agent, transcription)
-        
-        # 创建crew并执行
-        crew = Crew(
-            agents=[self.summary_agent],
-            tasks=[task],
-            process=Process.sequential,
-            verbose=True
-        )
-        
-        result = crew.kickoff()
+        tokens = count_tokens(transcription)
+        if tokens <= SUMMARY_SINGLE_SHOT_MAX_TOKENS:
+            result = self._execute("summary", transcription, refresh=refresh)
+            strategy = {"mode": "single"}
+        else:
+            result, strategy = self.summarizer.summarize(transcription, refresh=refresh)
         
         return {
-            "summary": str(result),
+            "summary": result,
+            "strategy": {**strategy, "tokens": tokens},
             "status": "success"
         }
     
@@ -96,29 +265,73 @@ class MeetingAssistantCrew:
         """
         回答关于会议的问题
         
+        同一场会议上问过的（或措辞相近的）问题直接返回缓存的答案；
+        短会议把全文交给模型；长会议从按会议缓存的索引中检索相关片段，只把片段交给模型
+        
         Args:
             meeting_content: 会议内容（转写文本或纪要）
             question: 问题
             
         Returns:
-            答案
+            答案（retrieval 说明使用的是全文还是片段，命中缓存时 cache 给出匹配到的问题）
         """
-        # 创建任务
-        task = create_qa_task(self.qa_agent, meeting_content, question)
+        key = meeting_key(meeting_content) if self.answer_cache else None
+        if key:
+            hit = self.answer_cache.get(key, question)
+            if hit:
+                return {"question": question, **hit.value, "cache": hit.to_dict(), "status": "success"}
         
-        # 创建crew并执行
-        crew = Crew(
-            agents=[self.qa_agent],
-            tasks=[task],
-            process=Process.sequential,
-            verbose=True
-        )
-        
-        result = crew.kickoff()
+        context = self.retriever.select(meeting_content, question)
+        result = self._execute("qa", context.text, question, context.excerpt)
+        answer = {"answer": result, "retrieval": context.to_dict()}
+        if key and result:
+            self.answer_cache.put(key, question, answer)
         
         return {
             "question": question,
-            "answer": str(result),
+            **answer,
+            "status": "success"
+        }
+    
+    def answer_questions(
+        self,
+        meeting_content: str,
+        questions: List[str],
+        on_answer: Callable[[Dict[str, Any]], None]
+    ) -> dict:
+        """
+        批量回答同一场会议的多个问题
+        
+        Args:
+            meeting_content: 会议内容
+            questions: 问题列表
+            on_answer: 每个答案完成时的回调（index 为问题在列表中的序号；可能来自不同线程）
+            
+        Returns:
+            分组和调用统计（cached 为直接使用缓存答案的问题数）
+        """
+        key = meeting_key(meeting_content) if self.answer_cache else None
+        pending: List[int] = []
+        for index, question in enumerate(questions):
+            hit = self.answer_cache.get(key, question) if key else None
+            if hit:
+                on_answer({
+                    "index": index, "question": question, **hit.value, "cache": hit.to_dict(), "status": "success"
+                })
+            else:
+                pending.append(index)
+        
+        def on_pending_answer(event: Dict[str, Any]):
+            # 批量问答内的序号换算回 questions 中的序号
+            index = pending[event["index"]]
+            if key and event.get("answer") and not event.get("fallback"):
+                self.answer_cache.put(key, questions[index], {"answer": event["answer"]})
+            on_answer({**event, "index": index, "question": questions[index]})
+        
+        stats = self.batch_answerer.answer(meeting_content, [questions[i] for i in pending], on_pending_answer)
+        groups = [{**group, "questions": [pending[i] for i in group["questions"]]} for group in stats["groups"]]
+        return {
+            **stats, "questions": len(questions), "cached": len(questions) - len(pending), "groups": groups,
             "status": "success"
         }
     
@@ -126,6 +339,8 @@ class MeetingAssistantCrew:
         """
         完整处理会议：转写 + 生成纪要
         
+        各阶段结果写入流水线缓存，同一录音 / 文本失败后重试时从最后完成的阶段继续
+        
         Args:
             audio_file_path: 音频文件路径（可选）
             text_content: 文本内容（可选）
@@ -0,0 +1,31 @@
+"""
+在线程池中并行执行同一请求内的多个调用
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Sequence, Tuple
+
+
+def run_parallel(
+    func: Callable[..., Any],
+    args_list: Sequence[Tuple[Any, ...]],
+    concurrency: int,
+    thread_name_prefix: str
+) -> List[Any]:
+    """
+    并行执行 func(*args)，结果保持输入顺序；只有一组参数时直接在当前线程执行
+
+    每个调用带上当前请求的上下文（取消标记）；任一调用失败时取消尚未开始的调用并抛出异常
+    """
+    if not args_list:
+        return []
+    if len(args_list) == 1:
+        return [func(*args_list[0])]
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(args_list)), thread_name_prefix=thread_name_prefix) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, func, *args) for args in args_list]
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
@@ -0,0 +1,177 @@
+"""
+会议处理执行器 - 在专用的有界线程池中执行 CrewAI kickoff 和 Whisper 调用
+
+事件循环只负责接收请求和检查客户端连接，不会被阻塞的处理调用卡住。
+每个端点有独立的并发上限，超出的请求在端点队列中等待（等待期间客户端断开即放弃排队），
+队列已满时直接拒绝，避免长耗时端点（完整处理）占满线程池、拖慢问答等短请求。
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request
+
+from config import CREW_MAX_WORKERS, ENDPOINT_CONCURRENCY, ENDPOINT_MAX_QUEUE, DISCONNECT_POLL_INTERVAL
+from cancellation import RequestCancelled, check_cancelled, run_until_disconnect
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """端点排队的请求已达上限"""
+
+
+class CrewExecutor:
+    """
+    有界线程池 + 按端点的并发上限和排队统计
+
+    统计数据只在事件循环线程中读写；工作线程结束时通过 call_soon_threadsafe 归还名额，
+    因此被取消、但仍在收尾的处理在结束前继续占用名额，并发上限始终是真实的线程占用。
+    """
+
+    def __init__(self, max_workers: int, limits: Dict[str, int], max_queue: int):
+        """
+        Args:
+            max_workers: 线程池大小
+            limits: 各端点的并发上限，未列出的端点上限为 max_workers
+            max_queue: 每个端点最多排队的请求数
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._limits = limits
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="meeting-crew")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def _endpoint(self, endpoint: str):
+        if endpoint not in self._semaphores:
+            self._semaphores[endpoint] = asyncio.Semaphore(self._limits.get(endpoint, self.max_workers))
+            self._stats[endpoint] = {
+                "running": 0,
+                "queued": 0,
+                "max_queued": 0,
+                "started": 0,
+                "rejected": 0,
+                "wait_seconds": 0.0,
+                "max_wait_seconds": 0.0
+            }
+        return self._semaphores[endpoint], self._stats[endpoint]
+
+    async def _acquire(self, semaphore: asyncio.Semaphore, request: Request, poll_interval: float):
+        """等待端点名额，期间客户端断开则放弃排队"""
+        if not semaphore.locked():
+            await semaphore.acquire()
+            return
+        acquire = asyncio.ensure_future(semaphore.acquire())
+        try:
+            while True:
+                done, _ = await asyncio.wait({acquire}, timeout=poll_interval)
+                if done:
+                    return
+                if await request.is_disconnected():
+                    raise RequestCancelled("客户端已断开")
+        except BaseException:
+            # 放弃等待时名额可能已经到手，需要归还
+            if acquire.done() and not acquire.cancelled():
+                semaphore.release()
+            else:
+                acquire.cancel()
+            raise
+
+    async def run(
+        self,
+        endpoint: str,
+        request: Request,
+        func: Callable[..., Any],
+        *args: Any,
+        poll_interval: float = DISCONNECT_POLL_INTERVAL
+    ) -> Any:
+        """
+        在线程池中执行 func，客户端断开时取消（见 run_until_disconnect）
+
+        Args:
+            endpoint: 端点名称，决定并发上限
+            request: 当前 HTTP 请求
+            func: 要执行的阻塞函数
+
+        Returns:
+            func 的返回值
+
+        Raises:
+            QueueFull: 端点排队已满
+            RequestCancelled: 客户端已断开
+        """
+        semaphore, stats = self._endpoint(endpoint)
+        if semaphore.locked() and stats["queued"] >= self.max_queue:
+            stats["rejected"] += 1
+            raise QueueFull(f"{endpoint} 排队请求已达上限 {self.max_queue}")
+
+        stats["queued"] += 1
+        stats["max_queued"] = max(stats["max_queued"], stats["queued"])
+        start = time.perf_counter()
+        try:
+            await self._acquire(semaphore, request, poll_interval)
+        finally:
+            stats["queued"] -= 1
+
+        waited = time.perf_counter() - start
+        stats["started"] += 1
+        stats["wait_seconds"] += waited
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+        stats["running"] += 1
+        loop = asyncio.get_running_loop()
+
+        def release():
+            stats["running"] -= 1
+            semaphore.release()
+
+        def job(*job_args: Any) -> Any:
+            try:
+                # 排队期间已被取消的请求不再开始处理
+                check_cancelled()
+                return func(*job_args)
+            finally:
+                try:
+                    loop.call_soon_threadsafe(release)
+                except RuntimeError:
+                    pass  # 事件循环已关闭（服务退出中）
+
+        return await run_until_disconnect(request, job, *args, poll_interval=poll_interval, executor=self._executor)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """线程池占用和各端点的并发、排队情况"""
+        endpoints = {}
+        for endpoint, stats in self._stats.items():
+            endpoints[endpoint] = {
+                "limit": self._limits.get(endpoint, self.max_workers),
+                "running": stats["running"],
+                "queued": stats["queued"],
+                "max_queued": stats["max_queued"],
+                "started": stats["started"],
+                "rejected": stats["rejected"],
+                "avg_wait_seconds": round(stats["wait_seconds"] / stats["started"], 3) if stats["started"] else None,
+                "max_wait_seconds": round(stats["max_wait_seconds"], 3)
+            }
+        return {
+            "max_workers": self.max_workers,
+            "busy_workers": sum(stats["running"] for stats in self._stats.values()),
+            "max_queue": self.max_queue,
+            "endpoints": endpoints
+        }
+
+    def shutdown(self):
+        """停止线程池，丢弃尚未开始的处理"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 全局执行器实例
+_crew_executor: Optional[CrewExecutor] = None
+
+def get_crew_executor() -> CrewExecutor:
+    """获取全局会议处理执行器"""
+    global _crew_executor
+    if _crew_executor is None:
+        _crew_executor = CrewExecutor(CREW_MAX_WORKERS, ENDPOINT_CONCURRENCY, ENDPOINT_MAX_QUEUE)
+    return _crew_executor
@@ -0,0 +1,224 @@
+"""
+会议存储 - 按 meeting_id 保存转写、分段和纪要，纪要和问答接口只需传 id
+
+SQLite（WAL 模式）保存，文本字段压缩后存为 BLOB：安装了 zstandard 时用 zstd，否则用 zlib。
+读取时按数据头识别压缩格式，两种格式写入的数据可以混存。
+超过 MEETING_STORE_TTL_DAYS 未更新的会议在写入时顺带清理。
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, Optional
+
+from config import (
+    MEETING_STORE_PATH,
+    MEETING_STORE_TTL_DAYS,
+    MEETING_STORE_COMPRESSION_LEVEL
+)
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，缺失时用 zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_PRUNE_INTERVAL = 3600  # 两次清理过期会议的最短间隔（秒）
+
+# 文本字段和 JSON 字段（segments 为分段列表，summary 为纪要接口的结果）
+_TEXT_FIELDS = ("raw_transcription", "formatted_transcription")
+_JSON_FIELDS = ("segments", "summary")
+FIELDS = _TEXT_FIELDS + _JSON_FIELDS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meetings (
+    meeting_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    raw_transcription BLOB,
+    formatted_transcription BLOB,
+    segments BLOB,
+    summary BLOB,
+    text_bytes INTEGER NOT NULL DEFAULT 0,
+    stored_bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_meetings_updated_at ON meetings (updated_at);
+"""
+
+
+class MeetingNotFound(KeyError):
+    """会议不存在（未保存或已过期清理）"""
+
+
+def _compress(data: bytes, level: int) -> bytes:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return zlib.compress(data, min(level, 9))
+
+
+def _decompress(blob: bytes) -> bytes:
+    if blob[:4] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError("会议数据以 zstd 压缩，需要安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return zlib.decompress(blob)
+
+
+def _encode(field: str, value: Any) -> bytes:
+    return (json.dumps(value, ensure_ascii=False) if field in _JSON_FIELDS else value).encode("utf-8")
+
+
+def _decode(field: str, data: bytes) -> Any:
+    text = data.decode("utf-8")
+    return json.loads(text) if field in _JSON_FIELDS else text
+
+
+class MeetingStore:
+    """会议存储（可跨线程使用）"""
+
+    def __init__(
+        self,
+        path: str = MEETING_STORE_PATH,
+        ttl_days: float = MEETING_STORE_TTL_DAYS,
+        compression_level: int = MEETING_STORE_COMPRESSION_LEVEL
+    ):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self.compression_level = compression_level
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def _pack(self, values: Dict[str, Any]) -> Dict[str, bytes]:
+        """压缩各字段（在锁外进行）"""
+        return {
+            field: _compress(_encode(field, value), self.compression_level)
+            for field, value in values.items() if value is not None
+        }
+
+    def _prune(self, now: float):
+        if self.ttl_seconds <= 0 or now - self._last_prune < _PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        deleted = self._conn.execute(
+            "DELETE FROM meetings WHERE updated_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        if deleted:
+            logger.info(f"清理过期会议 {deleted} 场")
+
+    def save_transcription(self, transcription: Dict[str, Any]) -> str:
+        """
+        保存转写结果（/api/transcribe 的返回）
+
+        Returns:
+            meeting_id
+        """
+        values = {field: transcription.get(field) for field in ("raw_transcription", "formatted_transcription", "segments")}
+        text_bytes = sum(len(_encode(field, value)) for field, value in values.items() if value is not None)
+        packed = self._pack(values)
+        meeting_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            self._conn.execute(
+                "INSERT INTO meetings (meeting_id, created_at, updated_at, raw_transcription, formatted_transcription,"
+                " segments, text_bytes, stored_bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    meeting_id, now, now,
+                    packed.get("raw_transcription"), packed.get("formatted_transcription"), packed.get("segments"),
+                    text_bytes, sum(len(blob) for blob in packed.values())
+                )
+            )
+        return meeting_id
+
+    def save_summary(self, meeting_id: str, summary: Dict[str, Any]):
+        """
+        保存纪要（/api/summary 的返回）
+
+        Raises:
+            MeetingNotFound: 会议不存在
+        """
+        data = _encode("summary", summary)
+        blob = _compress(data, self.compression_level)
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM meetings WHERE meeting_id = ?", (meeting_id,)).fetchone()
+            if row is None:
+                raise MeetingNotFound(meeting_id)
+            # 覆盖旧纪要时从统计中扣除旧纪要的大小
+            old_text = len(_decompress(row[0])) if row[0] else 0
+            old_stored = len(row[0]) if row[0] else 0
+            self._conn.execute(
+                "UPDATE meetings SET summary = ?, updated_at = ?, text_bytes = text_bytes + ?,"
+                " stored_bytes = stored_bytes + ? WHERE meeting_id = ?",
+                (blob, time.time(), len(data) - old_text, len(blob) - old_stored, meeting_id)
+            )
+
+    def get(self, meeting_id: str, *fields: str) -> Dict[str, Any]:
+        """
+        读取会议的指定字段（默认全部），未保存的字段为 None
+
+        Raises:
+            MeetingNotFound: 会议不存在
+        """
+        fields = fields or FIELDS
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"未知的会议字段: {', '.join(sorted(unknown))}")
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT created_at, updated_at, {', '.join(fields)} FROM meetings WHERE meeting_id = ?",
+                (meeting_id,)
+            ).fetchone()
+        if row is None:
+            raise MeetingNotFound(meeting_id)
+        meeting = {"meeting_id": meeting_id, "created_at": row[0], "updated_at": row[1]}
+        for field, blob in zip(fields, row[2:]):
+            meeting[field] = _decode(field, _decompress(blob)) if blob is not None else None
+        return meeting
+
+    def delete(self, meeting_id: str) -> bool:
+        """删除会议，返回是否存在"""
+        with self._lock:
+            return self._conn.execute("DELETE FROM meetings WHERE meeting_id = ?", (meeting_id,)).rowcount > 0
+
+    def stats(self) -> dict:
+        """会议数、原始文本和压缩后的字节数"""
+        with self._lock:
+            count, text_bytes, stored_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(text_bytes), 0), COALESCE(SUM(stored_bytes), 0) FROM meetings"
+            ).fetchone()
+        return {
+            "meetings": count,
+            "text_bytes": text_bytes,
+            "stored_bytes": stored_bytes,
+            "compression_ratio": round(text_bytes / stored_bytes, 2) if stored_bytes else None,
+            "codec": "zstd" if zstandard is not None else "zlib"
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_meeting_store: Optional[MeetingStore] = None
+_meeting_store_lock = threading.Lock()
+
+
+def get_meeting_store() -> MeetingStore:
+    """获取全局会议存储（第一次使用时打开数据库）"""
+    global _meeting_store
+    if _meeting_store is None:
+        with _meeting_store_lock:
+            if _meeting_store is None:
+                _meeting_store = MeetingStore()
+    return _meeting_store
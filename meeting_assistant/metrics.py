@@ -0,0 +1,60 @@
+"""
+请求指标 - 按端点统计完成、失败和因客户端断开而取消的请求
+"""
+import threading
+from typing import Any, Dict, Optional
+
+OUTCOMES = ("completed", "failed", "cancelled")
+
+
+class RequestMetrics:
+    """各端点的请求结果计数和耗时"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, endpoint: str, outcome: str, seconds: float):
+        """
+        记录一次请求结果
+
+        Args:
+            endpoint: 端点名称
+            outcome: completed / failed / cancelled
+            seconds: 处理耗时（秒）
+        """
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {
+                **{name: 0 for name in OUTCOMES},
+                **{f"{name}_seconds": 0.0 for name in OUTCOMES}
+            })
+            stats[outcome] += 1
+            stats[f"{outcome}_seconds"] += seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """各端点的请求数和平均耗时"""
+        with self._lock:
+            result = {}
+            for endpoint, stats in self._endpoints.items():
+                total = sum(stats[name] for name in OUTCOMES)
+                result[endpoint] = {
+                    "total": total,
+                    **{name: stats[name] for name in OUTCOMES},
+                    "cancel_rate": round(stats["cancelled"] / total, 4) if total else 0,
+                    **{
+                        f"avg_{name}_seconds": round(stats[f"{name}_seconds"] / stats[name], 3) if stats[name] else None
+                        for name in OUTCOMES
+                    }
+                }
+            return result
+
+
+# 全局指标实例
+_request_metrics: Optional[RequestMetrics] = None
+
+def get_request_metrics() -> RequestMetrics:
+    """获取全局请求指标实例"""
+    global _request_metrics
+    if _request_metrics is None:
+        _request_metrics = RequestMetrics()
+    return _request_metrics
@@ -1,8 +1,10 @@
 """
 数据模型定义
 """
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+
+from config import QA_BATCH_MAX_REQUEST_QUESTIONS
 
 
 class TranscriptionRequest(BaseModel):
@@ -12,26 +14,56 @@ class TranscriptionRequest(BaseModel):
 
 
 class SummaryRequest(BaseModel):
-    """纪要生成请求"""
-    transcription: str = Field(..., description="会议转写文本")
+    """纪要生成请求（transcription 和 meeting_id 二选一）"""
+    transcription: Optional[str] = Field(None, description="会议转写文本")
+    meeting_id: Optional[str] = Field(None, description="转写接口返回的会议 ID")
+    refresh: bool = Field(False, description="重新生成纪要（不使用保存的纪要和流水线缓存）")
+
+    @model_validator(mode="after")
+    def _require_source(self):
+        if bool(self.transcription) == bool(self.meeting_id):
+            raise ValueError("transcription 和 meeting_id 必须且只能提供一个")
+        return self
 
 
 class QuestionRequest(BaseModel):
-    """问答请求"""
-    meeting_content: str = Field(..., description="会议内容")
+    """问答请求（meeting_content 和 meeting_id 二选一）"""
+    meeting_content: Optional[str] = Field(None, description="会议内容")
+    meeting_id: Optional[str] = Field(None, description="转写接口返回的会议 ID")
     question: str = Field(..., description="问题")
 
+    @model_validator(mode="after")
+    def _require_source(self):
+        if bool(self.meeting_content) == bool(self.meeting_id):
+            raise ValueError("meeting_content 和 meeting_id 必须且只能提供一个")
+        return self
+
+
+class BatchQuestionRequest(BaseModel):
+    """批量问答请求（meeting_content 和 meeting_id 二选一）"""
+    meeting_content: Optional[str] = Field(None, description="会议内容")
+    meeting_id: Optional[str] = Field(None, description="转写接口返回的会议 ID")
+    questions: List[str] = Field(..., min_length=1, max_length=QA_BATCH_MAX_REQUEST_QUESTIONS, description="问题列表")
+
+    @model_validator(mode="after")
+    def _require_source(self):
+        if bool(self.meeting_content) == bool(self.meeting_id):
+            raise ValueError("meeting_content 和 meeting_id 必须且只能提供一个")
+        return self
+
 
 class TranscriptionResponse(BaseModel):
     """转写响应"""
     raw_transcription: str
     formatted_transcription: str
+    meeting_id: Optional[str] = None
     status: str
 
 
 class SummaryResponse(BaseModel):
     """纪要响应"""
     summary: str
+    meeting_id: Optional[str] = None
     status: str
 
 
@@ -39,6 +71,7 @@ class QuestionResponse(BaseModel):
     """问答响应"""
     question: str
     answer: str
+    meeting_id: Optional[str] = None
     status: str
 
 
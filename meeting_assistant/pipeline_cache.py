@@ -0,0 +1,142 @@
+"""
+处理流水线缓存 - 按输入内容寻址，重试时从最后完成的阶段继续
+
+转写（音频 → Whisper 结果）、整理（原始文本 → 转写稿）和纪要（转写稿 → 纪要，长会议为各块要点和
+各层汇总）每个阶段的结果以“阶段名 + 输入内容 + 影响结果的配置”的哈希为键保存在磁盘上（diskcache，
+SQLite + 文件），超过容量上限时淘汰最久未使用的结果。模型任务的键包含渲染后的 agent 定义和任务描述，
+修改提示词后旧结果自然不再命中。
+
+失败、取消和空结果不写入缓存。同一输入的两个请求同时执行时各自计算，后完成的覆盖先完成的。
+"""
+import dataclasses
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from config import PIPELINE_CACHE_DIR, PIPELINE_CACHE_SIZE_MB
+
+try:
+    import diskcache
+except ImportError:  # 可选依赖，缺失时不缓存
+    diskcache = None
+
+logger = logging.getLogger(__name__)
+
+_FILE_BLOCK = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    """文件内容的哈希（分块读取，不把整个录音读入内存）"""
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_FILE_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _json_default(value: Any) -> Any:
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    raise TypeError(f"无法作为缓存键: {type(value).__name__}")
+
+
+def stage_key(stage: str, *parts: Any) -> str:
+    """
+    阶段结果的键
+
+    Args:
+        stage: 阶段名
+        parts: 输入内容和配置（字符串、字节或可 JSON 序列化的值，dataclass 按字段展开）
+    """
+    digest = hashlib.blake2b(stage.encode("utf-8"), digest_size=32)
+    for part in parts:
+        if isinstance(part, str):
+            data = part.encode("utf-8")
+        elif isinstance(part, bytes):
+            data = part
+        else:
+            data = json.dumps(part, ensure_ascii=False, sort_keys=True, default=_json_default).encode("utf-8")
+        # 带上长度，避免相邻两部分拼接后与另一种切分相同
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return f"{stage}:{digest.hexdigest()}"
+
+
+class PipelineCache:
+    """流水线各阶段结果的磁盘缓存（可跨线程、跨进程使用）"""
+
+    def __init__(self, directory: str = PIPELINE_CACHE_DIR, size_mb: float = PIPELINE_CACHE_SIZE_MB):
+        """
+        Args:
+            directory: 缓存目录
+            size_mb: 容量上限（MB），超出时淘汰最久未使用的结果
+        """
+        self.directory = directory
+        self.size_limit = int(size_mb * 1024 * 1024)
+        self._cache = diskcache.Cache(
+            directory, size_limit=self.size_limit, eviction_policy="least-recently-used"
+        )
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, stage: str, outcome: str):
+        with self._lock:
+            counts = self._stages.setdefault(stage, {"hits": 0, "misses": 0, "refreshes": 0})
+            counts[outcome] += 1
+
+    def get_or_compute(
+        self,
+        stage: str,
+        key: str,
+        compute: Callable[[], Any],
+        cacheable: Callable[[Any], bool] = bool,
+        refresh: bool = False
+    ) -> Any:
+        """
+        返回缓存的结果；没有时计算并保存
+
+        Args:
+            stage: 阶段名（只用于统计）
+            key: stage_key 生成的键
+            compute: 计算结果的函数
+            cacheable: 结果是否可以保存（默认非空即保存）
+            refresh: 不读取缓存，重新计算并覆盖已有结果
+        """
+        if refresh:
+            self._count(stage, "refreshes")
+        else:
+            value = self._cache.get(key)
+            if value is not None:
+                self._count(stage, "hits")
+                logger.info(f"流水线缓存命中: {stage}")
+                return value
+            self._count(stage, "misses")
+
+        value = compute()
+        if value is not None and cacheable(value):
+            self._cache.set(key, value)
+        return value
+
+    def stats(self) -> dict:
+        """条目数、占用空间和各阶段的命中 / 未命中 / 强制重新计算次数"""
+        with self._lock:
+            stages = {stage: dict(counts) for stage, counts in self._stages.items()}
+        return {
+            "entries": len(self._cache),
+            "volume_bytes": self._cache.volume(),
+            "size_limit_bytes": self.size_limit,
+            "stages": stages
+        }
+
+    def close(self):
+        self._cache.close()
+
+
+def create_pipeline_cache() -> Optional[PipelineCache]:
+    """创建流水线缓存；未安装 diskcache 时返回 None（不缓存）"""
+    if diskcache is None:
+        logger.warning("未安装 diskcache，流水线缓存不可用")
+        return None
+    return PipelineCache()
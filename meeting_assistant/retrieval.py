@@ -0,0 +1,258 @@
+"""
+会议问答的检索 - 每场会议建一次索引，每个问题只把相关片段交给模型
+
+会议内容按行（发言 / 转写分段）边界切成若干段落，以字符二元组为词项建 BM25 倒排索引（NumPy，
+不依赖外部向量服务）。提问时取得分最高的 top-k 段落，连同前后相邻段落按原文顺序拼接为摘录。
+短会议直接使用全文；问题与会议内容没有任何共同词项时同样退回全文。
+"""
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import (
+    QA_FULL_CONTEXT_MAX_TOKENS,
+    RETRIEVAL_PASSAGE_TOKENS,
+    RETRIEVAL_TOP_K,
+    RETRIEVAL_NEIGHBORS,
+    RETRIEVAL_MAX_CONTEXT_TOKENS,
+    RETRIEVAL_INDEX_CACHE_SIZE
+)
+from tokens import count_tokens, split_by_tokens
+
+_NON_WORD = re.compile(r"[\W_]+")
+_GAP = "\n……\n"  # 摘录中不相邻的段落之间的省略标记
+
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+
+
+def _features(text: str) -> List[str]:
+    """字符二元组（规范化、去掉标点和空白后）"""
+    normalized = _NON_WORD.sub("", unicodedata.normalize("NFKC", text).lower())
+    if len(normalized) < 2:
+        return [normalized] if normalized else []
+    return [normalized[i:i + 2] for i in range(len(normalized) - 1)]
+
+
+class MeetingIndex:
+    """单场会议的段落和 BM25 倒排索引"""
+
+    def __init__(self, passages: List[str]):
+        self.passages = passages
+        self.passage_tokens = [count_tokens(passage) for passage in passages]
+        self._vocab = {}
+        docs, terms, freqs = [], [], []
+        lengths = np.zeros(len(passages), dtype=np.float32)
+        for i, passage in enumerate(passages):
+            counts = Counter(_features(passage))
+            lengths[i] = sum(counts.values())
+            for feature, count in counts.items():
+                docs.append(i)
+                terms.append(self._vocab.setdefault(feature, len(self._vocab)))
+                freqs.append(count)
+
+        # 按词项排序的倒排表：词项 j 的倒排在 [indptr[j], indptr[j + 1])
+        terms = np.asarray(terms, dtype=np.int64)
+        order = np.argsort(terms, kind="stable")
+        terms = terms[order]
+        self._docs = np.asarray(docs, dtype=np.int32)[order]
+        tf = np.asarray(freqs, dtype=np.float32)[order]
+        self._indptr = np.searchsorted(terms, np.arange(len(self._vocab) + 1))
+
+        # 预先算好每条倒排的 BM25 权重，查询时只需累加
+        n = len(passages)
+        df = np.diff(self._indptr).astype(np.float32)
+        idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+        avgdl = float(lengths.mean()) if n and lengths.mean() > 0 else 1.0
+        norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * lengths / avgdl)
+        self._weights = idf[terms] * tf * (_BM25_K1 + 1) / (tf + norm[self._docs])
+
+    def search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        """
+        检索
+
+        Returns:
+            [(段落序号, 得分), ...]，按得分从高到低，只含得分大于 0 的段落
+        """
+        scores = np.zeros(len(self.passages), dtype=np.float32)
+        for feature in set(_features(query)):
+            term = self._vocab.get(feature)
+            if term is None:
+                continue
+            start, end = self._indptr[term], self._indptr[term + 1]
+            # 同一词项在每个段落中只有一条倒排，可以直接按下标累加
+            scores[self._docs[start:end]] += self._weights[start:end]
+        top = np.argsort(-scores, kind="stable")[:top_k]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+
+@dataclass
+class QAContext:
+    """交给问答任务的会议内容"""
+    text: str
+    excerpt: bool               # True 为相关片段摘录，False 为全文
+    meeting_tokens: int
+    context_tokens: int
+    passages: int = 0           # 摘录包含的段落数
+    total_passages: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "mode": "excerpt" if self.excerpt else "full",
+            "meeting_tokens": self.meeting_tokens,
+            "context_tokens": self.context_tokens,
+            "passages": self.passages,
+            "total_passages": self.total_passages
+        }
+
+
+@dataclass
+class _Entry:
+    tokens: int
+    index: Optional[MeetingIndex]  # 短会议不建索引
+
+
+class MeetingRetriever:
+    """
+    按会议内容缓存索引（LRU），同一场会议的后续提问直接复用
+
+    可跨线程使用；同一场会议并发首次提问时可能重复建索引，结果相同，只保留一份。
+    """
+
+    def __init__(
+        self,
+        full_context_max_tokens: float = QA_FULL_CONTEXT_MAX_TOKENS,
+        passage_tokens: int = RETRIEVAL_PASSAGE_TOKENS,
+        top_k: int = RETRIEVAL_TOP_K,
+        neighbors: int = RETRIEVAL_NEIGHBORS,
+        max_context_tokens: int = RETRIEVAL_MAX_CONTEXT_TOKENS,
+        cache_size: int = RETRIEVAL_INDEX_CACHE_SIZE
+    ):
+        self.full_context_max_tokens = full_context_max_tokens
+        self.passage_tokens = passage_tokens
+        self.top_k = top_k
+        self.neighbors = neighbors
+        self.max_context_tokens = max_context_tokens
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, meeting_content: str) -> _Entry:
+        key = hashlib.sha256(meeting_content.encode("utf-8")).hexdigest()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                return entry
+
+        tokens = count_tokens(meeting_content)
+        index = None
+        if tokens > self.full_context_max_tokens:
+            index = MeetingIndex(split_by_tokens(meeting_content, self.passage_tokens))
+        entry = _Entry(tokens, index)
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entry
+
+    def _passages_for(self, index: MeetingIndex, question: str) -> Set[int]:
+        """
+        按得分从高到低加入命中段落及其前后 neighbors 个段落，直到达到 max_context_tokens
+
+        Returns:
+            段落序号集合，没有命中时为空
+        """
+        selected: Set[int] = set()
+        budget = 0
+        last = len(index.passages) - 1
+        for hit, _ in index.search(question, self.top_k):
+            window = range(max(hit - self.neighbors, 0), min(hit + self.neighbors, last) + 1)
+            added = [i for i in window if i not in selected]
+            cost = sum(index.passage_tokens[i] for i in added)
+            # 至少保留得分最高的一组
+            if selected and budget + cost > self.max_context_tokens:
+                break
+            selected.update(added)
+            budget += cost
+        return selected
+
+    @staticmethod
+    def _excerpt(entry: _Entry, selected: Set[int]) -> QAContext:
+        """按原文顺序拼接段落，不相邻处用省略号分隔"""
+        index = entry.index
+        parts = []
+        previous = None
+        for i in sorted(selected):
+            if previous is not None:
+                parts.append("\n" if i == previous + 1 else _GAP)
+            parts.append(index.passages[i])
+            previous = i
+        return QAContext(
+            "".join(parts), True, entry.tokens, sum(index.passage_tokens[i] for i in selected),
+            passages=len(selected), total_passages=len(index.passages)
+        )
+
+    def _needs_index(self, entry: _Entry) -> bool:
+        return entry.index is not None and entry.tokens > self.full_context_max_tokens
+
+    def select(self, meeting_content: str, question: str) -> QAContext:
+        """选择交给问答任务的会议内容"""
+        entry = self._entry(meeting_content)
+        if not self._needs_index(entry):
+            return QAContext(meeting_content, False, entry.tokens, entry.tokens)
+        selected = self._passages_for(entry.index, question)
+        if not selected:
+            return QAContext(meeting_content, False, entry.tokens, entry.tokens)
+        return self._excerpt(entry, selected)
+
+    def plan_batch(
+        self,
+        meeting_content: str,
+        questions: List[str],
+        max_questions: int,
+        max_context_tokens: int
+    ) -> List[Tuple[QAContext, List[int]]]:
+        """
+        把同一场会议的多个问题分组，每组共用一份会议内容、一次调用回答
+
+        短会议按 max_questions 分组，每组使用全文；长会议按提问顺序把问题依次放入当前组，
+        各问题相关片段的并集超过 max_context_tokens 或组内已有 max_questions 个问题时另起一组。
+        没有命中任何片段的问题与 select 一样使用全文，这些问题排在最后，同样按 max_questions 分组。
+
+        Returns:
+            [(会议内容, 组内问题在 questions 中的序号), ...]
+        """
+        entry = self._entry(meeting_content)
+        full = QAContext(meeting_content, False, entry.tokens, entry.tokens)
+        if not self._needs_index(entry):
+            return [(full, list(range(i, min(i + max_questions, len(questions)))))
+                    for i in range(0, len(questions), max_questions)]
+
+        index = entry.index
+        groups: List[Tuple[Set[int], List[int]]] = []
+        unmatched: List[int] = []
+        for i, question in enumerate(questions):
+            selected = self._passages_for(index, question)
+            if not selected:
+                unmatched.append(i)
+                continue
+            if groups:
+                union, members = groups[-1]
+                merged = union | selected
+                if (len(members) < max_questions
+                        and sum(index.passage_tokens[p] for p in merged) <= max_context_tokens):
+                    groups[-1] = (merged, members + [i])
+                    continue
+            groups.append((selected, [i]))
+
+        plan = [(self._excerpt(entry, union), members) for union, members in groups]
+        plan.extend((full, unmatched[i:i + max_questions]) for i in range(0, len(unmatched), max_questions))
+        return plan
@@ -2,13 +2,18 @@
 会议助手API服务器
 基于FastAPI提供RESTful API接口
 """
+import asyncio
+import json
+import logging
 import os
 import shutil
+import threading
+import time
+import uuid
 from pathlib import Path
-from typing import Optional
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
-from fastapi.responses import JSONResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from typing import List, Optional
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request
+from fastapi.responses import JSONResponse, HTMLResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from crew import MeetingAssistantCrew
@@ -16,9 +21,27 @@ from models import (
     TranscriptionRequest,
     SummaryRequest,
     QuestionRequest,
+    BatchQuestionRequest,
     ErrorResponse
 )
-from config import UPLOAD_DIR, MAX_FILE_SIZE, ALLOWED_AUDIO_FORMATS
+from config import (
+    UPLOAD_DIR,
+    MAX_FILE_SIZE,
+    ALLOWED_AUDIO_FORMATS,
+    WARMUP_ON_STARTUP,
+    PRELOAD_AGENTS,
+    DEV_MODE,
+    STATIC_MAX_AGE,
+    MEETING_STORE_ENABLED
+)
+from static_assets import StaticAssets
+from cancellation import RequestCancelled
+from execution import QueueFull, get_crew_executor
+from meeting_store import MeetingNotFound, get_meeting_store
+from metrics import get_request_metrics
+import clients
+
+logger = logging.getLogger(__name__)
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -27,8 +50,19 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# 挂载静态文件目录
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# 静态文件（相对本文件定位，启动时读入内存并预压缩，DEV_MODE 下文件变化时自动重新加载）
+static_assets = StaticAssets(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"),
+    dev_mode=DEV_MODE,
+    max_age=STATIC_MAX_AGE
+)
+static_assets.load()
+
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_static(path: str, request: Request):
+    """静态文件"""
+    return static_assets.response(request, path)
 
 # 配置CORS
 app.add_middleware(
@@ -42,28 +76,209 @@ app.add_middleware(
 # 创建上传目录
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# 初始化会议助手Crew
+# 初始化会议助手Crew（agents 延迟创建，见 startup_event）
 meeting_crew = MeetingAssistantCrew()
 
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    """根路径 - 返回前端页面"""
+def _preload_agents():
+    try:
+        meeting_crew.preload()
+    except Exception as e:
+        logger.warning(f"agents 预加载失败，将在首次请求时重试: {e}")
+
+
+async def _run_tracked(endpoint: str, http_request: Request, func, *args) -> dict:
+    """
+    在处理线程池中执行会议处理（按端点限制并发），客户端断开时取消，
+    并按结果（完成 / 失败 / 取消）记录指标
+    
+    Raises:
+        HTTPException: 端点排队已满（503）
+        RequestCancelled: 客户端已断开
+    """
+    metrics = get_request_metrics()
+    start = time.perf_counter()
     try:
-        with open("static/index.html", "r", encoding="utf-8") as f:
-            return f.read()
+        result = await get_crew_executor().run(endpoint, http_request, func, *args)
+    except QueueFull as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail="服务繁忙，请稍后重试", headers={"Retry-After": "5"})
+    except (RequestCancelled, asyncio.CancelledError):
+        # 流式响应的客户端断开时，等待处理的任务被直接取消
+        elapsed = time.perf_counter() - start
+        metrics.record(endpoint, "cancelled", elapsed)
+        logger.info(f"{endpoint}: 客户端已断开，取消处理，耗时 {elapsed:.3f}秒")
+        raise
+    except Exception:
+        metrics.record(endpoint, "failed", time.perf_counter() - start)
+        raise
+    metrics.record(endpoint, "failed" if "error" in result else "completed", time.perf_counter() - start)
+    return result
+
+
+def _save_upload(audio_file: UploadFile) -> str:
+    """
+    验证文件类型并保存上传的音频
+    
+    以随机文件名保存：并发处理的同名上传不会互相覆盖或被对方清理，客户端文件名也不会拼进路径；
+    原文件名只用于日志
+    
+    Returns:
+        保存的路径
+    """
+    file_ext = Path(audio_file.filename or "").suffix.lower()
+    if file_ext not in ALLOWED_AUDIO_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的音频格式。支持的格式：{', '.join(ALLOWED_AUDIO_FORMATS)}"
+        )
+    
+    audio_file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}{file_ext}")
+    with open(audio_file_path, "wb") as buffer:
+        shutil.copyfileobj(audio_file.file, buffer)
+    logger.info(f"收到上传 {audio_file.filename!r}，保存为 {os.path.basename(audio_file_path)}")
+    return audio_file_path
+
+
+def _remove_upload(path: str):
+    try:
+        os.remove(path)
     except FileNotFoundError:
-        return {
+        pass
+
+
+async def _run_with_upload(endpoint: str, http_request: Request, audio_file_path: Optional[str], func, *args) -> dict:
+    """
+    同 _run_tracked，结束后删除上传的临时文件
+
+    处理已在工作线程中开始时，由工作线程在处理结束后删除（请求被取消时处理线程可能仍在读取文件）；
+    排队已满、排队中断开、开始前已被取消等处理没有开始的情况，由这里删除。
+    """
+    if not audio_file_path:
+        return await _run_tracked(endpoint, http_request, func, *args)
+
+    lock = threading.Lock()
+    state = {"started": False, "abandoned": False}
+
+    def run(*run_args) -> dict:
+        with lock:
+            if state["abandoned"]:
+                raise RequestCancelled("请求已结束")
+            state["started"] = True
+        try:
+            return func(*run_args)
+        finally:
+            _remove_upload(audio_file_path)
+
+    try:
+        return await _run_tracked(endpoint, http_request, run, *args)
+    finally:
+        with lock:
+            state["abandoned"] = True
+            started = state["started"]
+        if not started:
+            _remove_upload(audio_file_path)
+
+
+# 以下处理函数在处理线程池中执行（压缩 / 解压和 SQLite 读写不占用事件循环）
+
+def _transcribe_and_store(audio_file_path: Optional[str], text_content: Optional[str]) -> dict:
+    """转写，并把结果保存到会议存储"""
+    result = meeting_crew.transcribe_meeting(audio_file_path, text_content)
+    if MEETING_STORE_ENABLED and "error" not in result:
+        result["meeting_id"] = get_meeting_store().save_transcription(result)
+    return result
+
+
+def _process_and_store(audio_file_path: Optional[str], text_content: Optional[str]) -> dict:
+    """完整处理，并把转写和纪要保存到会议存储"""
+    result = meeting_crew.process_full_meeting(audio_file_path, text_content)
+    if MEETING_STORE_ENABLED and "error" not in result:
+        store = get_meeting_store()
+        meeting_id = store.save_transcription(result["transcription"])
+        store.save_summary(meeting_id, result["summary"])
+        result["meeting_id"] = meeting_id
+    return result
+
+
+def _summarize(transcription: Optional[str], meeting_id: Optional[str], refresh: bool) -> dict:
+    """
+    生成纪要；按 meeting_id 时读取保存的转写，已有纪要时直接返回
+    
+    refresh 时不使用保存的纪要和流水线缓存，重新生成并保存
+    """
+    if meeting_id is None:
+        return meeting_crew.generate_summary(transcription, refresh)
+    store = get_meeting_store()
+    meeting = store.get(meeting_id, "formatted_transcription", "summary")
+    if meeting["summary"] is not None and not refresh:
+        return {**meeting["summary"], "meeting_id": meeting_id, "cached": True}
+    result = meeting_crew.generate_summary(meeting["formatted_transcription"], refresh)
+    if "error" not in result:
+        store.save_summary(meeting_id, result)
+    return {**result, "meeting_id": meeting_id}
+
+
+def _answer(meeting_content: Optional[str], meeting_id: Optional[str], question: str) -> dict:
+    """问答；按 meeting_id 时以保存的整理后转写为会议内容"""
+    if meeting_id is None:
+        return meeting_crew.answer_question(meeting_content, question)
+    meeting = get_meeting_store().get(meeting_id, "formatted_transcription")
+    return {**meeting_crew.answer_question(meeting["formatted_transcription"], question), "meeting_id": meeting_id}
+
+
+def _answer_batch(meeting_content: Optional[str], meeting_id: Optional[str], questions: List[str], emit) -> dict:
+    """批量问答；读取会议后先发出 start 事件，之后每个答案完成时发出 answer 事件"""
+    if meeting_id is not None:
+        meeting_content = get_meeting_store().get(meeting_id, "formatted_transcription")["formatted_transcription"]
+    emit({"type": "start", "questions": len(questions)})
+    result = meeting_crew.answer_questions(meeting_content, questions, lambda answer: emit({"type": "answer", **answer}))
+    return {**result, "meeting_id": meeting_id} if meeting_id else result
+
+
+def _require_store(meeting_id: Optional[str]):
+    if meeting_id and not MEETING_STORE_ENABLED:
+        raise HTTPException(status_code=400, detail="会议存储未启用（MEETING_STORE_ENABLED=false），请直接提供会议内容")
+
+
+# 499: 客户端关闭了连接（响应不会被收到，只用于访问日志）
+CLIENT_CLOSED_REQUEST = 499
+
+
+@app.on_event("startup")
+async def startup_event():
+    """启动时预热上游连接，并在后台加载 agents"""
+    if WARMUP_ON_STARTUP:
+        await asyncio.to_thread(clients.warm_up)
+    if PRELOAD_AGENTS:
+        # 不阻塞启动：服务先开始接收请求，CrewAI 在后台线程中加载
+        asyncio.get_running_loop().run_in_executor(None, _preload_agents)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """停止处理线程池"""
+    get_crew_executor().shutdown()
+
+
+@app.api_route("/", methods=["GET", "HEAD"], response_class=HTMLResponse)
+async def root(request: Request):
+    """根路径 - 返回前端页面"""
+    if static_assets.get("index.html") is None:
+        return JSONResponse({
             "message": "欢迎使用会议助手API",
             "version": "1.0.0",
             "endpoints": {
                 "转写会议": "POST /api/transcribe",
                 "生成纪要": "POST /api/summary",
                 "会议问答": "POST /api/qa",
+                "批量问答": "POST /api/qa/batch",
                 "完整处理": "POST /api/process-full",
+                "会议记录": "GET /api/meetings/{meeting_id}",
                 "健康检查": "GET /health"
             }
-        }
+        })
+    return static_assets.response(request, "index.html")
 
 @app.get("/api")
 async def api_root():
@@ -75,7 +290,9 @@ async def api_root():
             "转写会议": "POST /api/transcribe",
             "生成纪要": "POST /api/summary",
             "会议问答": "POST /api/qa",
+            "批量问答": "POST /api/qa/batch",
             "完整处理": "POST /api/process-full",
+            "会议记录": "GET /api/meetings/{meeting_id}",
             "健康检查": "GET /health"
         }
     }
@@ -89,6 +306,7 @@ async def health_check():
 
 @app.post("/api/transcribe")
 async def transcribe_meeting(
+    http_request: Request,
     audio_file: Optional[UploadFile] = File(None),
     text_content: Optional[str] = Form(None),
     language: str = Form("zh")
@@ -105,29 +323,14 @@ async def transcribe_meeting(
         
         # 处理音频文件
         if audio_file:
-            # 验证文件类型
-            file_ext = Path(audio_file.filename).suffix.lower()
-            if file_ext not in ALLOWED_AUDIO_FORMATS:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"不支持的音频格式。支持的格式：{', '.join(ALLOWED_AUDIO_FORMATS)}"
-                )
-            
-            # 保存上传的文件
-            audio_file_path = os.path.join(UPLOAD_DIR, audio_file.filename)
-            with open(audio_file_path, "wb") as buffer:
-                shutil.copyfileobj(audio_file.file, buffer)
+            audio_file_path = _save_upload(audio_file)
         
-        # 执行转写
-        result = meeting_crew.transcribe_meeting(
-            audio_file_path=audio_file_path,
-            text_content=text_content
+        # 执行转写（结束后清理临时文件）
+        result = await _run_with_upload(
+            "transcribe", http_request, audio_file_path,
+            _transcribe_and_store, audio_file_path, text_content
         )
         
-        # 清理临时文件
-        if audio_file_path and os.path.exists(audio_file_path):
-            os.remove(audio_file_path)
-        
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
         
@@ -135,17 +338,24 @@ async def transcribe_meeting(
         
     except HTTPException:
         raise
+    except RequestCancelled:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"转写失败: {str(e)}")
 
 
 @app.post("/api/summary")
-async def generate_summary(request: SummaryRequest):
+async def generate_summary(request: SummaryRequest, http_request: Request):
     """
     生成会议纪要
+    
+    提供 transcription，或转写接口返回的 meeting_id（纪要随会议保存，再次请求直接返回，refresh 时重新生成）
     """
     try:
-        result = meeting_crew.generate_summary(request.transcription)
+        _require_store(request.meeting_id)
+        result = await _run_tracked(
+            "summary", http_request, _summarize, request.transcription, request.meeting_id, request.refresh
+        )
         
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
@@ -154,19 +364,25 @@ async def generate_summary(request: SummaryRequest):
         
     except HTTPException:
         raise
+    except MeetingNotFound:
+        raise HTTPException(status_code=404, detail=f"会议不存在: {request.meeting_id}")
+    except RequestCancelled:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"生成纪要失败: {str(e)}")
 
 
 @app.post("/api/qa")
-async def answer_question(request: QuestionRequest):
+async def answer_question(request: QuestionRequest, http_request: Request):
     """
     回答关于会议的问题
+    
+    提供 meeting_content，或转写接口返回的 meeting_id
     """
     try:
-        result = meeting_crew.answer_question(
-            meeting_content=request.meeting_content,
-            question=request.question
+        _require_store(request.meeting_id)
+        result = await _run_tracked(
+            "qa", http_request, _answer, request.meeting_content, request.meeting_id, request.question
         )
         
         if "error" in result:
@@ -176,12 +392,92 @@ async def answer_question(request: QuestionRequest):
         
     except HTTPException:
         raise
+    except MeetingNotFound:
+        raise HTTPException(status_code=404, detail=f"会议不存在: {request.meeting_id}")
+    except RequestCancelled:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"问答失败: {str(e)}")
 
 
+def _ndjson(event: dict) -> bytes:
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+@app.post("/api/qa/batch")
+async def answer_questions(request: BatchQuestionRequest, http_request: Request):
+    """
+    批量问答：同一场会议的多个问题，会议内容只发送一次
+    
+    以 NDJSON 流式返回，每行一个事件：
+    - {"type": "start", "questions": N}
+    - {"type": "answer", "index": i, "question": ..., "answer": ...}，每个答案完成时返回（不一定按提问顺序）
+    - {"type": "done", "calls": ..., "groups": [...]}，或处理中出错时 {"type": "error", "detail": ...}
+    
+    开始回答之前的错误（排队已满、会议不存在）仍以 HTTP 状态码返回
+    """
+    _require_store(request.meeting_id)
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: dict):
+        # 在工作线程中调用
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    work = asyncio.ensure_future(_run_tracked(
+        "qa_batch", http_request, _answer_batch, request.meeting_content, request.meeting_id, request.questions, emit
+    ))
+
+    # 等到 start 事件（或处理提前结束）再决定响应状态
+    first = asyncio.ensure_future(events.get())
+    await asyncio.wait({first, work}, return_when=asyncio.FIRST_COMPLETED)
+    if not first.done():
+        first.cancel()
+        try:
+            work.result()
+        except HTTPException:
+            raise
+        except MeetingNotFound:
+            raise HTTPException(status_code=404, detail=f"会议不存在: {request.meeting_id}")
+        except RequestCancelled:
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"批量问答失败: {str(e)}")
+
+    async def stream():
+        getter = None
+        try:
+            yield _ndjson(first.result())
+            while True:
+                getter = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait({getter, work}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    break
+                yield _ndjson(getter.result())
+            # 工作线程在返回前发出的事件都已入队
+            while not events.empty():
+                yield _ndjson(events.get_nowait())
+            try:
+                result = work.result()
+            except RequestCancelled:
+                return
+            except Exception as e:
+                logger.error(f"批量问答失败: {e}")
+                yield _ndjson({"type": "error", "detail": f"批量问答失败: {str(e)}"})
+                return
+            yield _ndjson({"type": "done", **result})
+        finally:
+            # 客户端中途断开时停止处理
+            if getter is not None:
+                getter.cancel()
+            work.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @app.post("/api/process-full")
 async def process_full_meeting(
+    http_request: Request,
     audio_file: Optional[UploadFile] = File(None),
     text_content: Optional[str] = Form(None),
     language: str = Form("zh")
@@ -194,29 +490,14 @@ async def process_full_meeting(
         
         # 处理音频文件
         if audio_file:
-            # 验证文件类型
-            file_ext = Path(audio_file.filename).suffix.lower()
-            if file_ext not in ALLOWED_AUDIO_FORMATS:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"不支持的音频格式。支持的格式：{', '.join(ALLOWED_AUDIO_FORMATS)}"
-                )
-            
-            # 保存上传的文件
-            audio_file_path = os.path.join(UPLOAD_DIR, audio_file.filename)
-            with open(audio_file_path, "wb") as buffer:
-                shutil.copyfileobj(audio_file.file, buffer)
+            audio_file_path = _save_upload(audio_file)
         
-        # 执行完整处理
-        result = meeting_crew.process_full_meeting(
-            audio_file_path=audio_file_path,
-            text_content=text_content
+        # 执行完整处理（结束后清理临时文件）
+        result = await _run_with_upload(
+            "process_full", http_request, audio_file_path,
+            _process_and_store, audio_file_path, text_content
         )
         
-        # 清理临时文件
-        if audio_file_path and os.path.exists(audio_file_path):
-            os.remove(audio_file_path)
-        
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
         
@@ -224,15 +505,37 @@ async def process_full_meeting(
         
     except HTTPException:
         raise
+    except RequestCancelled:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"处理失败: {str(e)}")
 
 
+@app.get("/api/meetings/{meeting_id}")
+async def get_meeting(meeting_id: str):
+    """读取保存的会议（转写、分段和纪要）"""
+    _require_store(meeting_id)
+    try:
+        return await asyncio.to_thread(get_meeting_store().get, meeting_id)
+    except MeetingNotFound:
+        raise HTTPException(status_code=404, detail=f"会议不存在: {meeting_id}")
+
+
+@app.delete("/api/meetings/{meeting_id}")
+async def delete_meeting(meeting_id: str):
+    """删除保存的会议"""
+    _require_store(meeting_id)
+    if not await asyncio.to_thread(get_meeting_store().delete, meeting_id):
+        raise HTTPException(status_code=404, detail=f"会议不存在: {meeting_id}")
+    return {"meeting_id": meeting_id, "status": "deleted"}
+
+
 @app.get("/api/stats")
 async def get_stats():
     """获取服务统计信息"""
     return {
         "service": "meeting-assistant",
+        "execution_mode": meeting_crew.execution_mode,
         "agents": {
             "transcription": "会议转写专家",
             "summary": "会议纪要专家",
@@ -243,7 +546,19 @@ async def get_stats():
             "智能会议纪要生成",
             "基于会议内容的智能问答",
             "完整会议流程处理"
-        ]
+        ],
+        # 各端点完成 / 失败 / 因客户端断开而取消的请求数
+        "requests": get_request_metrics().snapshot(),
+        # 处理线程池占用，各端点的并发上限、运行中 / 排队中的请求数和排队等待时间
+        "execution": get_crew_executor().snapshot(),
+        # 保存的会议数，原始文本和压缩后的字节数
+        "meeting_store": await asyncio.to_thread(get_meeting_store().stats) if MEETING_STORE_ENABLED else None,
+        # 问答缓存的条目数和命中率（精确 / 近似命中）
+        "qa_cache": meeting_crew.answer_cache.stats() if meeting_crew.answer_cache else None,
+        # 流水线缓存的条目数、占用空间和各阶段（whisper / 整理 / 纪要）的命中次数
+        "pipeline_cache": (
+            await asyncio.to_thread(meeting_crew.pipeline_cache.stats) if meeting_crew.pipeline_cache else None
+        )
     }
 
 
@@ -1,6 +1,21 @@
 // API 基础 URL
 const API_BASE_URL = 'http://localhost:8000';
 
+// 最近一次转写保存在服务端的会议（内容未被修改时，纪要和问答只发送 meeting_id）
+let currentMeeting = null;
+
+function rememberMeeting(meetingId, transcription) {
+    currentMeeting = meetingId ? { id: meetingId, text: transcription.trim() } : null;
+}
+
+// 内容与服务端保存的转写一致时用 meeting_id 代替正文
+function meetingSource(content, field) {
+    if (currentMeeting && content === currentMeeting.text) {
+        return { meeting_id: currentMeeting.id };
+    }
+    return { [field]: content };
+}
+
 // ==================== 工具函数 ====================
 
 // 显示 Loading
@@ -172,6 +187,8 @@ document.getElementById('transcribe-btn')?.addEventListener('click', async () =>
         
         const result = await response.json();
         
+        rememberMeeting(result.meeting_id, result.formatted_transcription);
+        
         // 显示结果
         document.getElementById('transcribe-output').textContent = result.formatted_transcription;
         document.getElementById('transcribe-result').style.display = 'block';
@@ -203,7 +220,7 @@ document.getElementById('summary-btn')?.addEventListener('click', async () => {
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ transcription })
+            body: JSON.stringify(meetingSource(transcription, 'transcription'))
         });
         
         if (!response.ok) {
@@ -254,7 +271,7 @@ async function askQuestion() {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                meeting_content: meetingContent,
+                ...meetingSource(meetingContent, 'meeting_content'),
                 question: question
             })
         });
@@ -336,6 +353,8 @@ document.getElementById('full-process-btn')?.addEventListener('click', async ()
         
         const result = await response.json();
         
+        rememberMeeting(result.meeting_id, result.transcription.formatted_transcription);
+        
         // 显示转写结果
         document.getElementById('full-transcribe-output').textContent = 
             result.transcription.formatted_transcription;
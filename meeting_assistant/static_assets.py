@@ -0,0 +1,175 @@
+"""
+静态资源服务 - 启动时把前端文件读入内存，预先计算 gzip / brotli 压缩版本，
+按强 ETag、Cache-Control 和 304 协商缓存
+
+与 emotion_analysor/static_assets.py 是同一份实现：两个应用各自从自己的目录启动、独立部署，
+没有共享的包，因此各带一份。除本段说明外两份内容保持一致，修改时同步（tests/test_static_assets.py 检查）。
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，缺少时只提供 gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 值得压缩的内容类型
+COMPRESSIBLE_TYPES = {"text/html", "text/css", "text/javascript", "application/javascript", "application/json", "image/svg+xml"}
+# 小于该大小的文件不压缩
+MIN_COMPRESS_BYTES = 256
+
+
+@dataclass
+class _Asset:
+    """单个静态文件及其各编码版本"""
+    content_type: str
+    etag: str
+    mtime: float
+    variants: Dict[str, bytes] = field(default_factory=dict)  # 编码 -> 内容，identity 为原文件
+
+
+class StaticAssets:
+    """
+    内存中的静态资源
+
+    - 启动时加载目录下的全部文件，请求路径上不读磁盘
+    - 每个文件预先计算 gzip / brotli 版本（只保留比原文件小的）
+    - 每种编码有各自的强 ETag（内容哈希 + 编码后缀），支持 If-None-Match 返回 304
+    - HTML 使用 no-cache（每次协商）；带查询参数（版本号）的资源长期缓存，其余缓存 max_age 秒
+    - dev_mode 下每次请求检查文件修改时间，变化时重新加载
+    """
+
+    def __init__(self, root: str, dev_mode: bool = False, max_age: int = 300):
+        """
+        初始化静态资源
+
+        Args:
+            root: 静态文件目录
+            dev_mode: 开发模式，文件变化时自动重新加载
+            max_age: 不带版本号的资源的缓存时间（秒）
+        """
+        self.root = os.path.abspath(root)
+        self.dev_mode = dev_mode
+        self.max_age = max_age
+        self._assets: Dict[str, _Asset] = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """加载目录下的全部文件"""
+        assets = {}
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                full_path = os.path.join(directory, name)
+                rel_path = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+                assets[rel_path] = self._load_file(full_path)
+        with self._lock:
+            self._assets = assets
+        total = sum(len(v) for a in assets.values() for v in a.variants.values())
+        logger.info(f"静态资源已加载: {len(assets)} 个文件, 内存占用 {total} 字节")
+
+    def _load_file(self, full_path: str) -> _Asset:
+        mtime = os.path.getmtime(full_path)
+        with open(full_path, 'rb') as f:
+            data = f.read()
+
+        content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        asset = _Asset(
+            content_type=f"{content_type}; charset=utf-8" if content_type.startswith("text/") or content_type.endswith("javascript") else content_type,
+            etag=hashlib.sha256(data).hexdigest()[:32],
+            mtime=mtime,
+            variants={"identity": data}
+        )
+        if content_type in COMPRESSIBLE_TYPES and len(data) >= MIN_COMPRESS_BYTES:
+            compressed = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(data, quality=11)
+            for encoding, body in compressed.items():
+                if len(body) < len(data):
+                    asset.variants[encoding] = body
+        return asset
+
+    def get(self, rel_path: str) -> Optional[_Asset]:
+        """获取静态文件（开发模式下文件变化时重新加载）"""
+        asset = self._assets.get(rel_path)
+        if not self.dev_mode:
+            return asset
+
+        full_path = os.path.normpath(os.path.join(self.root, rel_path))
+        if not full_path.startswith(self.root + os.sep) or not os.path.isfile(full_path):
+            return None
+        if asset is None or os.path.getmtime(full_path) != asset.mtime:
+            asset = self._load_file(full_path)
+            with self._lock:
+                self._assets[rel_path] = asset
+        return asset
+
+    def response(self, request: Request, rel_path: str) -> Response:
+        """
+        构建静态文件响应
+
+        Args:
+            request: 当前请求（读取 Accept-Encoding / If-None-Match）
+            rel_path: 相对静态目录的路径
+
+        Returns:
+            200 / 304 / 404 响应
+        """
+        asset = self.get(rel_path)
+        if asset is None:
+            return Response(status_code=404)
+
+        encoding = self._negotiate(request.headers.get("accept-encoding", ""), asset)
+        etag = f'"{asset.etag}"' if encoding == "identity" else f'"{asset.etag}-{encoding}"'
+
+        if rel_path.endswith(".html"):
+            cache_control = "no-cache"
+        elif request.url.query:
+            cache_control = "public, max-age=31536000, immutable"
+        else:
+            cache_control = f"public, max-age={self.max_age}"
+
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if self._etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=asset.variants[encoding], media_type=asset.content_type, headers=headers)
+
+    @staticmethod
+    def _negotiate(accept_encoding: str, asset: _Asset) -> str:
+        """按 Accept-Encoding 选择编码，优先 br，其次 gzip"""
+        accepted = {}
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.strip().partition(";")
+            quality = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    quality = float(params.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+            if name:
+                accepted[name] = quality
+        for encoding in ("br", "gzip"):
+            if encoding in asset.variants and accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+                return encoding
+        return "identity"
+
+    @staticmethod
+    def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
@@ -2,14 +2,36 @@
 任务模块
 """
 from .meeting_tasks import (
+    TaskSpec,
     create_transcription_task,
     create_summary_task,
-    create_qa_task
+    create_qa_task,
+    create_qa_batch_task,
+    create_summary_map_task,
+    create_summary_reduce_task,
+    transcription_task_spec,
+    summary_task_spec,
+    summary_map_task_spec,
+    summary_reduce_task_spec,
+    qa_task_spec,
+    qa_batch_task_spec,
+    QA_BATCH_MARK
 )
 
 __all__ = [
+    'TaskSpec',
     'create_transcription_task',
     'create_summary_task',
-    'create_qa_task'
+    'create_qa_task',
+    'create_qa_batch_task',
+    'create_summary_map_task',
+    'create_summary_reduce_task',
+    'transcription_task_spec',
+    'summary_task_spec',
+    'summary_map_task_spec',
+    'summary_reduce_task_spec',
+    'qa_task_spec',
+    'qa_batch_task_spec',
+    'QA_BATCH_MARK'
 ]
 
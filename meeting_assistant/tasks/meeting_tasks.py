@@ -1,14 +1,38 @@
 """
 会议相关任务定义
+任务描述与执行方式无关，CrewAI 和直接调用两种执行方式共用 *_task_spec 生成的同一份内容
 """
-from crewai import Task
+import inspect
+from dataclasses import dataclass
+from typing import List
 
 
-def create_transcription_task(agent, meeting_content: str):
+@dataclass(frozen=True)
+class TaskSpec:
+    """单个任务的描述和期望输出"""
+    description: str
+    expected_output: str
+
+    def user_prompt(self) -> str:
+        """渲染为直接调用时的用户消息"""
+        return (
+            f"{self.description.strip()}\n\n"
+            f"期望输出：\n{inspect.cleandoc(self.expected_output)}\n\n"
+            "直接给出最终结果。"
+        )
+
+
+def _build_task(spec: TaskSpec, agent):
+    from crewai import Task
+    
+    return Task(description=spec.description, expected_output=spec.expected_output, agent=agent)
+
+
+def transcription_task_spec(meeting_content: str) -> TaskSpec:
     """
-    创建转写任务
+    转写任务的描述和期望输出
     """
-    task = Task(
+    return TaskSpec(
         description=f"""
         处理以下会议内容，生成清晰、结构化的会议转写记录：
         
@@ -28,32 +52,27 @@ def create_transcription_task(agent, meeting_content: str):
         - 说话者标识（如有）
         - 关键时间点标注
         - 纠正后的准确文本
-        """,
-        agent=agent
+        """
     )
-    return task
 
 
-def create_summary_task(agent, transcription: str):
+def create_transcription_task(agent, meeting_content: str):
     """
-    创建会议纪要任务
+    创建转写任务
     """
-    task = Task(
-        description=f"""
-        基于以下会议转写内容，生成一份全面的会议纪要：
-        
-        会议转写：
-        {transcription}
-        
-        请包含以下内容：
+    return _build_task(transcription_task_spec(meeting_content), agent)
+
+
+# 纪要的六个部分，一次生成和 map-reduce 的最终汇总共用
+_SUMMARY_SECTIONS = """请包含以下内容：
         1. **会议概览**：会议主题、时间、参与者
         2. **主要讨论点**：列出所有重要讨论议题
         3. **关键决策**：记录所有做出的决定
         4. **行动项**：列出所有待办事项，包括负责人和截止日期（如有提及）
         5. **下一步计划**：后续安排和跟进事项
-        6. **其他重要信息**：任何值得注意的内容
-        """,
-        expected_output="""
+        6. **其他重要信息**：任何值得注意的内容"""
+
+_SUMMARY_OUTPUT = """
         一份结构化的会议纪要，包括：
         - 会议概览
         - 主要讨论点（要点列表）
@@ -63,33 +82,184 @@ def create_summary_task(agent, transcription: str):
         - 其他重要信息
         
         格式清晰，易于阅读和存档。
+        """
+
+_NOTES_OUTPUT = """
+        按以下五类组织的要点列表，简洁，保留具体的人名、数字和日期：
+        - 基本信息
+        - 讨论要点
+        - 决定
+        - 行动项
+        - 其他重要信息
+        """
+
+
+def summary_task_spec(transcription: str) -> TaskSpec:
+    """
+    会议纪要任务的描述和期望输出
+    """
+    return TaskSpec(
+        description=f"""
+        基于以下会议转写内容，生成一份全面的会议纪要：
+        
+        会议转写：
+        {transcription}
+        
+        {_SUMMARY_SECTIONS}
         """,
-        agent=agent
+        expected_output=_SUMMARY_OUTPUT
     )
-    return task
 
 
-def create_qa_task(agent, meeting_content: str, question: str):
+def create_summary_task(agent, transcription: str):
     """
-    创建问答任务
+    创建会议纪要任务
+    """
+    return _build_task(summary_task_spec(transcription), agent)
+
+
+def summary_map_task_spec(chunk: str, index: int, total: int) -> TaskSpec:
     """
-    task = Task(
+    长会议纪要 map 阶段：提炼一段转写的要点
+    """
+    return TaskSpec(
+        description=f"""
+        以下是一场会议转写的第 {index}/{total} 部分，请提炼本部分的要点，之后会与其他部分一起汇总为会议纪要：
+        
+        会议转写（第 {index}/{total} 部分）：
+        {chunk}
+        
+        请提炼：
+        1. **基本信息**：提到的会议主题、时间、参与者
+        2. **讨论要点**：讨论的议题和主要观点（注明发言人）
+        3. **决定**：本部分做出的决定
+        4. **行动项**：任务、负责人、截止日期（原文有提及才写）
+        5. **其他重要信息**：后续安排和其他值得注意的内容
+        
+        只记录本部分出现的内容，不要推测其他部分。
+        """,
+        expected_output=_NOTES_OUTPUT
+    )
+
+
+def create_summary_map_task(agent, chunk: str, index: int, total: int):
+    """
+    创建长会议纪要 map 任务
+    """
+    return _build_task(summary_map_task_spec(chunk, index, total), agent)
+
+
+def summary_reduce_task_spec(notes: List[str], final: bool) -> TaskSpec:
+    """
+    长会议纪要 reduce 阶段：把按时间顺序排列的分段要点汇总为会议纪要（final），
+    或在要点过多时先合并为更少的要点（分层汇总的中间层）
+    """
+    joined = "\n\n".join(f"【第 {i} 部分】\n{note}" for i, note in enumerate(notes, 1))
+    if not final:
+        return TaskSpec(
+            description=f"""
+            以下是同一场会议按时间顺序分段提炼的要点，请合并为一份要点：
+            
+            {joined}
+            
+            合并重复内容，但保留所有决定、行动项（负责人、截止日期）和具体的人名、数字、日期。
+            """,
+            expected_output=_NOTES_OUTPUT
+        )
+    return TaskSpec(
+        description=f"""
+        以下是同一场会议按时间顺序分段提炼的要点，请汇总为一份全面的会议纪要：
+        
+        {joined}
+        
+        {_SUMMARY_SECTIONS}
+        """,
+        expected_output=_SUMMARY_OUTPUT
+    )
+
+
+def create_summary_reduce_task(agent, notes: List[str], final: bool):
+    """
+    创建长会议纪要 reduce 任务
+    """
+    return _build_task(summary_reduce_task_spec(notes, final), agent)
+
+
+def qa_task_spec(meeting_content: str, question: str, excerpt: bool = False) -> TaskSpec:
+    """
+    问答任务的描述和期望输出
+    
+    excerpt 为 True 时 meeting_content 是检索出的相关片段（按原文顺序，不相邻处以“……”分隔）
+    """
+    source = "会议内容"
+    requirements = "1. 直接回答问题"
+    if excerpt:
+        source = "会议记录中与问题相关的片段（按时间顺序，省略的部分以“……”标出）"
+        requirements += "\n        2. 片段中没有相关信息时，说明会议记录中未提及"
+    return TaskSpec(
         description=f"""
         基于以下会议内容回答问题：
         
-        会议内容：
+        {source}：
         {meeting_content}
         
         问题：{question}
         
         请提供：
-        1. 直接回答问题
+        {requirements}
         """,
         expected_output="""
         一个详细的答案，包括：
         - 直接回答
+        """
+    )
+
+
+def create_qa_task(agent, meeting_content: str, question: str, excerpt: bool = False):
+    """
+    创建问答任务
+    """
+    return _build_task(qa_task_spec(meeting_content, question, excerpt), agent)
+
+
+# 批量问答中每个回答开头的标记，由 crew/batch_qa.py 据此拆分
+QA_BATCH_MARK = "【回答 {}】"
+
+
+def qa_batch_task_spec(meeting_content: str, questions: List[str], excerpt: bool = False) -> TaskSpec:
+    """
+    批量问答：一次回答同一场会议的多个问题，会议内容只发送一次
+    
+    excerpt 的含义同 qa_task_spec
+    """
+    source = "会议内容"
+    if excerpt:
+        source = "会议记录中与问题相关的片段（按时间顺序，省略的部分以“……”标出）"
+    numbered = "\n".join(f"{i}. {question}" for i, question in enumerate(questions, 1))
+    mark = QA_BATCH_MARK.format(1)
+    return TaskSpec(
+        description=f"""
+        基于以下会议内容依次回答多个问题：
+        
+        {source}：
+        {meeting_content}
+        
+        问题：
+        {numbered}
+        
+        请按序号逐一回答：
+        1. 每个回答另起一行，以“{QA_BATCH_MARK.format("序号")}”开头（例如“{mark}”），不要复述问题
+        2. 每个问题都直接回答，会议中没有相关信息时说明会议记录中未提及
         """,
-        agent=agent
+        expected_output=f"""
+        按问题序号排列的答案，每个答案以“{QA_BATCH_MARK.format("序号")}”开头，包括：
+        - 直接回答
+        """
     )
-    return task
 
+
+def create_qa_batch_task(agent, meeting_content: str, questions: List[str], excerpt: bool = False):
+    """
+    创建批量问答任务
+    """
+    return _build_task(qa_batch_task_spec(meeting_content, questions, excerpt), agent)
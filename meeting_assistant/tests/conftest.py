@@ -0,0 +1,14 @@
+"""
+测试配置：模块按 meeting_assistant 目录下的顶层模块导入（与 server.py 相同），
+导入前设置好不依赖外部服务的环境变量
+"""
+import os
+import sys
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
+os.environ.setdefault("WHISPER_API_KEY", "test")
+os.environ.setdefault("EXECUTION_MODE", "direct")
+# 各测试自行创建临时目录下的缓存，不写入 data/
+os.environ.setdefault("PIPELINE_CACHE_ENABLED", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
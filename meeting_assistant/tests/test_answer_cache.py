@@ -0,0 +1,41 @@
+"""
+问答缓存：只差一个关键字的问题不能复用答案
+"""
+import pytest
+
+from answer_cache import AnswerCache, normalize_question
+
+MEETING = "meeting"
+
+
+def make_cache(threshold: float) -> AnswerCache:
+    return AnswerCache(threshold, max_entries=100, ttl_seconds=3600)
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("会议中提到的第一季度华东地区市场推广活动的预算总额是多少？", "会议中提到的第二季度华东地区市场推广活动的预算总额是多少？"),
+    ("张三在这次会议上负责的行动项有哪些，截止时间分别是什么时候？", "李四在这次会议上负责的行动项有哪些，截止时间分别是什么时候？"),
+    ("v2 版本的发布日期定在什么时候？", "v3 版本的发布日期定在什么时候？"),
+])
+@pytest.mark.parametrize("threshold", [1, 0.8])
+def test_one_key_word_apart_is_a_miss(cached, asked, threshold):
+    cache = make_cache(threshold)
+    cache.put(MEETING, cached, "cached answer")
+    assert cache.get(MEETING, asked) is None
+
+
+def test_filler_and_particles_are_normalized():
+    cache = make_cache(1)
+    cache.put(MEETING, "有哪些行动项？", "answer")
+    hit = cache.get(MEETING, "请问有哪些行动项呢")
+    assert hit is not None and hit.exact
+    assert normalize_question("预算是多少吗？") == normalize_question("预算是多少")
+
+
+def test_near_match_only_when_particles_differ():
+    cache = make_cache(0.6)
+    cache.put(MEETING, "这个方案大家都同意吗", "answer")
+    hit = cache.get(MEETING, "这个方案大家都同意了吗")
+    assert hit is None
+    hit = cache.get(MEETING, "这个方案呢大家都同意吗")
+    assert hit is not None and not hit.exact
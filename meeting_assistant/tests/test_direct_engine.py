@@ -0,0 +1,77 @@
+"""
+直接调用引擎：run 以流式读取，请求被取消时在生成中途中止
+"""
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from agents import AgentSpec
+from cancellation import RequestCancelled, _cancel_event
+from crew import direct_engine
+from crew.direct_engine import DirectEngine
+from tasks import TaskSpec
+
+
+def chunk(text: str):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeStream:
+    """逐个返回片段；after_first 在第一个片段之后调用"""
+
+    def __init__(self, texts, after_first=None):
+        self.texts = texts
+        self.after_first = after_first
+        self.sent = 0
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+    def __iter__(self):
+        for text in self.texts:
+            yield chunk(text)
+            self.sent += 1
+            if self.after_first and self.sent == 1:
+                self.after_first()
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    holder = {}
+
+    def create(**kwargs):
+        assert kwargs.get("stream") is True
+        return holder["stream"]
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(direct_engine, "get_llm_client", lambda: client)
+    return holder
+
+
+def spec():
+    agent = AgentSpec(role="秘书", goal="整理纪要", backstory="经验丰富", temperature=0.3)
+    return agent, TaskSpec(description="总结会议", expected_output="纪要")
+
+
+def test_run_joins_streamed_chunks(fake_client):
+    fake_client["stream"] = FakeStream(["会议", "纪要", "完成"])
+    assert DirectEngine().run(*spec()) == "会议纪要完成"
+
+
+def test_run_stops_when_cancelled(fake_client):
+    event = threading.Event()
+    stream = FakeStream(["会议", "纪要", "完成"], after_first=event.set)
+    fake_client["stream"] = stream
+    token = _cancel_event.set(event)
+    try:
+        with pytest.raises(RequestCancelled):
+            DirectEngine().run(*spec())
+    finally:
+        _cancel_event.reset(token)
+    assert stream.sent == 1
+    assert stream.closed
@@ -0,0 +1,73 @@
+"""
+流水线缓存：命中、refresh 跳过缓存并覆盖
+"""
+import pytest
+
+from crew import MeetingAssistantCrew
+from crew import meeting_crew
+from pipeline_cache import PipelineCache
+
+TRANSCRIPTION = "张三：下周发布新版本。\n李四：我负责测试，周五前完成。\n王五：市场材料下周三给出。"
+
+
+@pytest.fixture
+def crew(tmp_path):
+    crew = MeetingAssistantCrew(execution_mode="direct")
+    crew.pipeline_cache = PipelineCache(str(tmp_path / "pipeline_cache"), size_mb=16)
+    yield crew
+    crew.pipeline_cache.close()
+
+
+@pytest.fixture
+def llm(crew):
+    """替换模型调用，记录每次调用的任务并返回带序号的结果"""
+    calls = []
+
+    def run(agent, task):
+        calls.append(task.description)
+        return f"结果 {len(calls)}"
+
+    crew.direct_engine.run = run
+    return calls
+
+
+def test_summary_is_cached(crew, llm):
+    first = crew.generate_summary(TRANSCRIPTION)
+    second = crew.generate_summary(TRANSCRIPTION)
+    assert len(llm) == 1
+    assert second["summary"] == first["summary"]
+    assert crew.pipeline_cache.stats()["stages"]["summary"] == {"hits": 1, "misses": 1, "refreshes": 0}
+
+
+def test_refresh_calls_llm_again(crew, llm):
+    crew.generate_summary(TRANSCRIPTION)
+    first = crew.generate_summary(TRANSCRIPTION, refresh=True)
+    second = crew.generate_summary(TRANSCRIPTION, refresh=True)
+    assert len(llm) == 3
+    assert first["summary"] != second["summary"]
+    # refresh 的结果覆盖缓存，之后的普通请求返回最新的纪要
+    assert crew.generate_summary(TRANSCRIPTION)["summary"] == second["summary"]
+    assert len(llm) == 3
+
+
+def test_refresh_recomputes_map_reduce_stages(crew, llm, monkeypatch):
+    monkeypatch.setattr(meeting_crew, "SUMMARY_SINGLE_SHOT_MAX_TOKENS", 1)
+    crew.summarizer.chunk_tokens = 20
+    crew.summarizer.reduce_max_tokens = 10000
+
+    result = crew.generate_summary(TRANSCRIPTION)
+    assert result["strategy"]["mode"] == "map_reduce"
+    first_run = len(llm)
+    assert first_run == result["strategy"]["chunks"] + 1
+
+    crew.generate_summary(TRANSCRIPTION)
+    assert len(llm) == first_run
+
+    crew.generate_summary(TRANSCRIPTION, refresh=True)
+    assert len(llm) == 2 * first_run
+
+
+def test_failed_stage_is_not_cached(crew, llm):
+    crew.direct_engine.run = lambda agent, task: ""
+    crew.generate_summary(TRANSCRIPTION)
+    assert crew.pipeline_cache.stats()["entries"] == 0
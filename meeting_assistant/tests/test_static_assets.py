@@ -0,0 +1,23 @@
+"""
+static_assets.py 与 emotion_analysor 中的同一份实现保持一致（模块说明除外）
+"""
+import ast
+import os
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OTHER_COPY = os.path.join(os.path.dirname(APP_DIR), "emotion_analysor", "static_assets.py")
+
+
+def _code(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        module = ast.parse(f.read())
+    if ast.get_docstring(module) is not None:
+        module.body = module.body[1:]
+    return ast.dump(module)
+
+
+@pytest.mark.skipif(not os.path.exists(OTHER_COPY), reason="只部署了本应用")
+def test_static_assets_in_sync():
+    assert _code(os.path.join(APP_DIR, "static_assets.py")) == _code(OTHER_COPY)
@@ -0,0 +1,72 @@
+"""
+上传的音频在处理没有开始（排队已满、排队中断开、开始前已取消）时同样被删除
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from cancellation import RequestCancelled
+from execution import QueueFull
+
+
+class FakeExecutor:
+    """按 outcome 模拟线程池的各种结果"""
+
+    def __init__(self, outcome: str):
+        self.outcome = outcome
+        self.job = None
+
+    async def run(self, endpoint, request, func, *args, **kwargs):
+        self.job = (func, args)
+        if self.outcome == "queue_full":
+            raise QueueFull("排队已满")
+        if self.outcome == "cancelled":
+            raise RequestCancelled("客户端已断开")
+        return await asyncio.to_thread(func, *args)
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(server, "MEETING_STORE_ENABLED", False)
+    return tmp_path
+
+
+def post_audio(endpoint: str):
+    client = TestClient(server.app)
+    return client.post(endpoint, files={"audio_file": ("会议.wav", b"RIFF....WAVE", "audio/wav")})
+
+
+@pytest.mark.parametrize("endpoint", ["/api/transcribe", "/api/process-full"])
+@pytest.mark.parametrize("outcome, status", [("queue_full", 503), ("cancelled", 499)])
+def test_upload_removed_when_processing_never_starts(upload_dir, monkeypatch, endpoint, outcome, status):
+    executor = FakeExecutor(outcome)
+    monkeypatch.setattr(server, "get_crew_executor", lambda: executor)
+
+    response = post_audio(endpoint)
+
+    assert response.status_code == status
+    assert list(upload_dir.iterdir()) == []
+    # 请求结束后工作线程才拿到任务（排队中已取消）：不再处理
+    func, args = executor.job
+    with pytest.raises(RequestCancelled):
+        func(*args)
+
+
+def test_upload_removed_after_processing(upload_dir, monkeypatch):
+    seen = []
+
+    def transcribe(audio_file_path, text_content):
+        seen.append(list(upload_dir.iterdir()))
+        return {"transcription": "你好"}
+
+    monkeypatch.setattr(server, "get_crew_executor", lambda: FakeExecutor("run"))
+    monkeypatch.setattr(server, "_transcribe_and_store", transcribe)
+
+    response = post_audio("/api/transcribe")
+
+    assert response.status_code == 200
+    assert len(seen[0]) == 1
+    assert list(upload_dir.iterdir()) == []
@@ -0,0 +1,99 @@
+"""
+Token 计数与按 token 切分转写文本
+
+优先使用 tiktoken（TOKENIZER_ENCODING）；未安装或编码文件无法加载（离线环境首次使用需要下载）时，
+按字符估算：CJK 字符每个约 1 个 token，其余字符每 4 个约 1 个 token，估算值偏保守。
+"""
+import logging
+import re
+import threading
+from typing import List, Tuple
+
+from config import TOKENIZER_ENCODING
+
+try:
+    import tiktoken
+except ImportError:  # 可选依赖，缺失时按字符估算
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+_CJK = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+_SENTENCE_END = re.compile(r"(?<=[。！？；!?;])")
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                if tiktoken is not None:
+                    try:
+                        _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                    except Exception as e:
+                        logger.warning(f"tiktoken 编码 {TOKENIZER_ENCODING} 加载失败，改为按字符估算: {e}")
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """计算（或估算）文本的 token 数"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _split_long(text: str, max_tokens: int) -> List[str]:
+    """超长的单行先按句子切分，单句仍超长时按字符硬切"""
+    pieces: List[str] = []
+    for sentence in filter(None, _SENTENCE_END.split(text)):
+        tokens = count_tokens(sentence)
+        if tokens <= max_tokens:
+            pieces.append(sentence)
+            continue
+        step = max(len(sentence) * max_tokens // tokens, 1)
+        pieces.extend(sentence[i:i + step] for i in range(0, len(sentence), step))
+    return pieces
+
+
+def split_by_tokens(text: str, max_tokens: int, overlap_lines: int = 0) -> List[str]:
+    """
+    按 token 数切分转写文本，尽量在行（说话人发言 / 转写分段）边界切开
+
+    Args:
+        text: 转写文本
+        max_tokens: 每块的最大 token 数
+        overlap_lines: 相邻块重复的行数（保留上下文）
+
+    Returns:
+        文本块列表
+    """
+    lines: List[str] = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if count_tokens(line) > max_tokens:
+            lines.extend(_split_long(line, max_tokens))
+        else:
+            lines.append(line)
+
+    chunks: List[str] = []
+    current: List[Tuple[str, int]] = []
+    for line in lines:
+        tokens = count_tokens(line) + 1  # 换行
+        if current and sum(t for _, t in current) + tokens > max_tokens:
+            chunks.append("\n".join(l for l, _ in current))
+            current = current[-overlap_lines:] if overlap_lines else []
+            # 重叠部分放不下新行时放弃重叠
+            if sum(t for _, t in current) + tokens > max_tokens:
+                current = []
+        current.append((line, tokens))
+    if current:
+        chunks.append("\n".join(l for l, _ in current))
+    return chunks
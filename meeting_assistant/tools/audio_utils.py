@@ -0,0 +1,133 @@
+"""
+音频读写工具 - 解码为 PCM、计算帧能量、编码 WAV
+
+只依赖 NumPy；WAV 直接解析，其他格式通过 ffmpeg 解码。
+采样保持 int16，两小时 16kHz 的会议录音约占 230MB 内存。
+"""
+import io
+import shutil
+import subprocess
+import wave
+from typing import Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000  # 非 WAV 解码和重新编码使用的采样率（Whisper 内部同样使用 16kHz）
+
+
+def _is_wav(path: str) -> bool:
+    with open(path, 'rb') as f:
+        header = f.read(12)
+    return header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def can_decode(path: str) -> bool:
+    """当前环境能否解码该文件"""
+    return _is_wav(path) or ffmpeg_available()
+
+
+def audio_duration(path: str) -> Optional[float]:
+    """
+    获取音频时长（秒）：WAV 读取文件头，其他格式使用 ffprobe
+
+    Returns:
+        时长，无法获取时返回 None
+    """
+    if _is_wav(path):
+        with wave.open(path, 'rb') as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    if shutil.which("ffprobe") is None:
+        return None
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+        capture_output=True, text=True, check=False
+    )
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+
+def load_pcm(path: str) -> Tuple[np.ndarray, int]:
+    """
+    读取音频为单声道 int16 PCM
+
+    Returns:
+        (采样数据, 采样率)
+
+    Raises:
+        RuntimeError: 非 WAV 文件且未安装 ffmpeg，或解码失败
+    """
+    if _is_wav(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+    else:
+        if not ffmpeg_available():
+            raise RuntimeError("未安装 ffmpeg，无法解码非 WAV 音频")
+        result = subprocess.run(
+            [
+                "ffmpeg", "-nostdin", "-loglevel", "error",
+                "-i", path,
+                "-ac", "1", "-ar", str(SAMPLE_RATE),
+                "-f", "wav", "pipe:1"
+            ],
+            capture_output=True,
+            check=False
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"音频解码失败: {result.stderr.decode('utf-8', errors='ignore').strip()}")
+        data = result.stdout
+
+    with wave.open(io.BytesIO(data), 'rb') as wav:
+        sample_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        frames = wav.readframes(wav.getnframes())
+
+    if width == 2:
+        samples = np.frombuffer(frames, dtype='<i2')
+    elif width == 4:
+        samples = (np.frombuffer(frames, dtype='<i4') >> 16).astype(np.int16)
+    elif width == 1:
+        samples = ((np.frombuffer(frames, dtype=np.uint8).astype(np.int16) - 128) << 8).astype(np.int16)
+    else:
+        raise ValueError(f"不支持的采样位宽: {width * 8} bit")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, sample_rate
+
+
+def frame_rms(samples: np.ndarray, frame: int, block_frames: int = 30000) -> np.ndarray:
+    """
+    按帧计算 RMS 能量（归一化到 [0, 1]），尾部不足一帧的部分忽略
+
+    分块计算，避免把整段录音一次性转换为浮点数。
+
+    Args:
+        samples: int16 采样
+        frame: 帧长（采样数）
+        block_frames: 每块的帧数
+    """
+    n_frames = len(samples) // frame
+    energy = np.empty(n_frames, dtype=np.float32)
+    for start in range(0, n_frames, block_frames):
+        stop = min(start + block_frames, n_frames)
+        block = samples[start * frame:stop * frame].astype(np.float32).reshape(stop - start, frame)
+        energy[start:stop] = np.sqrt(np.mean(block * block, axis=1)) / 32768.0
+    return energy
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """将 int16 采样编码为单声道 WAV"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.ascontiguousarray(samples, dtype='<i2').tobytes())
+    return buffer.getvalue()
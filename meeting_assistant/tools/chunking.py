@@ -0,0 +1,101 @@
+"""
+长音频分块 - 选择切分点、拼接各块的转写分段
+
+切分优先落在静音处（此时相邻块不重叠）；附近没有静音时在名义切分点切开，
+下一块向前重叠一段，保证被切断的句子至少在一块中完整出现。
+拼接时以重叠区的中点为界：分段中点落在界线之前的归前一块，之后的归后一块。
+"""
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+_SILENCE_RATIO = 0.1        # 帧能量低于整体中位数的该比例视为静音
+_MAX_SEARCH_SECONDS = 15    # 在名义切分点之前最多向前寻找静音的范围
+
+
+def plan_chunks(
+    energy: np.ndarray,
+    frame: int,
+    total: int,
+    sample_rate: int,
+    chunk_seconds: float,
+    overlap_seconds: float
+) -> List[Tuple[int, int]]:
+    """
+    规划分块
+
+    Args:
+        energy: 帧能量（见 audio_utils.frame_rms）
+        frame: 帧长（采样数）
+        total: 总采样数
+        sample_rate: 采样率
+        chunk_seconds: 每块的名义时长
+        overlap_seconds: 在非静音处切分时的重叠时长
+
+    Returns:
+        [(起始采样, 结束采样), ...]
+    """
+    chunk = int(chunk_seconds * sample_rate)
+    if total <= chunk:
+        return [(0, total)]
+
+    silence_level = float(np.median(energy)) * _SILENCE_RATIO if len(energy) else 0.0
+    overlap = int(overlap_seconds * sample_rate)
+    search = min(chunk // 4, _MAX_SEARCH_SECONDS * sample_rate)
+
+    chunks = []
+    start = 0
+    while total - start > chunk:
+        nominal = start + chunk
+        lo, hi = (nominal - search) // frame, min(nominal // frame, len(energy))
+        quietest = lo + int(np.argmin(energy[lo:hi])) if hi > lo else hi
+        if hi > lo and energy[quietest] <= silence_level:
+            end = quietest * frame + frame // 2
+            next_start = end
+        else:
+            end = nominal
+            next_start = end - overlap
+        chunks.append((start, end))
+        start = next_start
+
+    # 过短的尾部并入前一块
+    if total - start < chunk // 3 and chunks:
+        chunks[-1] = (chunks[-1][0], total)
+    else:
+        chunks.append((start, total))
+    return chunks
+
+
+def stitch_segments(chunks: List[Tuple[float, float, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    拼接各块的分段，时间戳换算为整段录音的时间，去掉重叠区中的重复分段
+
+    Args:
+        chunks: [(块起始秒, 块结束秒, 该块的转写结果 {"text", "segments"}), ...]，按时间排序
+
+    Returns:
+        [{"start", "end", "text"}, ...]
+    """
+    stitched: List[Dict[str, Any]] = []
+    for i, (start, end, result) in enumerate(chunks):
+        segments = result.get("segments") or []
+        if not segments and result.get("text"):
+            segments = [{"start": 0.0, "end": end - start, "text": result["text"]}]
+
+        prev_end = chunks[i - 1][1] if i else start
+        next_start = chunks[i + 1][0] if i + 1 < len(chunks) else end
+        lower = (start + prev_end) / 2 if prev_end > start else float("-inf")
+        upper = (next_start + end) / 2 if next_start < end else float("inf")
+
+        for segment in segments:
+            seg_start = start + segment["start"]
+            seg_end = min(start + segment["end"], end)
+            middle = (seg_start + seg_end) / 2
+            if middle < lower or middle >= upper:
+                continue
+            text = segment["text"]
+            # 界线附近同一句话可能在两块中都被识别出来
+            if stitched and seg_start < stitched[-1]["end"] and text.strip() == stitched[-1]["text"].strip():
+                continue
+            stitched.append({"start": round(seg_start, 3), "end": round(seg_end, 3), "text": text})
+    return stitched
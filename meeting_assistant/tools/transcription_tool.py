@@ -1,10 +1,49 @@
 """
 音频转写工具
 """
+import contextvars
+import logging
 import os
-import openai
-from typing import Optional
-from config import WHISPER_API_KEY, WHISPER_API_BASE
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, Tuple, Union
+
+import numpy as np
+
+from clients import get_whisper_client
+from cancellation import RequestCancelled, check_cancelled
+from config import (
+    WHISPER_API_BASE,
+    LONG_AUDIO_ENABLED,
+    LONG_AUDIO_SECONDS,
+    WHISPER_MAX_UPLOAD_BYTES,
+    WHISPER_CHUNK_SECONDS,
+    WHISPER_CHUNK_OVERLAP_SECONDS,
+    WHISPER_CONCURRENCY,
+    VAD_ENABLED,
+    VAD_THRESHOLD_DB,
+    VAD_MIN_SILENCE_SECONDS,
+    VAD_PADDING_SECONDS,
+    VAD_MIN_REMOVED_SECONDS
+)
+from .audio_utils import can_decode, audio_duration, load_pcm, frame_rms, encode_wav
+from .chunking import plan_chunks, stitch_segments
+from .vad import OffsetMap, detect_speech, compact
+
+logger = logging.getLogger(__name__)
+
+_ENERGY_FRAME_MS = 20  # 寻找切分点时的能量帧长
+WHISPER_MODEL = "whisper-1"
+
+
+def _segment_dict(segment: Any) -> Dict[str, Any]:
+    # SDK 返回的分段可能是对象也可能是字典
+    get = segment.get if isinstance(segment, dict) else lambda key, default: getattr(segment, key, default)
+    return {
+        "start": get("start", 0),
+        "end": get("end", 0),
+        "text": get("text", "")
+    }
 
 
 class TranscriptionTool:
@@ -12,69 +51,185 @@ class TranscriptionTool:
     音频转写工具类
     使用 Whisper API 进行音频转文本
     注意：DeepSeek 暂不支持语音识别，需要使用 OpenAI Whisper 或其他服务
+
+    超过 LONG_AUDIO_SECONDS 或上传上限的录音分块并行转写，再拼接为一份结果；
+    开启 VAD 时先去掉长静音，只转写语音部分，分段时间戳换算回原始录音时间
     """
-    
+
     def __init__(self):
-        self.client = openai.OpenAI(
-            api_key=WHISPER_API_KEY,
-            base_url=WHISPER_API_BASE
-        )
-    
+        self.client = get_whisper_client()
+
+    @staticmethod
+    def settings() -> Dict[str, Any]:
+        """影响转写结果的配置（流水线缓存的键的一部分）"""
+        return {
+            "model": WHISPER_MODEL,
+            "api_base": WHISPER_API_BASE,
+            "long_audio": [LONG_AUDIO_ENABLED, LONG_AUDIO_SECONDS, WHISPER_MAX_UPLOAD_BYTES],
+            "chunk": [WHISPER_CHUNK_SECONDS, WHISPER_CHUNK_OVERLAP_SECONDS],
+            "vad": [VAD_ENABLED, VAD_THRESHOLD_DB, VAD_MIN_SILENCE_SECONDS, VAD_PADDING_SECONDS, VAD_MIN_REMOVED_SECONDS]
+        }
+
     def transcribe_audio(self, audio_file_path: str, language: str = "zh") -> dict:
         """
         转写音频文件
-        
+
         Args:
             audio_file_path: 音频文件路径
             language: 语言代码，默认为中文
-            
+
         Returns:
-            包含转写文本和元数据的字典
+            包含转写文本和元数据的字典（分块转写时另有 chunking 统计，去除静音时另有 vad 统计）
         """
         try:
+            if can_decode(audio_file_path) and (VAD_ENABLED or self._should_chunk(audio_file_path)):
+                return self._transcribe_pcm(audio_file_path, language)
+
             with open(audio_file_path, "rb") as audio_file:
-                # 使用OpenAI Whisper API进行转写
-                transcript = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language=language,
-                    response_format="verbose_json",
-                    timestamp_granularities=["segment"]
-                )
-            
-            # 构建结构化的转写结果
-            result = {
-                "text": transcript.text,
-                "language": transcript.language if hasattr(transcript, 'language') else language,
-                "duration": transcript.duration if hasattr(transcript, 'duration') else None,
-                "segments": []
-            }
-            
-            # 如果有分段信息，添加到结果中
-            if hasattr(transcript, 'segments') and transcript.segments:
-                for segment in transcript.segments:
-                    result["segments"].append({
-                        "start": segment.get("start", 0),
-                        "end": segment.get("end", 0),
-                        "text": segment.get("text", "")
-                    })
-            
-            return result
-            
+                return self._transcribe(audio_file, language)
+
+        except RequestCancelled:
+            raise
         except Exception as e:
             return {
                 "error": f"转写失败: {str(e)}",
                 "text": "",
                 "segments": []
             }
-    
+
+    def _transcribe_pcm(self, audio_file_path: str, language: str) -> dict:
+        """解码后按需去除静音、分块转写"""
+        samples, sample_rate = load_pcm(audio_file_path)
+        original_seconds = len(samples) / sample_rate
+        offset_map = None
+        vad_info = None
+        if VAD_ENABLED:
+            vad_start = time.perf_counter()
+            regions = detect_speech(samples, sample_rate, VAD_THRESHOLD_DB, VAD_MIN_SILENCE_SECONDS, VAD_PADDING_SECONDS)
+            speech = sum(end - start for start, end in regions)
+            removed_seconds = (len(samples) - speech) / sample_rate
+            # 没检测到语音时保守起见整段转写
+            if regions and removed_seconds >= VAD_MIN_REMOVED_SECONDS:
+                samples = compact(samples, regions)
+                offset_map = OffsetMap(regions, sample_rate)
+            vad_info = {
+                "original_seconds": round(original_seconds, 3),
+                "speech_seconds": round(len(samples) / sample_rate, 3),
+                "removed_seconds": round(original_seconds - len(samples) / sample_rate, 3),
+                "regions": len(regions),
+                "vad_seconds": round(time.perf_counter() - vad_start, 3)
+            }
+            logger.info(f"VAD: {original_seconds:.1f}秒录音去掉 {vad_info['removed_seconds']:.1f}秒静音，{len(regions)} 个语音区间")
+
+        compact_seconds = len(samples) / sample_rate
+        if LONG_AUDIO_ENABLED and (compact_seconds > LONG_AUDIO_SECONDS or len(samples) * 2 > WHISPER_MAX_UPLOAD_BYTES):
+            result = self._transcribe_chunked(samples, sample_rate, language)
+        elif offset_map is not None:
+            result = self._transcribe(("speech.wav", encode_wav(samples, sample_rate)), language)
+        else:
+            # 没有去掉静音、也不需要分块：上传原文件（压缩格式比 WAV 小）
+            with open(audio_file_path, "rb") as audio_file:
+                result = self._transcribe(audio_file, language)
+
+        if offset_map is not None:
+            result["segments"] = offset_map.translate_segments(result["segments"])
+            result["duration"] = round(original_seconds, 3)
+        if vad_info is not None:
+            result["vad"] = vad_info
+        return result
+
+    def _transcribe(self, audio_file: Union[BinaryIO, Tuple[str, bytes]], language: str) -> dict:
+        """一次 Whisper 调用"""
+        # 使用OpenAI Whisper API进行转写
+        transcript = self.client.audio.transcriptions.create(
+            model=WHISPER_MODEL,
+            file=audio_file,
+            language=language,
+            response_format="verbose_json",
+            timestamp_granularities=["segment"]
+        )
+
+        # 构建结构化的转写结果
+        return {
+            "text": transcript.text,
+            "language": getattr(transcript, "language", None) or language,
+            "duration": getattr(transcript, "duration", None),
+            "segments": [_segment_dict(segment) for segment in getattr(transcript, "segments", None) or []]
+        }
+
+    def _should_chunk(self, audio_file_path: str) -> bool:
+        if not LONG_AUDIO_ENABLED or not can_decode(audio_file_path):
+            return False
+        if os.path.getsize(audio_file_path) > WHISPER_MAX_UPLOAD_BYTES:
+            return True
+        duration = audio_duration(audio_file_path)
+        return duration is not None and duration > LONG_AUDIO_SECONDS
+
+    def _transcribe_chunked(self, samples: np.ndarray, sample_rate: int, language: str) -> dict:
+        """
+        分块并行转写：规划切分点，最多 WHISPER_CONCURRENCY 块同时转写，
+        再按整段音频的时间拼接分段
+        """
+        start = time.perf_counter()
+        frame = sample_rate * _ENERGY_FRAME_MS // 1000
+        plan = plan_chunks(
+            frame_rms(samples, frame), frame, len(samples), sample_rate,
+            WHISPER_CHUNK_SECONDS, WHISPER_CHUNK_OVERLAP_SECONDS
+        )
+        call_seconds = [0.0] * len(plan)
+
+        def transcribe_chunk(index: int) -> dict:
+            check_cancelled()
+            chunk_start, chunk_end = plan[index]
+            data = encode_wav(samples[chunk_start:chunk_end], sample_rate)
+            call_start = time.perf_counter()
+            result = self._transcribe((f"chunk_{index}.wav", data), language)
+            call_seconds[index] = time.perf_counter() - call_start
+            return result
+
+        concurrency = min(WHISPER_CONCURRENCY, len(plan))
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="whisper-chunk") as pool:
+            # 每块带上当前请求的上下文（取消标记）
+            futures = [pool.submit(contextvars.copy_context().run, transcribe_chunk, i) for i in range(len(plan))]
+            try:
+                results = [future.result() for future in futures]
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        segments = stitch_segments([
+            (chunk_start / sample_rate, chunk_end / sample_rate, result)
+            for (chunk_start, chunk_end), result in zip(plan, results)
+        ])
+        wall_seconds = time.perf_counter() - start
+        serial_seconds = sum(call_seconds)
+        logger.info(
+            f"分块转写完成: {len(plan)} 块，并发 {concurrency}，耗时 {wall_seconds:.2f}秒，"
+            f"各块调用耗时合计 {serial_seconds:.2f}秒"
+        )
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "language": results[0]["language"],
+            "duration": round(len(samples) / sample_rate, 3),
+            "segments": segments,
+            "chunking": {
+                "chunks": len(plan),
+                "concurrency": concurrency,
+                "wall_seconds": round(wall_seconds, 3),
+                # 各块调用耗时之和，近似于整段单次调用（或逐块串行）的耗时
+                "serial_seconds": round(serial_seconds, 3),
+                "speedup": round(serial_seconds / wall_seconds, 2) if wall_seconds else None
+            }
+        }
+
     def transcribe_text(self, text: str) -> dict:
         """
         处理已有的文本内容（用于测试或直接提供文本的场景）
-        
+
         Args:
             text: 会议文本内容
-            
+
         Returns:
             格式化的文本字典
         """
@@ -84,4 +239,3 @@ class TranscriptionTool:
             "duration": None,
             "segments": []
         }
-
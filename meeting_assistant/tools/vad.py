@@ -0,0 +1,124 @@
+"""
+语音活动检测（VAD）- 基于帧能量找出语音区间，去掉长静音后再转写
+
+会议录音里的会前空白、中场休息和长时间停顿同样按时长计费、占用转写时间。
+这里用自适应阈值的能量检测找出语音区间（只去掉足够长的静音，区间两侧保留少量余量），
+把它们拼接成紧凑的音频；OffsetMap 记录紧凑音频与原始录音的时间对应关系，
+转写结果的分段时间戳据此换算回原始录音时间。
+"""
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from .audio_utils import frame_rms
+
+_FRAME_MS = 30
+_MIN_SPEECH_SECONDS = 0.1   # 短于该时长的孤立能量峰（咔哒声等）不算语音
+_NOISE_PERCENTILE = 10      # 以该分位的帧能量作为底噪
+_SPEECH_PERCENTILE = 90
+
+
+def detect_speech(
+    samples: np.ndarray,
+    sample_rate: int,
+    threshold_db: float,
+    min_silence_seconds: float,
+    padding_seconds: float
+) -> List[Tuple[int, int]]:
+    """
+    检测语音区间
+
+    帧能量高于底噪 threshold_db 分贝视为语音；间隔短于 min_silence_seconds 的语音区间合并，
+    每个区间两侧各保留 padding_seconds。整段能量起伏小于 threshold_db 时视为没有可去掉的静音。
+
+    Returns:
+        [(起始采样, 结束采样), ...]
+    """
+    total = len(samples)
+    frame = max(sample_rate * _FRAME_MS // 1000, 1)
+    energy = frame_rms(samples, frame)
+    if len(energy) == 0:
+        return [(0, total)]
+
+    db = 20 * np.log10(energy + 1e-10)
+    noise_floor = float(np.percentile(db, _NOISE_PERCENTILE))
+    if float(np.percentile(db, _SPEECH_PERCENTILE)) - noise_floor < threshold_db:
+        return [(0, total)]
+
+    mask = db > noise_floor + threshold_db
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1]).reshape(-1, 2)
+
+    min_gap = int(min_silence_seconds * 1000 / _FRAME_MS)
+    min_len = max(int(_MIN_SPEECH_SECONDS * 1000 / _FRAME_MS), 1)
+    merged: List[List[int]] = []
+    for start, end in edges:
+        if merged and start - merged[-1][1] < min_gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    pad = int(padding_seconds * sample_rate)
+    regions: List[Tuple[int, int]] = []
+    for start, end in merged:
+        if end - start < min_len:
+            continue
+        region_start = max(int(start) * frame - pad, 0)
+        region_end = min(int(end) * frame + pad, total)
+        if regions and region_start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], region_end)
+        else:
+            regions.append((region_start, region_end))
+    return regions
+
+
+class OffsetMap:
+    """紧凑音频时间 → 原始录音时间"""
+
+    def __init__(self, regions: List[Tuple[int, int]], sample_rate: int):
+        """
+        Args:
+            regions: 保留的原始区间（采样），按时间排序且互不重叠
+            sample_rate: 采样率
+        """
+        self._original_starts: List[float] = []
+        self._compact_starts: List[float] = []
+        self._lengths: List[float] = []
+        position = 0
+        for start, end in regions:
+            self._original_starts.append(start / sample_rate)
+            self._compact_starts.append(position / sample_rate)
+            self._lengths.append((end - start) / sample_rate)
+            position += end - start
+
+    def to_original(self, seconds: float, is_end: bool = False) -> float:
+        """
+        换算时间
+
+        Args:
+            seconds: 紧凑音频中的时间
+            is_end: 是否为分段结束时间（恰好落在两个区间拼接处时归前一个区间）
+        """
+        if not self._lengths:
+            return seconds
+        find = bisect_left if is_end else bisect_right
+        index = min(max(find(self._compact_starts, seconds) - 1, 0), len(self._lengths) - 1)
+        offset = min(max(seconds - self._compact_starts[index], 0.0), self._lengths[index])
+        return self._original_starts[index] + offset
+
+    def translate_segments(self, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """把分段时间戳换算为原始录音时间"""
+        return [
+            {
+                **segment,
+                "start": round(self.to_original(segment["start"]), 3),
+                "end": round(self.to_original(segment["end"], is_end=True), 3)
+            }
+            for segment in segments
+        ]
+
+
+def compact(samples: np.ndarray, regions: List[Tuple[int, int]]) -> np.ndarray:
+    """拼接语音区间"""
+    return np.concatenate([samples[start:end] for start, end in regions])